@@ -1,9 +1,18 @@
+import os
 import customtkinter as ctk
 from tkinter import messagebox, ttk
 import tkinter as tk
 from tkinter import filedialog
 from mysql.connector import Error
+import change_log
 import db_config
+import db_worker
+import dashboard_stats
+import report_service
+import excel_export
+import export_jobs
+import bulk_export
+import pdf_report
 import openpyxl
 from openpyxl.styles import Font, Alignment, PatternFill
 from datetime import datetime
@@ -14,10 +23,6 @@ class AdminDashboard:
         self.parent = parent
         self.main_app = main_app
         
-        # Create persistent database connection
-        self.db_connection = None
-        self.get_db_connection()
-        
         # Create main container
         self.container = ctk.CTkFrame(parent)
         self.container.pack(fill="both", expand=True)
@@ -32,45 +37,17 @@ class AdminDashboard:
         self.content_frame = ctk.CTkFrame(self.container)
         self.content_frame.pack(fill="both", expand=True, padx=10, pady=10)
         
+        # Date range (both ends inclusive) and bucket size of the sales report
+        today = datetime.now().date()
+        self.sales_range = (today - timedelta(days=29), today, "day")
+        
         # Show dashboard by default
         self.show_dashboard()
-    
-    def get_db_connection(self):
-        """Get or create database connection - reuse existing if available"""
-        if self.db_connection is None or not self.db_connection.is_connected():
-            try:
-                self.db_connection = db_config.create_connection()
-            except Error as e:
-                messagebox.showerror("Database Error", f"Failed to connect to database: {e}")
-                return None
-        return self.db_connection
-    
-    def execute_query(self, query, params=None, fetch=True, dictionary=False):
-        """Execute a database query with proper error handling"""
-        connection = self.get_db_connection()
-        if not connection:
-            return None
         
-        try:
-            cursor = connection.cursor(dictionary=dictionary)
-            cursor.execute(query, params or ())
-            
-            if fetch:
-                result = cursor.fetchall()
-                cursor.close()
-                return result
-            else:
-                connection.commit()
-                cursor.close()
-                return True
-        except Error as e:
-            messagebox.showerror("Database Error", f"Query failed: {e}")
-            return None
-    
-    def __del__(self):
-        """Close database connection when dashboard is destroyed"""
-        if self.db_connection and self.db_connection.is_connected():
-            self.db_connection.close()
+        # Keep the supplier list current with other clients' changes
+        change_feed = change_log.get_change_feed()
+        change_feed.subscribe(("suppliers",), self.on_suppliers_changed, self.container)
+        change_feed.start(main_app)
     
     def create_header(self):
         header_frame = ctk.CTkFrame(self.container, height=60)
@@ -141,6 +118,22 @@ class AdminDashboard:
         for widget in self.content_frame.winfo_children():
             widget.destroy()
     
+    def run_query(self, func, on_success, error_message, widget=None, tag=None):
+        """Run func(connection) on the background worker and pass its result to on_success"""
+        db_worker.run_async(
+            self.main_app,
+            func,
+            on_success,
+            on_error=lambda e: messagebox.showerror("Error", f"{error_message}: {e}"),
+            widget=widget,
+            tag=tag
+        )
+    
+    def create_loading_label(self, parent):
+        label = ctk.CTkLabel(parent, text="Loading...", font=ctk.CTkFont(size=14), text_color="gray")
+        label.pack(pady=20)
+        return label
+    
     def show_dashboard(self):
         self.clear_content()
         
@@ -159,42 +152,30 @@ class AdminDashboard:
         for i in range(5):
             stats_frame.grid_columnconfigure(i, weight=1, uniform="stats")
         
-        try:
-            connection = self.get_db_connection()
-            if connection:
-                cursor = connection.cursor()
-                
-                # Get total users
-                cursor.execute("SELECT COUNT(*) FROM users")
-                total_users = cursor.fetchone()[0]
-                
-                # Get pending staff approvals
-                cursor.execute("SELECT COUNT(*) FROM users WHERE user_type = 'staff' AND is_approved = FALSE")
-                pending_staff = cursor.fetchone()[0]
-                
-                # Get total products
-                cursor.execute("SELECT COUNT(*) FROM products")
-                total_products = cursor.fetchone()[0]
-                
-                # Get total orders
-                cursor.execute("SELECT COUNT(*) FROM orders")
-                total_orders = cursor.fetchone()[0]
-                
-                # Get total revenue
-                cursor.execute("SELECT SUM(total_amount) FROM orders WHERE status != 'cancelled'")
-                total_revenue = cursor.fetchone()[0] or 0
-                
-                cursor.close()
-                
-                # Display stats with responsive layout (using grid configured above)
-                self.create_stat_card(stats_frame, "Total Users", total_users, "blue").grid(row=0, column=0, padx=10, pady=20, sticky="ew")
-                self.create_stat_card(stats_frame, "Pending Staff", pending_staff, "orange").grid(row=0, column=1, padx=10, pady=20, sticky="ew")
-                self.create_stat_card(stats_frame, "Total Products", total_products, "green").grid(row=0, column=2, padx=10, pady=20, sticky="ew")
-                self.create_stat_card(stats_frame, "Total Orders", total_orders, "purple").grid(row=0, column=3, padx=10, pady=20, sticky="ew")
-                self.create_stat_card(stats_frame, f"Revenue\n${total_revenue:.2f}", "", "green").grid(row=0, column=4, padx=10, pady=20, sticky="ew")
-                
-        except Error as e:
-            messagebox.showerror("Error", f"Failed to load dashboard: {e}")
+        loading_label = ctk.CTkLabel(stats_frame, text="Loading...", font=ctk.CTkFont(size=14), text_color="gray")
+        loading_label.grid(row=0, column=0, columnspan=5, pady=50)
+        
+        def render_stats(stats):
+            total_users = stats['total_users']
+            pending_staff = stats['pending_staff']
+            total_products = stats['total_products']
+            total_orders = stats['total_orders']
+            total_revenue = stats['total_revenue']
+            loading_label.destroy()
+            
+            # Display stats with responsive layout (using grid configured above)
+            self.create_stat_card(stats_frame, "Total Users", total_users, "blue").grid(row=0, column=0, padx=10, pady=20, sticky="ew")
+            self.create_stat_card(stats_frame, "Pending Staff", pending_staff, "orange").grid(row=0, column=1, padx=10, pady=20, sticky="ew")
+            self.create_stat_card(stats_frame, "Total Products", total_products, "green").grid(row=0, column=2, padx=10, pady=20, sticky="ew")
+            self.create_stat_card(stats_frame, "Total Orders", total_orders, "purple").grid(row=0, column=3, padx=10, pady=20, sticky="ew")
+            self.create_stat_card(stats_frame, f"Revenue\n${total_revenue:.2f}", "", "green").grid(row=0, column=4, padx=10, pady=20, sticky="ew")
+        
+        # All counters come from one cached snapshot; only go to MySQL when it has expired
+        stats = dashboard_stats.cached_stats()
+        if stats is not None:
+            render_stats(stats)
+        else:
+            self.run_query(dashboard_stats.get_stats, render_stats, "Failed to load dashboard", widget=stats_frame)
         
         # Quick actions
         actions_frame = ctk.CTkFrame(self.content_frame)
@@ -362,56 +343,57 @@ class AdminDashboard:
         # Clear existing items
         for item in self.users_tree.get_children():
             self.users_tree.delete(item)
+        self.users_tree.insert("", "end", values=("", "Loading..."))
         
-        try:
-            connection = self.get_db_connection()
-            if connection:
-                cursor = connection.cursor(dictionary=True)
-                
-                # Build query
-                query = "SELECT * FROM users WHERE 1=1"
-                params = []
-                
-                # Type filter
-                if self.user_type_var.get() != "All":
-                    query += " AND user_type = %s"
-                    params.append(self.user_type_var.get())
-                
-                # Approval filter
-                if self.approval_var.get() == "Approved":
-                    query += " AND is_approved = TRUE"
-                elif self.approval_var.get() == "Pending":
-                    query += " AND is_approved = FALSE"
-                
-                query += " ORDER BY created_at DESC"
-                
-                cursor.execute(query, params)
-                users = cursor.fetchall()
-                
-                for user in users:
-                    status = "Approved" if user['is_approved'] else "Pending"
-                    tag = "pending" if not user['is_approved'] and user['user_type'] == 'staff' else ""
-                    
-                    # Construct full_name from first_name and last_name if needed
-                    full_name = user.get('full_name') or f"{user.get('first_name', '')} {user.get('last_name', '')}".strip()
-                    
-                    self.users_tree.insert("", "end", values=(
-                        user['id'],
-                        full_name,
-                        user['email'],
-                        user['phone_number'] or 'N/A',
-                        user['user_type'].capitalize(),
-                        status,
-                        user['created_at'].strftime('%Y-%m-%d %H:%M')
-                    ), tags=(tag,))
-                
-                # Highlight pending staff with better colors
-                self.users_tree.tag_configure("pending", background="#fff9c4", foreground="#333333")
+        # Build query
+        query = "SELECT * FROM users WHERE 1=1"
+        params = []
+        
+        # Type filter
+        if self.user_type_var.get() != "All":
+            query += " AND user_type = %s"
+            params.append(self.user_type_var.get())
+        
+        # Approval filter
+        if self.approval_var.get() == "Approved":
+            query += " AND is_approved = TRUE"
+        elif self.approval_var.get() == "Pending":
+            query += " AND is_approved = FALSE"
+        
+        query += " ORDER BY created_at DESC"
+        
+        def fetch_users(connection):
+            cursor = connection.cursor(dictionary=True)
+            cursor.execute(query, params)
+            users = cursor.fetchall()
+            cursor.close()
+            return users
+        
+        def render_users(users):
+            for item in self.users_tree.get_children():
+                self.users_tree.delete(item)
+            
+            for user in users:
+                status = "Approved" if user['is_approved'] else "Pending"
+                tag = "pending" if not user['is_approved'] and user['user_type'] == 'staff' else ""
                 
-                cursor.close()
+                # Construct full_name from first_name and last_name if needed
+                full_name = user.get('full_name') or f"{user.get('first_name', '')} {user.get('last_name', '')}".strip()
                 
-        except Error as e:
-            messagebox.showerror("Error", f"Failed to load users: {e}")
+                self.users_tree.insert("", "end", values=(
+                    user['id'],
+                    full_name,
+                    user['email'],
+                    user['phone_number'] or 'N/A',
+                    user['user_type'].capitalize(),
+                    status,
+                    user['created_at'].strftime('%Y-%m-%d %H:%M')
+                ), tags=(tag,))
+            
+            # Highlight pending staff with better colors
+            self.users_tree.tag_configure("pending", background="#fff9c4", foreground="#333333")
+        
+        self.run_query(fetch_users, render_users, "Failed to load users", widget=self.users_tree, tag="admin.users")
     
     def approve_staff(self):
         selected = self.users_tree.selection()
@@ -432,14 +414,14 @@ class AdminDashboard:
             return
         
         try:
-            connection = self.get_db_connection()
-            if connection:
+            with db_config.get_connection() as connection:
                 cursor = connection.cursor()
                 cursor.execute(
                     "UPDATE users SET is_approved = TRUE WHERE id = %s",
                     (user_id,)
                 )
                 connection.commit()
+                dashboard_stats.invalidate()
                 cursor.close()
                 
                 messagebox.showinfo("Success", "Staff member approved successfully")
@@ -465,11 +447,11 @@ class AdminDashboard:
             user_id = self.users_tree.item(selected[0])['values'][0]
             
             try:
-                connection = self.get_db_connection()
-                if connection:
+                with db_config.get_connection() as connection:
                     cursor = connection.cursor()
                     cursor.execute("DELETE FROM users WHERE id = %s", (user_id,))
                     connection.commit()
+                    dashboard_stats.invalidate()
                     cursor.close()
                     
                     messagebox.showinfo("Success", "User deleted successfully")
@@ -574,34 +556,83 @@ class AdminDashboard:
         # Check if treeview exists
         if not hasattr(self, 'suppliers_tree') or self.suppliers_tree is None:
             return
+        if not self.suppliers_tree.winfo_exists():
+            return
         
         # Clear existing items
         for item in self.suppliers_tree.get_children():
             self.suppliers_tree.delete(item)
+        self.suppliers_tree.insert("", "end", values=("", "Loading..."))
         
-        try:
-            # Use fresh connection to get latest data
-            connection = db_config.create_connection()
-            if connection:
-                cursor = connection.cursor(dictionary=True)
-                cursor.execute("SELECT * FROM suppliers ORDER BY name")
-                suppliers = cursor.fetchall()
-                
-                for supplier in suppliers:
-                    self.suppliers_tree.insert("", "end", values=(
-                        supplier['id'],
-                        supplier['name'],
-                        supplier['contact_person'] or 'N/A',
-                        supplier['email'] or 'N/A',
-                        supplier['phone'] or 'N/A',
-                        supplier['address'] or 'N/A'
-                    ))
-                
-                cursor.close()
-                connection.close()
-                
-        except Error as e:
-            messagebox.showerror("Error", f"Failed to load suppliers: {e}")
+        def fetch_suppliers(connection):
+            cursor = connection.cursor(dictionary=True)
+            cursor.execute("SELECT * FROM suppliers ORDER BY name")
+            suppliers = cursor.fetchall()
+            cursor.close()
+            return suppliers
+        
+        def render_suppliers(suppliers):
+            for item in self.suppliers_tree.get_children():
+                self.suppliers_tree.delete(item)
+            
+            for supplier in suppliers:
+                # The supplier id is the row's iid, so changed rows can be found and patched
+                self.suppliers_tree.insert("", "end", iid=str(supplier['id']), values=self.supplier_values(supplier))
+        
+        self.run_query(fetch_suppliers, render_suppliers, "Failed to load suppliers",
+                       widget=self.suppliers_tree, tag="admin.suppliers")
+    
+    def supplier_values(self, supplier):
+        return (
+            supplier['id'],
+            supplier['name'],
+            supplier['contact_person'] or 'N/A',
+            supplier['email'] or 'N/A',
+            supplier['phone'] or 'N/A',
+            supplier['address'] or 'N/A'
+        )
+    
+    def on_suppliers_changed(self, changes):
+        """Patch the changed rows of the supplier list (change log subscriber)"""
+        if not hasattr(self, 'suppliers_tree') or self.suppliers_tree is None:
+            return
+        if not self.suppliers_tree.winfo_exists():
+            return
+        if changes is None:
+            self.load_suppliers()
+            return
+        
+        supplier_ids = list(changes['suppliers'])
+        
+        def fetch_suppliers(connection):
+            cursor = connection.cursor(dictionary=True)
+            placeholders = ", ".join(["%s"] * len(supplier_ids))
+            cursor.execute(f"SELECT * FROM suppliers WHERE id IN ({placeholders})", supplier_ids)
+            suppliers = {supplier['id']: supplier for supplier in cursor.fetchall()}
+            cursor.close()
+            return suppliers
+        
+        def patch_suppliers(suppliers):
+            tree = self.suppliers_tree
+            for supplier_id in supplier_ids:
+                iid = str(supplier_id)
+                supplier = suppliers.get(supplier_id)
+                if supplier is None:
+                    # Deleted
+                    if tree.exists(iid):
+                        tree.delete(iid)
+                    continue
+                if tree.exists(iid):
+                    tree.delete(iid)
+                # Keep the list sorted by name
+                position = "end"
+                for index, child in enumerate(tree.get_children()):
+                    if str(tree.item(child)['values'][1]).lower() > supplier['name'].lower():
+                        position = index
+                        break
+                tree.insert("", position, iid=iid, values=self.supplier_values(supplier))
+        
+        self.run_query(fetch_suppliers, patch_suppliers, "Failed to refresh suppliers", widget=self.suppliers_tree)
     
     def add_supplier(self):
         AddSupplierDialog(self.main_app, self)
@@ -627,23 +658,20 @@ class AdminDashboard:
             supplier_id = self.suppliers_tree.item(selected[0])['values'][0]
             
             try:
-                # Use a fresh connection to ensure proper deletion
-                connection = db_config.create_connection()
-                if connection:
+                with db_config.get_connection() as connection:
                     cursor = connection.cursor()
                     cursor.execute("DELETE FROM suppliers WHERE id = %s", (supplier_id,))
                     connection.commit()
                     cursor.close()
-                    connection.close()
                     
-                    messagebox.showinfo("Success", "Supplier deleted successfully")
-                    # Refresh supplier list after a brief delay
-                    self.main_app.after(100, self.load_suppliers) 
+                messagebox.showinfo("Success", "Supplier deleted successfully")
+                # The change log drops the deleted row from the supplier list
+                change_log.get_change_feed().poll_now()
                     
             except Error as e:
                 messagebox.showerror("Error", f"Failed to delete supplier: {e}")
     
-    def show_reports(self):
+    def show_reports(self, refresh=False):
         self.clear_content()
         
         # Title and Export button frame
@@ -667,384 +695,692 @@ class AdminDashboard:
         )
         export_button.pack(side="right", padx=10)
         
+        # Full history export (every order, order line, product and customer)
+        ctk.CTkButton(
+            title_frame,
+            text="Export Full History",
+            width=150,
+            command=self.export_full_history
+        ).pack(side="right", padx=10)
+        
+        # Printable report with the sales breakdown and order appendix for a date range
+        ctk.CTkButton(
+            title_frame,
+            text="Export PDF",
+            width=120,
+            command=lambda: PdfReportDialog(self.main_app, self)
+        ).pack(side="right", padx=10)
+        
+        # Raw table dumps for analysis tools (CSV / gzip CSV / Parquet)
+        ctk.CTkButton(
+            title_frame,
+            text="Bulk Export",
+            width=120,
+            command=lambda: BulkExportDialog(self.main_app, self)
+        ).pack(side="right", padx=10)
+        
+        ctk.CTkButton(
+            title_frame,
+            text="Refresh",
+            width=100,
+            command=lambda: self.show_reports(refresh=True)
+        ).pack(side="right", padx=10)
+        
+        generated_label = ctk.CTkLabel(title_frame, text="", font=ctk.CTkFont(size=12), text_color="gray")
+        generated_label.pack(side="right", padx=10)
+        
         # Reports container
-        reports_frame = ctk.CTkFrame(self.content_frame)
+        reports_frame = ctk.CTkScrollableFrame(self.content_frame)
         reports_frame.pack(fill="both", expand=True, padx=20, pady=10)
         
-        # Sales Report
-        sales_frame = ctk.CTkFrame(reports_frame)
-        sales_frame.pack(fill="x", padx=10, pady=10)
+        loading_label = self.create_loading_label(reports_frame)
         
-        ctk.CTkLabel(
-            sales_frame,
-            text="📊 Sales Report",
-            font=ctk.CTkFont(size=18, weight="bold")
-        ).pack(anchor="w", padx=10, pady=10)
+        def fetch_reports(connection):
+            return report_service.get_report_service().get_report(connection, refresh=refresh)
         
-        try:
-            connection = self.get_db_connection()
-            if connection:
-                cursor = connection.cursor(dictionary=True)
-                
-                # Total Sales
-                cursor.execute("SELECT COUNT(*), SUM(total_amount) FROM orders WHERE status != 'cancelled'")
-                sales_data = cursor.fetchone()
-                total_orders = sales_data['COUNT(*)'] or 0
-                total_revenue = sales_data['SUM(total_amount)'] or 0
-                
-                ctk.CTkLabel(
-                    sales_frame,
-                    text=f"Total Orders: {total_orders} | Total Revenue: ${total_revenue:.2f}",
-                    font=ctk.CTkFont(size=14)
-                ).pack(anchor="w", padx=20, pady=5)
-                
-                # Top Products
-                cursor.execute("""
-                    SELECT p.name, SUM(oi.quantity) as total_sold, SUM(oi.quantity * oi.price) as revenue
-                    FROM order_items oi
-                    JOIN products p ON oi.product_id = p.id
-                    GROUP BY p.id
-                    ORDER BY total_sold DESC
-                    LIMIT 5
-                """)
-                top_products = cursor.fetchall()
-                
-                ctk.CTkLabel(
-                    sales_frame,
-                    text="Top 5 Products:",
-                    font=ctk.CTkFont(size=14, weight="bold")
-                ).pack(anchor="w", padx=20, pady=(10, 5))
-                
-                for i, product in enumerate(top_products, 1):
-                    ctk.CTkLabel(
-                        sales_frame,
-                        text=f"  {i}. {product['name']} - {product['total_sold']} sold (${product['revenue']:.2f})",
-                        font=ctk.CTkFont(size=12)
-                    ).pack(anchor="w", padx=30, pady=2)
-                
-                # Inventory Report
-                inventory_frame = ctk.CTkFrame(reports_frame)
-                inventory_frame.pack(fill="x", padx=10, pady=10)
-                
-                ctk.CTkLabel(
-                    inventory_frame,
-                    text="📦 Inventory Report",
-                    font=ctk.CTkFont(size=18, weight="bold")
-                ).pack(anchor="w", padx=10, pady=10)
-                
-                cursor.execute("SELECT COUNT(*), SUM(quantity) FROM products")
-                inv_data = cursor.fetchone()
-                total_products = inv_data['COUNT(*)'] or 0
-                total_stock = inv_data['SUM(quantity)'] or 0
-                
-                cursor.execute("SELECT COUNT(*) FROM products WHERE quantity <= reorder_level")
-                low_stock_count = cursor.fetchone()['COUNT(*)']
-                
-                ctk.CTkLabel(
-                    inventory_frame,
-                    text=f"Total Products: {total_products} | Total Stock Units: {total_stock} | Low Stock Items: {low_stock_count}",
-                    font=ctk.CTkFont(size=14)
-                ).pack(anchor="w", padx=20, pady=5)
-                
-                # Customer Report
-                customer_frame = ctk.CTkFrame(reports_frame)
-                customer_frame.pack(fill="x", padx=10, pady=10)
-                
-                ctk.CTkLabel(
-                    customer_frame,
-                    text="👥 Customer Report",
-                    font=ctk.CTkFont(size=18, weight="bold")
-                ).pack(anchor="w", padx=10, pady=10)
-                
-                cursor.execute("SELECT COUNT(*) FROM users WHERE user_type = 'customer'")
-                total_customers = cursor.fetchone()['COUNT(*)']
-                
-                # Top Customers
-                cursor.execute("""
-                    SELECT CONCAT(u.first_name, ' ', u.last_name) as full_name, u.email, COUNT(o.id) as order_count, SUM(o.total_amount) as total_spent
-                    FROM users u
-                    JOIN orders o ON u.id = o.customer_id
-                    WHERE u.user_type = 'customer' AND o.status != 'cancelled'
-                    GROUP BY u.id
-                    ORDER BY total_spent DESC
-                    LIMIT 5
-                """)
-                top_customers = cursor.fetchall()
-                
-                ctk.CTkLabel(
-                    customer_frame,
-                    text=f"Total Customers: {total_customers}",
-                    font=ctk.CTkFont(size=14)
-                ).pack(anchor="w", padx=20, pady=5)
-                
-                ctk.CTkLabel(
-                    customer_frame,
-                    text="Top 5 Customers by Spending:",
-                    font=ctk.CTkFont(size=14, weight="bold")
-                ).pack(anchor="w", padx=20, pady=(10, 5))
-                
-                for i, customer in enumerate(top_customers, 1):
-                    ctk.CTkLabel(
-                        customer_frame,
-                        text=f"  {i}. {customer['full_name']} - {customer['order_count']} orders (${customer['total_spent']:.2f})",
-                        font=ctk.CTkFont(size=12)
-                    ).pack(anchor="w", padx=30, pady=2)
-                
-                cursor.close()
-                
-        except Error as e:
-            messagebox.showerror("Error", f"Failed to load reports: {e}")
-    
-    def export_reports_to_excel(self):
-        """Export all reports to an Excel file"""
-        try:
-            # Ask user where to save the file
-            filename = filedialog.asksaveasfilename(
-                defaultextension=".xlsx",
-                filetypes=[("Excel files", "*.xlsx"), ("All files", "*.*")],
-                title="Save Reports as Excel"
-            )
+        def render_reports(report):
+            loading_label.destroy()
+            generated_label.configure(text=f"Generated at {report.generated_at.strftime('%H:%M:%S')}")
             
-            if not filename:
-                return  # User cancelled
+            # Sales Report
+            sales_frame = ctk.CTkFrame(reports_frame)
+            sales_frame.pack(fill="x", padx=10, pady=10)
             
-            # Create a new workbook
-            wb = openpyxl.Workbook()
-            wb.remove(wb.active)  # Remove default sheet
-            
-            connection = self.get_db_connection()
-            if not connection:
-                messagebox.showerror("Error", "Failed to connect to database")
-                return
-            
-            cursor = connection.cursor(dictionary=True)
-            
-            # Get current user info for metadata
-            current_user_name = f"{self.main_app.current_user.get('first_name', '')} {self.main_app.current_user.get('last_name', '')}".strip()
-            current_user_email = self.main_app.current_user.get('email', 'N/A')
-            access_date = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            
-            # ========== SALES REPORT ==========
-            sales_sheet = wb.create_sheet("Sales Report")
-            
-            # Header with metadata
-            sales_sheet['A1'] = "Smart Inventory Management System - Sales Report"
-            sales_sheet['A1'].font = Font(size=16, bold=True)
-            sales_sheet.merge_cells('A1:D1')
+            ctk.CTkLabel(
+                sales_frame,
+                text="📊 Sales Report",
+                font=ctk.CTkFont(size=18, weight="bold")
+            ).pack(anchor="w", padx=10, pady=10)
             
-            sales_sheet['A2'] = f"Generated on: {access_date}"
-            sales_sheet['A3'] = f"Accessed by: {current_user_name} ({current_user_email})"
-            sales_sheet['A4'] = ""  # Empty row
+            ctk.CTkLabel(
+                sales_frame,
+                text=f"All Time - Total Orders: {report.total_orders} | Total Revenue: ${report.total_revenue:.2f}",
+                font=ctk.CTkFont(size=14)
+            ).pack(anchor="w", padx=20, pady=5)
             
-            row = 5
+            ctk.CTkLabel(
+                sales_frame,
+                text="Top 5 Products (All Time):",
+                font=ctk.CTkFont(size=14, weight="bold")
+            ).pack(anchor="w", padx=20, pady=(10, 5))
             
-            # Total Sales
-            cursor.execute("SELECT COUNT(*) as total_orders, SUM(total_amount) as total_revenue FROM orders WHERE status != 'cancelled'")
-            sales_data = cursor.fetchone()
-            total_orders = sales_data['total_orders'] or 0
-            total_revenue = sales_data['total_revenue'] or 0
+            for i, product in enumerate(report.top_products, 1):
+                ctk.CTkLabel(
+                    sales_frame,
+                    text=f"  {i}. {product.name} - {product.total_sold} sold (${product.revenue:.2f})",
+                    font=ctk.CTkFont(size=12)
+                ).pack(anchor="w", padx=30, pady=2)
             
-            sales_sheet['A5'] = "Summary"
-            sales_sheet['A5'].font = Font(size=14, bold=True)
-            row = 6
-            sales_sheet[f'A{row}'] = "Total Orders:"
-            sales_sheet[f'B{row}'] = total_orders
-            row += 1
-            sales_sheet[f'A{row}'] = "Total Revenue:"
-            sales_sheet[f'B{row}'] = f"${total_revenue:.2f}"
-            row += 2
+            self.create_sales_range_controls(sales_frame)
             
-            # Top Products
-            sales_sheet[f'A{row}'] = "Top 5 Products"
-            sales_sheet[f'A{row}'].font = Font(size=14, bold=True)
-            row += 1
+            # Inventory Report
+            inventory_frame = ctk.CTkFrame(reports_frame)
+            inventory_frame.pack(fill="x", padx=10, pady=10)
             
-            headers = ["Rank", "Product Name", "Total Sold", "Revenue"]
-            for col, header in enumerate(headers, 1):
-                cell = sales_sheet.cell(row, col, header)
-                cell.font = Font(bold=True)
-                cell.fill = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
-                cell.font = Font(bold=True, color="FFFFFF")
-                cell.alignment = Alignment(horizontal="center")
+            ctk.CTkLabel(
+                inventory_frame,
+                text="📦 Inventory Report",
+                font=ctk.CTkFont(size=18, weight="bold")
+            ).pack(anchor="w", padx=10, pady=10)
             
-            row += 1
+            ctk.CTkLabel(
+                inventory_frame,
+                text=f"Total Products: {report.total_products} | Total Stock Units: {report.total_stock} | Low Stock Items: {report.low_stock_count}",
+                font=ctk.CTkFont(size=14)
+            ).pack(anchor="w", padx=20, pady=5)
             
-            cursor.execute("""
-                SELECT p.name, SUM(oi.quantity) as total_sold, SUM(oi.quantity * oi.price) as revenue
-                FROM order_items oi
-                JOIN products p ON oi.product_id = p.id
-                GROUP BY p.id
-                ORDER BY total_sold DESC
-                LIMIT 5
-            """)
-            top_products = cursor.fetchall()
+            # Customer Report
+            customer_frame = ctk.CTkFrame(reports_frame)
+            customer_frame.pack(fill="x", padx=10, pady=10)
             
-            for rank, product in enumerate(top_products, 1):
-                sales_sheet.cell(row, 1, rank)
-                sales_sheet.cell(row, 2, product['name'])
-                sales_sheet.cell(row, 3, product['total_sold'])
-                sales_sheet.cell(row, 4, f"${product['revenue']:.2f}")
-                row += 1
+            ctk.CTkLabel(
+                customer_frame,
+                text="👥 Customer Report",
+                font=ctk.CTkFont(size=18, weight="bold")
+            ).pack(anchor="w", padx=10, pady=10)
             
-            # Adjust column widths
-            sales_sheet.column_dimensions['A'].width = 15
-            sales_sheet.column_dimensions['B'].width = 30
-            sales_sheet.column_dimensions['C'].width = 15
-            sales_sheet.column_dimensions['D'].width = 15
+            ctk.CTkLabel(
+                customer_frame,
+                text=f"Total Customers: {report.total_customers}",
+                font=ctk.CTkFont(size=14)
+            ).pack(anchor="w", padx=20, pady=5)
             
-            # ========== INVENTORY REPORT ==========
-            inventory_sheet = wb.create_sheet("Inventory Report")
+            ctk.CTkLabel(
+                customer_frame,
+                text="Top 5 Customers by Spending:",
+                font=ctk.CTkFont(size=14, weight="bold")
+            ).pack(anchor="w", padx=20, pady=(10, 5))
             
-            inventory_sheet['A1'] = "Smart Inventory Management System - Inventory Report"
-            inventory_sheet['A1'].font = Font(size=16, bold=True)
-            inventory_sheet.merge_cells('A1:D1')
+            for i, customer in enumerate(report.top_customers, 1):
+                ctk.CTkLabel(
+                    customer_frame,
+                    text=f"  {i}. {customer.full_name} - {customer.order_count} orders (${customer.total_spent:.2f})",
+                    font=ctk.CTkFont(size=12)
+                ).pack(anchor="w", padx=30, pady=2)
+        
+        self.run_query(fetch_reports, render_reports, "Failed to load reports", widget=reports_frame)
+    
+    def create_sales_range_controls(self, parent):
+        """Date range and bucket pickers above the rollup-backed sales figures"""
+        start, end, granularity = self.sales_range
+        
+        controls = ctk.CTkFrame(parent, fg_color="transparent")
+        controls.pack(fill="x", padx=20, pady=(10, 5))
+        
+        ctk.CTkLabel(controls, text="From:", font=ctk.CTkFont(size=12)).pack(side="left")
+        start_entry = ctk.CTkEntry(controls, width=110)
+        start_entry.insert(0, start.strftime("%Y-%m-%d"))
+        start_entry.pack(side="left", padx=(5, 10))
+        
+        ctk.CTkLabel(controls, text="To:", font=ctk.CTkFont(size=12)).pack(side="left")
+        end_entry = ctk.CTkEntry(controls, width=110)
+        end_entry.insert(0, end.strftime("%Y-%m-%d"))
+        end_entry.pack(side="left", padx=(5, 10))
+        
+        granularity_var = tk.StringVar(value=granularity)
+        ctk.CTkOptionMenu(
+            controls,
+            variable=granularity_var,
+            values=list(report_service.PERIOD_LABELS),
+            width=100
+        ).pack(side="left", padx=(0, 10))
+        
+        range_frame = ctk.CTkFrame(parent, fg_color="transparent")
+        range_frame.pack(fill="x", padx=10, pady=(0, 10))
+        
+        def apply_range():
+            try:
+                new_start = datetime.strptime(start_entry.get().strip(), "%Y-%m-%d").date()
+                new_end = datetime.strptime(end_entry.get().strip(), "%Y-%m-%d").date()
+            except ValueError:
+                messagebox.showerror("Error", "Please enter dates as YYYY-MM-DD")
+                return
+            if new_end < new_start:
+                messagebox.showerror("Error", "The end date must not be before the start date")
+                return
+            self.sales_range = (new_start, new_end, granularity_var.get())
+            self.load_sales_range(range_frame)
+        
+        ctk.CTkButton(controls, text="Apply", width=80, command=apply_range).pack(side="left")
+        
+        self.load_sales_range(range_frame)
+    
+    def load_sales_range(self, range_frame):
+        """Load totals, buckets and top products for self.sales_range from the daily_sales rollup"""
+        start, end, granularity = self.sales_range
+        for child in range_frame.winfo_children():
+            child.destroy()
+        loading_label = self.create_loading_label(range_frame)
+        
+        def fetch_sales(connection):
+            cursor = connection.cursor(dictionary=True)
+            try:
+                # The query range is half-open: [start, day after end)
+                return report_service.fetch_sales_report(cursor, start, end + timedelta(days=1), granularity)
+            finally:
+                cursor.close()
+        
+        def render_sales(sales):
+            loading_label.destroy()
             
-            inventory_sheet['A2'] = f"Generated on: {access_date}"
-            inventory_sheet['A3'] = f"Accessed by: {current_user_name} ({current_user_email})"
-            inventory_sheet['A4'] = ""
+            ctk.CTkLabel(
+                range_frame,
+                text=f"{start:%Y-%m-%d} to {end:%Y-%m-%d} - Orders: {sales.order_count} | "
+                     f"Revenue: ${sales.revenue:.2f} | Units Sold: {sales.units}",
+                font=ctk.CTkFont(size=14)
+            ).pack(anchor="w", padx=10, pady=5)
             
-            row = 5
+            # Buckets
+            tree_frame = ctk.CTkFrame(range_frame)
+            tree_frame.pack(fill="x", padx=10, pady=5)
             
-            cursor.execute("SELECT COUNT(*) as total_products, SUM(quantity) as total_stock FROM products")
-            inv_data = cursor.fetchone()
-            total_products = inv_data['total_products'] or 0
-            total_stock = inv_data['total_stock'] or 0
+            columns = ("Period", "Orders", "Units", "Revenue")
+            tree = ttk.Treeview(tree_frame, columns=columns, show="headings", height=min(10, max(1, len(sales.periods))))
+            for col in columns:
+                tree.heading(col, text=col)
+                tree.column(col, width=150)
+            for period in sales.periods:
+                tree.insert("", "end", values=(period.period, period.order_count, period.units, f"${period.revenue:.2f}"))
             
-            cursor.execute("SELECT COUNT(*) as low_stock_count FROM products WHERE quantity <= reorder_level")
-            low_stock_data = cursor.fetchone()
-            low_stock_count = low_stock_data['low_stock_count'] or 0
+            scrollbar = ttk.Scrollbar(tree_frame, orient="vertical", command=tree.yview)
+            tree.configure(yscrollcommand=scrollbar.set)
+            tree.pack(side="left", fill="x", expand=True)
+            scrollbar.pack(side="right", fill="y")
             
-            inventory_sheet['A5'] = "Summary"
-            inventory_sheet['A5'].font = Font(size=14, bold=True)
-            row = 6
-            inventory_sheet[f'A{row}'] = "Total Products:"
-            inventory_sheet[f'B{row}'] = total_products
-            row += 1
-            inventory_sheet[f'A{row}'] = "Total Stock Units:"
-            inventory_sheet[f'B{row}'] = total_stock
-            row += 1
-            inventory_sheet[f'A{row}'] = "Low Stock Items:"
-            inventory_sheet[f'B{row}'] = low_stock_count
-            row += 2
-            
-            # Low Stock Items Detail
-            inventory_sheet[f'A{row}'] = "Low Stock Items (Qty <= Reorder Level)"
-            inventory_sheet[f'A{row}'].font = Font(size=14, bold=True)
-            row += 1
-            
-            headers = ["Product ID", "Product Name", "Current Quantity", "Reorder Level", "Status"]
-            for col, header in enumerate(headers, 1):
-                cell = inventory_sheet.cell(row, col, header)
-                cell.font = Font(bold=True)
-                cell.fill = PatternFill(start_color="D32F2F", end_color="D32F2F", fill_type="solid")
-                cell.font = Font(bold=True, color="FFFFFF")
-                cell.alignment = Alignment(horizontal="center")
+            ctk.CTkLabel(
+                range_frame,
+                text="Top 5 Products in Period:",
+                font=ctk.CTkFont(size=14, weight="bold")
+            ).pack(anchor="w", padx=10, pady=(10, 5))
             
+            if not sales.top_products:
+                ctk.CTkLabel(range_frame, text="  No sales in this period", font=ctk.CTkFont(size=12)).pack(anchor="w", padx=20, pady=2)
+            for i, product in enumerate(sales.top_products, 1):
+                ctk.CTkLabel(
+                    range_frame,
+                    text=f"  {i}. {product.name} - {product.total_sold} sold (${product.revenue:.2f})",
+                    font=ctk.CTkFont(size=12)
+                ).pack(anchor="w", padx=20, pady=2)
+        
+        self.run_query(fetch_sales, render_sales, "Failed to load sales report", widget=range_frame, tag="admin.sales_range")
+    
+    def export_reports_to_excel(self):
+        """Export all reports to an Excel file"""
+        # Ask user where to save the file
+        filename = filedialog.asksaveasfilename(
+            defaultextension=".xlsx",
+            filetypes=[("Excel files", "*.xlsx"), ("All files", "*.*")],
+            title="Save Reports as Excel"
+        )
+        
+        if not filename:
+            return  # User cancelled
+        
+        def export(connection, job):
+            # Reuses the report on screen when it is still fresh
+            job.set_stage("Computing reports...")
+            report = report_service.get_report_service().get_report(connection)
+            job.set_stage("Writing workbook...")
+            self.write_reports_workbook(report, filename)
+        
+        self.start_export_job(
+            export_jobs.ExportJob("Export Reports", filename),
+            export,
+            lambda result: f"Reports exported successfully to:\n{filename}"
+        )
+    
+    def write_reports_workbook(self, report, filename):
+        """Write a computed report to an Excel file (safe to call from a worker thread)"""
+        # Create a new workbook
+        wb = openpyxl.Workbook()
+        wb.remove(wb.active)  # Remove default sheet
+        
+        # Get current user info for metadata
+        current_user_name = f"{self.main_app.current_user.get('first_name', '')} {self.main_app.current_user.get('last_name', '')}".strip()
+        current_user_email = self.main_app.current_user.get('email', 'N/A')
+        access_date = report.generated_at.strftime("%Y-%m-%d %H:%M:%S")
+        
+        # ========== SALES REPORT ==========
+        sales_sheet = wb.create_sheet("Sales Report")
+        
+        # Header with metadata
+        sales_sheet['A1'] = "Smart Inventory Management System - Sales Report"
+        sales_sheet['A1'].font = Font(size=16, bold=True)
+        sales_sheet.merge_cells('A1:D1')
+        
+        sales_sheet['A2'] = f"Generated on: {access_date}"
+        sales_sheet['A3'] = f"Accessed by: {current_user_name} ({current_user_email})"
+        sales_sheet['A4'] = ""  # Empty row
+        
+        row = 5
+        
+        # Total Sales
+        total_orders = report.total_orders
+        total_revenue = report.total_revenue
+        
+        sales_sheet['A5'] = "Summary"
+        sales_sheet['A5'].font = Font(size=14, bold=True)
+        row = 6
+        sales_sheet[f'A{row}'] = "Total Orders:"
+        sales_sheet[f'B{row}'] = total_orders
+        row += 1
+        sales_sheet[f'A{row}'] = "Total Revenue:"
+        sales_sheet[f'B{row}'] = f"${total_revenue:.2f}"
+        row += 2
+        
+        # Top Products
+        sales_sheet[f'A{row}'] = "Top 5 Products"
+        sales_sheet[f'A{row}'].font = Font(size=14, bold=True)
+        row += 1
+        
+        headers = ["Rank", "Product Name", "Total Sold", "Revenue"]
+        for col, header in enumerate(headers, 1):
+            cell = sales_sheet.cell(row, col, header)
+            cell.font = Font(bold=True)
+            cell.fill = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
+            cell.font = Font(bold=True, color="FFFFFF")
+            cell.alignment = Alignment(horizontal="center")
+        
+        row += 1
+        
+        for rank, product in enumerate(report.top_products, 1):
+            sales_sheet.cell(row, 1, rank)
+            sales_sheet.cell(row, 2, product.name)
+            sales_sheet.cell(row, 3, product.total_sold)
+            sales_sheet.cell(row, 4, f"${product.revenue:.2f}")
             row += 1
-            
-            cursor.execute("""
-                SELECT id, name, quantity, reorder_level
-                FROM products
-                WHERE quantity <= reorder_level
-                ORDER BY quantity ASC
-            """)
-            low_stock_items = cursor.fetchall()
-            
-            for item in low_stock_items:
-                inventory_sheet.cell(row, 1, item['id'])
-                inventory_sheet.cell(row, 2, item['name'])
-                inventory_sheet.cell(row, 3, item['quantity'])
-                inventory_sheet.cell(row, 4, item['reorder_level'])
-                inventory_sheet.cell(row, 5, "LOW STOCK")
-                row += 1
-            
-            # Adjust column widths
-            inventory_sheet.column_dimensions['A'].width = 12
-            inventory_sheet.column_dimensions['B'].width = 30
-            inventory_sheet.column_dimensions['C'].width = 18
-            inventory_sheet.column_dimensions['D'].width = 15
-            inventory_sheet.column_dimensions['E'].width = 15
-            
-            # ========== CUSTOMER REPORT ==========
-            customer_sheet = wb.create_sheet("Customer Report")
-            
-            customer_sheet['A1'] = "Smart Inventory Management System - Customer Report"
-            customer_sheet['A1'].font = Font(size=16, bold=True)
-            customer_sheet.merge_cells('A1:E1')
-            
-            customer_sheet['A2'] = f"Generated on: {access_date}"
-            customer_sheet['A3'] = f"Accessed by: {current_user_name} ({current_user_email})"
-            customer_sheet['A4'] = ""
-            
-            row = 5
-            
-            cursor.execute("SELECT COUNT(*) as total_customers FROM users WHERE user_type = 'customer'")
-            customer_data = cursor.fetchone()
-            total_customers = customer_data['total_customers'] or 0
-            
-            customer_sheet['A5'] = "Summary"
-            customer_sheet['A5'].font = Font(size=14, bold=True)
-            row = 6
-            customer_sheet[f'A{row}'] = "Total Customers:"
-            customer_sheet[f'B{row}'] = total_customers
-            row += 2
-            
-            # Top Customers
-            customer_sheet[f'A{row}'] = "Top 5 Customers by Spending"
-            customer_sheet[f'A{row}'].font = Font(size=14, bold=True)
+        
+        # Adjust column widths
+        sales_sheet.column_dimensions['A'].width = 15
+        sales_sheet.column_dimensions['B'].width = 30
+        sales_sheet.column_dimensions['C'].width = 15
+        sales_sheet.column_dimensions['D'].width = 15
+        
+        # ========== INVENTORY REPORT ==========
+        inventory_sheet = wb.create_sheet("Inventory Report")
+        
+        inventory_sheet['A1'] = "Smart Inventory Management System - Inventory Report"
+        inventory_sheet['A1'].font = Font(size=16, bold=True)
+        inventory_sheet.merge_cells('A1:D1')
+        
+        inventory_sheet['A2'] = f"Generated on: {access_date}"
+        inventory_sheet['A3'] = f"Accessed by: {current_user_name} ({current_user_email})"
+        inventory_sheet['A4'] = ""
+        
+        row = 5
+        
+        total_products = report.total_products
+        total_stock = report.total_stock
+        low_stock_count = report.low_stock_count
+        
+        inventory_sheet['A5'] = "Summary"
+        inventory_sheet['A5'].font = Font(size=14, bold=True)
+        row = 6
+        inventory_sheet[f'A{row}'] = "Total Products:"
+        inventory_sheet[f'B{row}'] = total_products
+        row += 1
+        inventory_sheet[f'A{row}'] = "Total Stock Units:"
+        inventory_sheet[f'B{row}'] = total_stock
+        row += 1
+        inventory_sheet[f'A{row}'] = "Low Stock Items:"
+        inventory_sheet[f'B{row}'] = low_stock_count
+        row += 2
+        
+        # Low Stock Items Detail
+        inventory_sheet[f'A{row}'] = "Low Stock Items (Qty <= Reorder Level)"
+        inventory_sheet[f'A{row}'].font = Font(size=14, bold=True)
+        row += 1
+        
+        headers = ["Product ID", "Product Name", "Current Quantity", "Reorder Level", "Status"]
+        for col, header in enumerate(headers, 1):
+            cell = inventory_sheet.cell(row, col, header)
+            cell.font = Font(bold=True)
+            cell.fill = PatternFill(start_color="D32F2F", end_color="D32F2F", fill_type="solid")
+            cell.font = Font(bold=True, color="FFFFFF")
+            cell.alignment = Alignment(horizontal="center")
+        
+        row += 1
+        
+        for item in report.low_stock_items:
+            inventory_sheet.cell(row, 1, item.id)
+            inventory_sheet.cell(row, 2, item.name)
+            inventory_sheet.cell(row, 3, item.quantity)
+            inventory_sheet.cell(row, 4, item.reorder_level)
+            inventory_sheet.cell(row, 5, "LOW STOCK")
             row += 1
-            
-            headers = ["Rank", "Customer Name", "Email", "Order Count", "Total Spent"]
-            for col, header in enumerate(headers, 1):
-                cell = customer_sheet.cell(row, col, header)
-                cell.font = Font(bold=True)
-                cell.fill = PatternFill(start_color="2E7D32", end_color="2E7D32", fill_type="solid")
-                cell.font = Font(bold=True, color="FFFFFF")
-                cell.alignment = Alignment(horizontal="center")
-            
+        
+        # Adjust column widths
+        inventory_sheet.column_dimensions['A'].width = 12
+        inventory_sheet.column_dimensions['B'].width = 30
+        inventory_sheet.column_dimensions['C'].width = 18
+        inventory_sheet.column_dimensions['D'].width = 15
+        inventory_sheet.column_dimensions['E'].width = 15
+        
+        # ========== CUSTOMER REPORT ==========
+        customer_sheet = wb.create_sheet("Customer Report")
+        
+        customer_sheet['A1'] = "Smart Inventory Management System - Customer Report"
+        customer_sheet['A1'].font = Font(size=16, bold=True)
+        customer_sheet.merge_cells('A1:E1')
+        
+        customer_sheet['A2'] = f"Generated on: {access_date}"
+        customer_sheet['A3'] = f"Accessed by: {current_user_name} ({current_user_email})"
+        customer_sheet['A4'] = ""
+        
+        row = 5
+        
+        total_customers = report.total_customers
+        
+        customer_sheet['A5'] = "Summary"
+        customer_sheet['A5'].font = Font(size=14, bold=True)
+        row = 6
+        customer_sheet[f'A{row}'] = "Total Customers:"
+        customer_sheet[f'B{row}'] = total_customers
+        row += 2
+        
+        # Top Customers
+        customer_sheet[f'A{row}'] = "Top 5 Customers by Spending"
+        customer_sheet[f'A{row}'].font = Font(size=14, bold=True)
+        row += 1
+        
+        headers = ["Rank", "Customer Name", "Email", "Order Count", "Total Spent"]
+        for col, header in enumerate(headers, 1):
+            cell = customer_sheet.cell(row, col, header)
+            cell.font = Font(bold=True)
+            cell.fill = PatternFill(start_color="2E7D32", end_color="2E7D32", fill_type="solid")
+            cell.font = Font(bold=True, color="FFFFFF")
+            cell.alignment = Alignment(horizontal="center")
+        
+        row += 1
+        
+        for rank, customer in enumerate(report.top_customers, 1):
+            customer_sheet.cell(row, 1, rank)
+            customer_sheet.cell(row, 2, customer.full_name)
+            customer_sheet.cell(row, 3, customer.email)
+            customer_sheet.cell(row, 4, customer.order_count)
+            customer_sheet.cell(row, 5, f"${customer.total_spent:.2f}")
             row += 1
-            
-            cursor.execute("""
-                SELECT CONCAT(u.first_name, ' ', u.last_name) as full_name, u.email, COUNT(o.id) as order_count, SUM(o.total_amount) as total_spent
-                FROM users u
-                JOIN orders o ON u.id = o.customer_id
-                WHERE u.user_type = 'customer' AND o.status != 'cancelled'
-                GROUP BY u.id
-                ORDER BY total_spent DESC
-                LIMIT 5
-            """)
-            top_customers = cursor.fetchall()
-            
-            for rank, customer in enumerate(top_customers, 1):
-                customer_sheet.cell(row, 1, rank)
-                customer_sheet.cell(row, 2, customer['full_name'])
-                customer_sheet.cell(row, 3, customer['email'])
-                customer_sheet.cell(row, 4, customer['order_count'])
-                customer_sheet.cell(row, 5, f"${customer['total_spent']:.2f}")
-                row += 1
-            
-            # Adjust column widths
-            customer_sheet.column_dimensions['A'].width = 8
-            customer_sheet.column_dimensions['B'].width = 25
-            customer_sheet.column_dimensions['C'].width = 30
-            customer_sheet.column_dimensions['D'].width = 15
-            customer_sheet.column_dimensions['E'].width = 15
-            
-            cursor.close()
-            
-            # Save the workbook
-            wb.save(filename)
-            
-            messagebox.showinfo("Success", f"Reports exported successfully to:\n{filename}")
-            
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to export reports: {str(e)}")
+        
+        # Adjust column widths
+        customer_sheet.column_dimensions['A'].width = 8
+        customer_sheet.column_dimensions['B'].width = 25
+        customer_sheet.column_dimensions['C'].width = 30
+        customer_sheet.column_dimensions['D'].width = 15
+        customer_sheet.column_dimensions['E'].width = 15
+        
+        # Save the workbook
+        wb.save(filename)
+    
+    def export_full_history(self):
+        """Stream the complete order, order line, product and customer tables to an Excel file"""
+        filename = filedialog.asksaveasfilename(
+            defaultextension=".xlsx",
+            filetypes=[("Excel files", "*.xlsx"), ("All files", "*.*")],
+            title="Save Full History as Excel"
+        )
+        
+        if not filename:
+            return  # User cancelled
+        
+        def describe_result(counts):
+            summary = "\n".join(f"{title}: {count} rows" for title, count in counts.items())
+            return f"Full history exported to:\n{filename}\n\n{summary}"
+        
+        self.start_export_job(
+            export_jobs.ExportJob("Export Full History", filename),
+            lambda connection, job: excel_export.export_full_history(connection, filename, job),
+            describe_result
+        )
+    
+    def export_tables(self, directory, export_format):
+        """Dump orders, order_items, products and users into `directory` in the chosen format"""
+        def describe_result(counts):
+            summary = "\n".join(f"{os.path.basename(path)}: {count} rows" for path, count in counts.items())
+            return f"Tables exported to:\n{directory}\n\n{summary}"
+        
+        self.start_export_job(
+            export_jobs.ExportJob("Bulk Export"),
+            lambda connection, job: bulk_export.export_tables(connection, directory, export_format, job=job),
+            describe_result
+        )
+    
+    def export_pdf_report(self, start, end, granularity):
+        """Render the reports for [start, end) to a PDF file"""
+        filename = filedialog.asksaveasfilename(
+            defaultextension=".pdf",
+            filetypes=[("PDF files", "*.pdf"), ("All files", "*.*")],
+            title="Save Report as PDF"
+        )
+        
+        if not filename:
+            return  # User cancelled
+        
+        def describe_result(pages):
+            return f"Report exported to:\n{filename}\n\n{pages} pages"
+        
+        self.start_export_job(
+            export_jobs.ExportJob("Export PDF Report", filename),
+            lambda connection, job: pdf_report.export_pdf_report(connection, filename, start, end, granularity, job),
+            describe_result
+        )
+    
+    def start_export_job(self, job, export, describe_result):
+        """Run an export in the background behind a progress window with a Cancel button"""
+        dialog = ExportProgressDialog(self.main_app, job)
+        
+        def on_done(result):
+            dialog.close()
+            messagebox.showinfo("Export Complete", describe_result(result))
+        
+        def on_error(error):
+            dialog.close()
+            if isinstance(error, export_jobs.ExportCancelled):
+                messagebox.showinfo("Export Cancelled", f"{job.title} was cancelled")
+            else:
+                messagebox.showerror("Error", f"{job.title} failed: {error}")
+        
+        export_jobs.start_export(self.main_app, job, export, on_done, on_error)
     
     def logout(self):
         if messagebox.askyesno("Logout", "Are you sure you want to logout?"):
             self.main_app.logout()
 
 
+class ExportProgressDialog(ctk.CTkToplevel):
+    """Non-modal progress window for a background export job"""
+    
+    def __init__(self, main_app, job):
+        super().__init__(main_app)
+        self.job = job
+        
+        self.title(job.title)
+        self.geometry("420x200")
+        self.resizable(False, False)
+        
+        frame = ctk.CTkFrame(self)
+        frame.pack(fill="both", expand=True, padx=20, pady=20)
+        
+        self.stage_label = ctk.CTkLabel(frame, text=job.stage, font=ctk.CTkFont(size=14, weight="bold"))
+        self.stage_label.pack(anchor="w", padx=10, pady=(10, 5))
+        
+        self.progress_bar = ctk.CTkProgressBar(frame, width=360)
+        self.progress_bar.pack(padx=10, pady=5)
+        self.progress_bar.set(0)
+        self.indeterminate = False
+        
+        self.detail_label = ctk.CTkLabel(frame, text="", font=ctk.CTkFont(size=12), text_color="gray")
+        self.detail_label.pack(anchor="w", padx=10, pady=5)
+        
+        self.cancel_button = ctk.CTkButton(
+            frame,
+            text="Cancel",
+            width=100,
+            fg_color="red",
+            hover_color="darkred",
+            command=self.cancel
+        )
+        self.cancel_button.pack(pady=10)
+        
+        # Closing the window cancels the export
+        self.protocol("WM_DELETE_WINDOW", self.cancel)
+        self.update_progress()
+    
+    def update_progress(self):
+        if not self.winfo_exists():
+            return
+        job = self.job
+        self.stage_label.configure(text="Cancelling..." if job.cancelled else job.stage)
+        
+        rows = f"{job.rows_written:,}"
+        if job.total_rows:
+            rows += f" / {job.total_rows:,}"
+            if self.indeterminate:
+                self.progress_bar.stop()
+                self.progress_bar.configure(mode="determinate")
+                self.indeterminate = False
+            self.progress_bar.set(min(1, job.rows_written / job.total_rows))
+        elif not self.indeterminate:
+            self.progress_bar.configure(mode="indeterminate")
+            self.progress_bar.start()
+            self.indeterminate = True
+        self.detail_label.configure(text=f"{rows} rows written | {export_jobs.format_bytes(job.bytes_written)} flushed")
+        
+        if not job.finished:
+            self.after(200, self.update_progress)
+    
+    def cancel(self):
+        self.job.cancel()
+        self.cancel_button.configure(state="disabled")
+    
+    def close(self):
+        if self.winfo_exists():
+            self.destroy()
+
+
+class BulkExportDialog(ctk.CTkToplevel):
+    """Choose the format and folder for a bulk table export"""
+    
+    def __init__(self, main_app, admin_dashboard):
+        super().__init__(main_app)
+        self.admin_dashboard = admin_dashboard
+        
+        self.title("Bulk Export")
+        self.geometry("400x250")
+        self.resizable(False, False)
+        self.grab_set()
+        
+        frame = ctk.CTkFrame(self)
+        frame.pack(fill="both", expand=True, padx=20, pady=20)
+        
+        ctk.CTkLabel(
+            frame,
+            text="Export orders, order items, products and users",
+            font=ctk.CTkFont(size=14, weight="bold")
+        ).pack(pady=(10, 15))
+        
+        ctk.CTkLabel(frame, text="Format:", font=ctk.CTkFont(size=14)).pack(anchor="w", padx=20)
+        self.format_var = tk.StringVar(value=bulk_export.FORMAT_CSV_GZIP)
+        ctk.CTkOptionMenu(
+            frame,
+            variable=self.format_var,
+            values=bulk_export.available_formats(),
+            width=200
+        ).pack(anchor="w", padx=20, pady=(5, 5))
+        
+        if bulk_export.pa is None:
+            ctk.CTkLabel(
+                frame,
+                text="Install pyarrow to enable Parquet export",
+                font=ctk.CTkFont(size=11),
+                text_color="gray"
+            ).pack(anchor="w", padx=20)
+        
+        ctk.CTkButton(frame, text="Choose Folder and Export", width=200, command=self.export).pack(pady=15)
+    
+    def export(self):
+        directory = filedialog.askdirectory(parent=self, title="Choose a folder for the export files")
+        if not directory:
+            return  # User cancelled
+        export_format = self.format_var.get()
+        self.destroy()
+        self.admin_dashboard.export_tables(directory, export_format)
+
+
+class PdfReportDialog(ctk.CTkToplevel):
+    """Choose the date range and breakdown granularity for a PDF report"""
+    
+    def __init__(self, main_app, admin_dashboard):
+        super().__init__(main_app)
+        self.admin_dashboard = admin_dashboard
+        
+        self.title("Export PDF Report")
+        self.geometry("400x320")
+        self.resizable(False, False)
+        self.grab_set()
+        
+        frame = ctk.CTkFrame(self)
+        frame.pack(fill="both", expand=True, padx=20, pady=20)
+        
+        # Default to the last twelve months
+        today = datetime.now().date()
+        
+        ctk.CTkLabel(frame, text="From (YYYY-MM-DD):", font=ctk.CTkFont(size=14)).pack(anchor="w", padx=20, pady=(10, 0))
+        self.start_entry = ctk.CTkEntry(frame, width=200)
+        self.start_entry.insert(0, (today - timedelta(days=365)).strftime("%Y-%m-%d"))
+        self.start_entry.pack(anchor="w", padx=20, pady=5)
+        
+        ctk.CTkLabel(frame, text="To (YYYY-MM-DD):", font=ctk.CTkFont(size=14)).pack(anchor="w", padx=20)
+        self.end_entry = ctk.CTkEntry(frame, width=200)
+        self.end_entry.insert(0, today.strftime("%Y-%m-%d"))
+        self.end_entry.pack(anchor="w", padx=20, pady=5)
+        
+        ctk.CTkLabel(frame, text="Sales breakdown by:", font=ctk.CTkFont(size=14)).pack(anchor="w", padx=20)
+        self.granularity_var = tk.StringVar(value="month")
+        ctk.CTkOptionMenu(
+            frame,
+            variable=self.granularity_var,
+            values=list(report_service.PERIOD_LABELS),
+            width=200
+        ).pack(anchor="w", padx=20, pady=5)
+        
+        ctk.CTkButton(frame, text="Choose File and Export", width=200, command=self.export).pack(pady=15)
+    
+    def export(self):
+        try:
+            start = datetime.strptime(self.start_entry.get().strip(), "%Y-%m-%d")
+            # The end date is inclusive on screen, exclusive in the query
+            end = datetime.strptime(self.end_entry.get().strip(), "%Y-%m-%d") + timedelta(days=1)
+        except ValueError:
+            messagebox.showerror("Error", "Please enter dates as YYYY-MM-DD", parent=self)
+            return
+        if end <= start:
+            messagebox.showerror("Error", "The end date must not be before the start date", parent=self)
+            return
+        granularity = self.granularity_var.get()
+        self.destroy()
+        self.admin_dashboard.export_pdf_report(start, end, granularity)
+
+
 class AddSupplierDialog(ctk.CTkToplevel):
     def __init__(self, main_app, admin_dashboard):
         super().__init__(main_app)
@@ -1146,8 +1482,7 @@ class AddSupplierDialog(ctk.CTkToplevel):
                 return
         
         try:
-            connection = db_config.create_connection()
-            if connection:
+            with db_config.get_connection() as connection:
                 cursor = connection.cursor()
                 
                 # Insert supplier
@@ -1159,13 +1494,11 @@ class AddSupplierDialog(ctk.CTkToplevel):
                 
                 connection.commit()
                 cursor.close()
-                connection.close()
                 
-                messagebox.showinfo("Success", "Supplier added successfully!")
-                self.destroy()
-                # Refresh supplier list after dialog closes
-                if hasattr(self.admin_dashboard, 'load_suppliers'):
-                    self.main_app.after(100, self.admin_dashboard.load_suppliers)
+            messagebox.showinfo("Success", "Supplier added successfully!")
+            self.destroy()
+            # The change log brings the saved row into the supplier list
+            change_log.get_change_feed().poll_now()
                 
         except Error as e:
             messagebox.showerror("Error", f"Failed to add supplier: {e}")
@@ -1250,8 +1583,7 @@ class EditSupplierDialog(ctk.CTkToplevel):
     
     def load_supplier_data(self):
         try:
-            connection = db_config.create_connection()
-            if connection:
+            with db_config.get_connection() as connection:
                 cursor = connection.cursor(dictionary=True)
                 cursor.execute("SELECT * FROM suppliers WHERE id = %s", (self.supplier_id,))
                 supplier = cursor.fetchone()
@@ -1264,7 +1596,6 @@ class EditSupplierDialog(ctk.CTkToplevel):
                     self.address_entry.insert(0, supplier['address'] or '')
                 
                 cursor.close()
-                connection.close()
                 
         except Error as e:
             messagebox.showerror("Error", f"Failed to load supplier data: {e}")
@@ -1297,8 +1628,7 @@ class EditSupplierDialog(ctk.CTkToplevel):
                 return
         
         try:
-            connection = db_config.create_connection()
-            if connection:
+            with db_config.get_connection() as connection:
                 cursor = connection.cursor()
                 
                 # Update supplier
@@ -1311,13 +1641,11 @@ class EditSupplierDialog(ctk.CTkToplevel):
                 
                 connection.commit()
                 cursor.close()
-                connection.close()
                 
-                messagebox.showinfo("Success", "Supplier updated successfully!")
-                self.destroy()
-                # Refresh supplier list after dialog closes
-                if hasattr(self.admin_dashboard, 'load_suppliers'):
-                    self.main_app.after(100, self.admin_dashboard.load_suppliers)
+            messagebox.showinfo("Success", "Supplier updated successfully!")
+            self.destroy()
+            # The change log brings the saved row into the supplier list
+            change_log.get_change_feed().poll_now()
                 
         except Error as e:
             messagebox.showerror("Error", f"Failed to update supplier: {e}")
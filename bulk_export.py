@@ -0,0 +1,173 @@
+"""
+Bulk Export
+Dumps the transactional tables (orders, order_items, products, users) to
+CSV, gzip-compressed CSV or Parquet for loading into analysis tools.
+
+Each table is read in fixed-size batches by keyset on its primary key and
+every batch is written out before the next one is fetched, so memory stays
+bounded whatever the table size. Parquet needs pyarrow; without it only
+the CSV formats are offered.
+"""
+import csv
+import gzip
+import os
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+# Rows fetched and written per batch (one Parquet row group per batch)
+BULK_BATCH_SIZE = 50000
+
+FORMAT_CSV = "CSV"
+FORMAT_CSV_GZIP = "CSV (gzip)"
+FORMAT_PARQUET = "Parquet"
+
+# Exported columns per table as (column, kind); users.password is never exported
+BULK_TABLES = {
+    "orders": [
+        ("id", "int"), ("customer_id", "int"), ("order_date", "timestamp"), ("status", "string"),
+        ("total_amount", "decimal"), ("shipping_address", "string"),
+    ],
+    "order_items": [
+        ("id", "int"), ("order_id", "int"), ("product_id", "int"), ("quantity", "int"),
+        ("price", "decimal"),
+    ],
+    "products": [
+        ("id", "int"), ("name", "string"), ("description", "string"), ("category_id", "int"),
+        ("supplier_id", "int"), ("price", "decimal"), ("quantity", "int"), ("reorder_level", "int"),
+        ("image_path", "string"), ("created_at", "timestamp"), ("updated_at", "timestamp"),
+    ],
+    "users": [
+        ("id", "int"), ("first_name", "string"), ("last_name", "string"), ("email", "string"),
+        ("phone_number", "string"), ("user_type", "string"), ("is_approved", "bool"),
+        ("created_at", "timestamp"),
+    ],
+}
+
+
+def available_formats():
+    formats = [FORMAT_CSV, FORMAT_CSV_GZIP]
+    if pa is not None:
+        formats.append(FORMAT_PARQUET)
+    return formats
+
+
+def output_path(directory, table, export_format):
+    extension = {FORMAT_CSV: ".csv", FORMAT_CSV_GZIP: ".csv.gz", FORMAT_PARQUET: ".parquet"}[export_format]
+    return os.path.join(directory, table + extension)
+
+
+def iter_batches(connection, table, columns, batch_size=BULK_BATCH_SIZE):
+    """Yield lists of row tuples, batch_size at a time, in primary key order"""
+    column_list = ", ".join(column for column, kind in columns)
+    cursor = connection.cursor()
+    last_id = 0
+    try:
+        while True:
+            cursor.execute(
+                f"SELECT {column_list} FROM {table} WHERE id > %s ORDER BY id LIMIT %s",
+                (last_id, batch_size)
+            )
+            rows = cursor.fetchall()
+            if not rows:
+                return
+            yield rows
+            # id is the first exported column of every table
+            last_id = rows[-1][0]
+            if len(rows) < batch_size:
+                return
+    finally:
+        cursor.close()
+
+
+def _arrow_schema(columns):
+    kinds = {
+        "int": pa.int64(),
+        "decimal": pa.decimal128(12, 2),
+        "string": pa.string(),
+        "timestamp": pa.timestamp("s"),
+        "bool": pa.bool_(),
+    }
+    return pa.schema([(column, kinds[kind]) for column, kind in columns])
+
+
+def _write_csv(connection, table, columns, path, compress, progress):
+    opener = gzip.open if compress else open
+    with opener(path, "wt", newline="", encoding="utf-8") as file:
+        writer = csv.writer(file)
+        writer.writerow([column for column, kind in columns])
+        count = 0
+        for rows in iter_batches(connection, table, columns):
+            writer.writerows(rows)
+            count += len(rows)
+            file.flush()
+            progress(len(rows), path)
+        return count
+
+
+def _write_parquet(connection, table, columns, path, progress):
+    schema = _arrow_schema(columns)
+    names = [column for column, kind in columns]
+    count = 0
+    with pq.ParquetWriter(path, schema) as writer:
+        for rows in iter_batches(connection, table, columns):
+            # Column-major for pyarrow; is_approved arrives as 0/1
+            data = [list(values) for values in zip(*rows)]
+            for index, (column, kind) in enumerate(columns):
+                if kind == "bool":
+                    data[index] = [None if value is None else bool(value) for value in data[index]]
+            writer.write_table(pa.Table.from_arrays(
+                [pa.array(values, type=field.type) for values, field in zip(data, schema)],
+                names=names
+            ))
+            count += len(rows)
+            progress(len(rows), path)
+    return count
+
+
+def count_table_rows(connection, tables):
+    cursor = connection.cursor()
+    total = 0
+    for table in tables:
+        cursor.execute(f"SELECT COUNT(*) FROM {table}")
+        total += cursor.fetchone()[0]
+    cursor.close()
+    return total
+
+
+def export_tables(connection, directory, export_format, tables=None, job=None):
+    """Write one file per table into `directory`; returns {file path: rows written}"""
+    if export_format == FORMAT_PARQUET and pa is None:
+        raise RuntimeError("Parquet export needs the pyarrow package")
+    tables = list(tables or BULK_TABLES)
+
+    if job is not None:
+        job.set_stage("Counting rows...")
+        job.total_rows = count_table_rows(connection, tables)
+
+    # Bytes of the files already finished, for the job's running total
+    finished_bytes = 0
+
+    def progress(count, path):
+        if job is not None:
+            job.add_rows(count, finished_bytes + os.path.getsize(path))
+
+    counts = {}
+    for table in tables:
+        columns = BULK_TABLES[table]
+        path = output_path(directory, table, export_format)
+        if job is not None:
+            job.set_stage(f"Writing {os.path.basename(path)}...")
+            job.add_file(path)
+        if export_format == FORMAT_PARQUET:
+            counts[path] = _write_parquet(connection, table, columns, path, progress)
+        else:
+            counts[path] = _write_csv(connection, table, columns, path, export_format == FORMAT_CSV_GZIP, progress)
+        finished_bytes += os.path.getsize(path)
+    if job is not None:
+        job.bytes_written = finished_bytes
+    return counts
@@ -0,0 +1,225 @@
+"""
+Change Log
+Tells every client which rows of the tables it caches have changed, so it
+refreshes just those instead of reloading whole screens.
+
+Triggers append (table_name, row_id) to change_log under an
+auto-increment version (see migrations/0008_change_log.py). The ChangeFeed
+polls it with one primary key range read, version > the last version
+seen, and passes the changed row ids of each table to its subscribers.
+
+A version is taken when a row is inserted but only becomes visible when
+its transaction commits, so a lower version can show up after a higher
+one. The feed delivers what it reads at once, but only moves its position
+past a missing version when it appears, or after GAP_TIMEOUT_SECONDS (a
+rolled-back write never appears). Nothing is delivered twice.
+
+The feed lives for one login: logout calls stop_change_feed(), and the
+next session gets a fresh feed that starts from the current version.
+"""
+import time
+import dashboard_stats
+import db_worker
+import report_service
+
+# How often the change log is polled (milliseconds)
+CHANGE_POLL_INTERVAL_MS = 10000
+# Entries read per poll; when more are waiting, subscribers are told to reload everything
+CHANGE_BATCH_SIZE = 500
+# How long a missing version is waited for before it is taken as rolled back (seconds)
+GAP_TIMEOUT_SECONDS = 30
+# Entries older than this are pruned, checked once an hour by each client
+CHANGE_LOG_RETENTION_HOURS = 24
+PRUNE_INTERVAL_SECONDS = 3600
+PRUNE_BATCH_SIZE = 1000
+
+# Changes to these tables move the dashboard counters and the admin report
+STATS_TABLES = {"users", "products", "orders"}
+
+
+def fetch_current_version(cursor):
+    cursor.execute("SELECT COALESCE(MAX(version), 0) FROM change_log")
+    return cursor.fetchone()[0]
+
+
+def fetch_changes(cursor, since, limit=CHANGE_BATCH_SIZE):
+    """(version, table_name, row_id) of the entries after version `since`, oldest first"""
+    cursor.execute(
+        "SELECT version, table_name, row_id FROM change_log WHERE version > %s ORDER BY version LIMIT %s",
+        (since, limit)
+    )
+    return cursor.fetchall()
+
+
+def prune(connection, retention_hours=CHANGE_LOG_RETENTION_HOURS, batch_size=PRUNE_BATCH_SIZE):
+    """Delete entries older than the retention period, batch_size rows per statement"""
+    cursor = connection.cursor()
+    deleted = 0
+    try:
+        while True:
+            cursor.execute(
+                "DELETE FROM change_log WHERE changed_at < NOW() - INTERVAL %s HOUR LIMIT %s",
+                (retention_hours, batch_size)
+            )
+            connection.commit()
+            deleted += cursor.rowcount
+            if cursor.rowcount < batch_size:
+                return deleted
+    finally:
+        cursor.close()
+
+
+class ChangeFeed:
+    def __init__(self):
+        # Every change up to this version has been delivered (None until the first poll)
+        self.version = None
+        # Versions above self.version delivered already, past a version still missing
+        self._delivered = set()
+        # (missing version, time it was first missed)
+        self._gap = None
+        self._subscribers = []  # (tables, callback, widget)
+        self._main_app = None
+        self._after_id = None
+        self._stopped = False
+        self._polling = False
+        self._poll_again = False
+        self._pruned_at = time.monotonic()
+
+    def subscribe(self, tables, callback, widget):
+        """Call callback(changes) on the Tk thread when rows of `tables` change, for as long as `widget` exists.
+
+        changes maps each changed table to the set of changed row ids, or is
+        None when too much changed to list (refresh everything).
+        """
+        self._subscribers.append((set(tables), callback, widget))
+
+    def start(self, main_app):
+        """Start polling (once per session; later calls do nothing)"""
+        if self._main_app is None and not self._stopped:
+            self._main_app = main_app
+            self._tick()
+
+    def stop(self):
+        """Stop polling for good; a poll already running is discarded"""
+        self._stopped = True
+        if self._after_id is not None:
+            self._main_app.after_cancel(self._after_id)
+            self._after_id = None
+        self._subscribers.clear()
+
+    def _tick(self):
+        self._after_id = self._main_app.after(CHANGE_POLL_INTERVAL_MS, self._tick)
+        self.poll_now()
+
+    def poll_now(self):
+        """Poll straight away, e.g. after this client wrote something"""
+        if self._main_app is None or self._stopped:
+            return
+        if self._polling:
+            # One poll at a time; poll again once the running one is done
+            self._poll_again = True
+        else:
+            self._poll()
+
+    def _poll(self):
+        self._polling = True
+        since = self.version
+        prune_due = time.monotonic() - self._pruned_at >= PRUNE_INTERVAL_SECONDS
+        if prune_due:
+            self._pruned_at = time.monotonic()
+
+        def fetch(connection):
+            cursor = connection.cursor()
+            if since is None:
+                result = fetch_current_version(cursor), None
+            else:
+                rows = fetch_changes(cursor, since, CHANGE_BATCH_SIZE + 1)
+                # Too many to list: skip to the newest version and have everything refreshed
+                result = (fetch_current_version(cursor) if len(rows) > CHANGE_BATCH_SIZE else None), rows
+            cursor.close()
+            if prune_due:
+                prune(connection)
+            return result
+
+        def apply(result):
+            if self._stopped:
+                return
+            current, rows = result
+            try:
+                if rows is None:
+                    self.version = current
+                elif current is not None:
+                    self.version = current
+                    self._delivered.clear()
+                    self._gap = None
+                    self._dispatch(None)
+                else:
+                    changes = {}
+                    for version, table, row_id in rows:
+                        if version not in self._delivered:
+                            changes.setdefault(table, set()).add(row_id)
+                    self._advance([row[0] for row in rows])
+                    if changes:
+                        self._dispatch(changes)
+            finally:
+                done()
+
+        def done(error=None):
+            if error is not None:
+                print(f"Error polling change log: {error}")
+            self._polling = False
+            if self._poll_again and not self._stopped:
+                self._poll_again = False
+                self._poll()
+
+        db_worker.run_async(self._main_app, fetch, apply, on_error=done)
+
+    def _advance(self, versions):
+        """Move self.version over the delivered versions, waiting at a missing one"""
+        self._delivered.update(versions)
+        while self._delivered:
+            following = self.version + 1
+            if following in self._delivered:
+                self._delivered.discard(following)
+                self.version = following
+                continue
+            if self._gap is None or self._gap[0] != following:
+                self._gap = (following, time.monotonic())
+            if time.monotonic() - self._gap[1] < GAP_TIMEOUT_SECONDS:
+                return
+            # Rolled back: it will never appear
+            self.version = min(self._delivered) - 1
+            self._gap = None
+
+    def _dispatch(self, changes):
+        if changes is None or STATS_TABLES & set(changes):
+            dashboard_stats.invalidate()
+            report_service.invalidate()
+        for subscriber in list(self._subscribers):
+            tables, callback, widget = subscriber
+            if not widget.winfo_exists():
+                self._subscribers.remove(subscriber)
+                continue
+            if changes is None:
+                callback(None)
+                continue
+            relevant = {table: row_ids for table, row_ids in changes.items() if table in tables}
+            if relevant:
+                callback(relevant)
+
+
+_feed = None
+
+def get_change_feed():
+    """Return the session-wide change feed (Tk thread only)"""
+    global _feed
+    if _feed is None:
+        _feed = ChangeFeed()
+    return _feed
+
+def stop_change_feed():
+    """Stop the session's feed (on logout); the next get_change_feed() starts a new one"""
+    global _feed
+    if _feed is not None:
+        _feed.stop()
+        _feed = None
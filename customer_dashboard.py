@@ -1,15 +1,48 @@
 import customtkinter as ctk
 from tkinter import messagebox, ttk
 import tkinter as tk
-from mysql.connector import Error
-import db_config
+import change_log
+import db_worker
+import dashboard_stats
+import order_service
+import product_service
+import product_index
+import stock_reservations
+from virtual_list import VirtualList
 from datetime import datetime
 
+# Number of orders shown per page of the order history
+ORDER_HISTORY_PAGE_SIZE = 20
+# Products fetched per page of the catalog
+PRODUCT_PAGE_SIZE = 60
+# Product card slot: 250px card + 20px padding (10px each side)
+PRODUCT_CARD_WIDTH = 270
+PRODUCT_ROW_HEIGHT = 320
+# Pause after the last keystroke before searching as you type (milliseconds)
+SEARCH_DEBOUNCE_MS = 150
+
 class CustomerDashboard:
+    order_status_colors = {
+        'pending': 'orange',
+        'approved': 'green',
+        'rejected': 'red',
+        'processing': 'blue',
+        'shipped': 'purple',
+        'delivered': 'green',
+        'cancelled': 'red'
+    }
+    
     def __init__(self, parent, main_app):
         self.parent = parent
         self.main_app = main_app
         self.cart = []  # List of {product_id, name, price, quantity}
+        # Bumped whenever the catalog is reloaded, so late pages of an old search are dropped
+        self.products_generation = 0
+        # True while a checkout is running on the worker
+        self.placing_order = False
+        
+        # Cart items hold stock; holds left behind by closed sessions expire and are swept
+        stock_reservations.start_sweeper()
         
         # Create main container
         self.container = ctk.CTkFrame(parent)
@@ -27,6 +60,12 @@ class CustomerDashboard:
         
         # Show product catalog by default
         self.show_products()
+        
+        # Keep the catalog and the order history current with other clients' changes
+        change_feed = change_log.get_change_feed()
+        change_feed.subscribe(("products", "categories"), self.on_catalog_changed, self.container)
+        change_feed.subscribe(("orders",), self.on_orders_changed, self.container)
+        change_feed.start(main_app)
     
     def create_header(self):
         header_frame = ctk.CTkFrame(self.container, height=60)
@@ -89,6 +128,22 @@ class CustomerDashboard:
         for widget in self.content_frame.winfo_children():
             widget.destroy()
     
+    def run_query(self, func, on_success, error_message, widget=None, tag=None):
+        """Run func(connection) on the background worker and pass its result to on_success"""
+        db_worker.run_async(
+            self.main_app,
+            func,
+            on_success,
+            on_error=lambda e: messagebox.showerror("Error", f"{error_message}: {e}"),
+            widget=widget,
+            tag=tag
+        )
+    
+    def create_loading_label(self, parent):
+        label = ctk.CTkLabel(parent, text="Loading...", font=ctk.CTkFont(size=14), text_color="gray")
+        label.pack(pady=20)
+        return label
+    
     def show_products(self):
         self.clear_content()
         
@@ -109,6 +164,9 @@ class CustomerDashboard:
         
         self.search_entry = ctk.CTkEntry(search_frame, width=300, placeholder_text="Search products...")
         self.search_entry.pack(side="left", padx=10)
+        self.search_entry.bind("<KeyRelease>", self.schedule_product_search)
+        self.search_entry.bind("<Return>", lambda event: self.load_products())
+        self.search_job = None
         
         search_button = ctk.CTkButton(search_frame, text="Search", width=100, command=self.load_products)
         search_button.pack(side="left", padx=10)
@@ -118,231 +176,214 @@ class CustomerDashboard:
         category_label.pack(side="left", padx=10)
         
         self.category_var = tk.StringVar(value="All")
-        categories = self.get_categories()
-        category_menu = ctk.CTkOptionMenu(
+        self.category_menu = ctk.CTkOptionMenu(
             search_frame,
             variable=self.category_var,
-            values=["All"] + categories,
+            values=["All"],
             width=150,
             command=lambda x: self.load_products()
         )
-        category_menu.pack(side="left", padx=10)
-        
-        # Products frame with scrollbar and dynamic grid
-        products_container = ctk.CTkFrame(self.content_frame)
-        products_container.pack(fill="both", expand=True, padx=20, pady=10)
-        
-        # Create canvas and scrollbar
-        canvas = tk.Canvas(products_container, bg=self.content_frame.cget("fg_color")[1])
-        scrollbar = ctk.CTkScrollbar(products_container, command=canvas.yview)
-        self.products_frame = ctk.CTkFrame(canvas)
-        
-        # Store canvas reference
-        self.products_canvas = canvas
-        self.products_container = products_container
-        
-        def update_scrollregion(event=None):
-            canvas.configure(scrollregion=canvas.bbox("all"))
-        
-        self.products_frame.bind("<Configure>", update_scrollregion)
-        
-        def update_canvas_width(event=None):
-            canvas_width = canvas.winfo_width()
-            if canvas_width > 1:
-                canvas_window = canvas.find_all()
-                if canvas_window:
-                    canvas.itemconfig(canvas_window[0], width=canvas_width)
-        
-        canvas.create_window((0, 0), window=self.products_frame, anchor="nw")
-        canvas.configure(yscrollcommand=scrollbar.set)
-        
-        canvas.pack(side="left", fill="both", expand=True)
-        scrollbar.pack(side="right", fill="y")
+        self.category_menu.pack(side="left", padx=10)
+        self.load_categories()
         
-        canvas.bind("<Configure>", update_canvas_width)
+        # Virtualized product grid: only the cards near the viewport exist as widgets
+        self.products_grid = VirtualList(
+            self.content_frame,
+            row_height=PRODUCT_ROW_HEIGHT,
+            create_row=lambda parent: ProductCard(parent, self),
+            bind_row=lambda card, product: card.show(product),
+            on_near_end=self.load_more_products,
+            bg=self.content_frame.cget("fg_color")[1],
+            columns=self.calculate_product_columns,
+            key=lambda product: product['id']
+        )
+        self.products_grid.pack(fill="both", expand=True, padx=20, pady=10)
         
         # Load products
         self.load_products()
     
-    def get_categories(self):
+    def calculate_product_columns(self, container_width):
+        """Calculate dynamic columns based on available width"""
         try:
-            connection = db_config.create_connection()
-            if connection:
-                cursor = connection.cursor()
-                cursor.execute("SELECT name FROM categories ORDER BY name")
-                categories = [row[0] for row in cursor.fetchall()]
-                cursor.close()
-                connection.close()
-                return categories
-        except Error as e:
-            print(f"Error: {e}")
-        return []
+            if container_width < 100:
+                container_width = self.content_frame.winfo_width() - 60  # Account for padding and scrollbar
+            if container_width < 100:
+                container_width = self.main_app.winfo_width() - 200
+            if container_width < 100:
+                container_width = 1200  # Fallback
+            
+            num_columns = max(2, int(container_width / PRODUCT_CARD_WIDTH))
+            return min(num_columns, 8)  # Max 8 columns
+        except Exception as e:
+            print(f"Error calculating columns: {e}")
+            return 4  # Default fallback
+    
+    def get_card_fonts(self):
+        """Fonts shared by every product card (created once instead of once per label)"""
+        if not hasattr(self, 'card_fonts'):
+            self.card_fonts = {
+                'name': ctk.CTkFont(size=16, weight="bold"),
+                'small': ctk.CTkFont(size=12),
+                'description': ctk.CTkFont(size=11),
+                'price': ctk.CTkFont(size=18, weight="bold"),
+            }
+        return self.card_fonts
+    
+    def load_categories(self):
+        """Fill the category filter once the category names arrive"""
+        def fetch_categories(connection):
+            cursor = connection.cursor()
+            cursor.execute("SELECT name FROM categories ORDER BY name")
+            categories = [row[0] for row in cursor.fetchall()]
+            cursor.close()
+            return categories
+        
+        def render_categories(categories):
+            self.category_menu.configure(values=["All"] + categories)
+        
+        db_worker.run_async(
+            self.main_app,
+            fetch_categories,
+            render_categories,
+            on_error=lambda e: print(f"Error: {e}"),
+            widget=self.category_menu
+        )
     
     def load_products(self):
-        # Clear products frame
-        for widget in self.products_frame.winfo_children():
-            widget.destroy()
+        """Reload the catalog with the current search and category.
+        
+        Once the in-memory product index is loaded it is refreshed (only the
+        products changed since the last refresh are read) and searched;
+        until then the catalog is paged from MySQL while the index loads.
+        """
+        index = product_index.get_product_index()
+        if index.is_loaded:
+            index.refresh(self.main_app, on_ready=self.search_products)
+            return
         
-        try:
-            connection = db_config.create_connection()
-            if connection:
-                cursor = connection.cursor(dictionary=True)
-                
-                # Build query
-                query = """
-                    SELECT p.*, c.name as category_name 
-                    FROM products p
-                    LEFT JOIN categories c ON p.category_id = c.id
-                    WHERE p.quantity > 0
-                """
-                params = []
-                
-                # Add search filter
-                search_term = self.search_entry.get().strip()
-                if search_term:
-                    query += " AND (p.name LIKE %s OR p.description LIKE %s)"
-                    params.extend([f"%{search_term}%", f"%{search_term}%"])
-                
-                # Add category filter
-                if self.category_var.get() != "All":
-                    query += " AND c.name = %s"
-                    params.append(self.category_var.get())
-                
-                query += " ORDER BY p.name"
-                
-                cursor.execute(query, params)
-                products = cursor.fetchall()
-                
-                if not products:
-                    no_products_label = ctk.CTkLabel(
-                        self.products_frame,
-                        text="No products found",
-                        font=ctk.CTkFont(size=16)
-                    )
-                    no_products_label.pack(pady=50)
-                else:
-                    # Calculate dynamic columns based on available width
-                    # Get actual available width
-                    self.products_container.update_idletasks()
-                    self.products_canvas.update_idletasks()
-                    
-                    try:
-                        container_width = self.products_container.winfo_width()
-                        if container_width < 100:
-                            container_width = self.content_frame.winfo_width() - 60  # Account for padding and scrollbar
-                        if container_width < 100:
-                            container_width = self.main_app.winfo_width() - 200
-                        if container_width < 100:
-                            container_width = 1200  # Fallback
-                        
-                        # Card width: 250px card + 20px padding (10px each side)
-                        card_width = 270
-                        num_columns = max(2, int(container_width / card_width))
-                        num_columns = min(num_columns, 8)  # Max 8 columns
-                    except Exception as e:
-                        print(f"Error calculating columns: {e}")
-                        num_columns = 4  # Default fallback
-                    
-                    # Configure grid columns for dynamic layout
-                    for i in range(num_columns):
-                        self.products_frame.grid_columnconfigure(i, weight=1, uniform="product_cols")
-                    
-                    # Display products in dynamic grid
-                    row = 0
-                    col = 0
-                    for product in products:
-                        product_card = self.create_product_card(product)
-                        product_card.grid(row=row, column=col, padx=10, pady=10, sticky="nsew")
-                        
-                        col += 1
-                        if col >= num_columns:
-                            col = 0
-                            row += 1
-                    
-                    # Update canvas window width to match container
-                    self.products_canvas.update_idletasks()
-                    canvas_width = self.products_canvas.winfo_width()
-                    if canvas_width > 1:
-                        canvas_items = self.products_canvas.find_all()
-                        if canvas_items:
-                            self.products_canvas.itemconfig(canvas_items[0], width=canvas_width)
-                
-                cursor.close()
-                connection.close()
-                
-        except Error as e:
-            messagebox.showerror("Error", f"Failed to load products: {e}")
+        self.products_generation += 1
+        self.products_grid.set_items([])
+        self.products_grid.set_message("Loading...")
+        
+        self.products_search = self.search_entry.get().strip()
+        category = self.category_var.get()
+        self.products_category = None if category == "All" else category
+        # Page position returned by product_service; None means start from the first
+        self.products_after = None
+        self.products_has_more = True
+        self.products_loading = False
+        self.load_more_products()
+        index.refresh(self.main_app)
     
-    def create_product_card(self, product):
-        card = ctk.CTkFrame(self.products_frame, width=250, height=300)
-        card.pack_propagate(False)
-        
-        # Product name
-        name_label = ctk.CTkLabel(
-            card,
-            text=product['name'],
-            font=ctk.CTkFont(size=16, weight="bold"),
-            wraplength=230
-        )
-        name_label.pack(pady=(10, 5))
+    def on_catalog_changed(self, changes):
+        """Refresh the product index and patch the changed cards in place (change log subscriber)"""
+        index = product_index.get_product_index()
+        product_ids = changes.get('products', set()) if changes is not None else None
+        if changes is None or 'categories' in changes:
+            # Category names are stored on the indexed product rows
+            index.invalidate()
+            product_ids = None
+            if hasattr(self, 'category_menu') and self.category_menu.winfo_exists():
+                self.load_categories()
+        if index.is_loaded:
+            index.refresh(self.main_app, on_ready=lambda: self.patch_catalog(product_ids))
+    
+    def patch_catalog(self, product_ids):
+        """Rebind the cards of changed products and drop the ones no longer for sale (None: search again)"""
+        if not hasattr(self, 'products_grid') or not self.products_grid.winfo_exists():
+            return
+        if product_ids is None:
+            self.search_products()
+            return
         
-        # Category
-        category_label = ctk.CTkLabel(
-            card,
-            text=f"Category: {product['category_name'] or 'N/A'}",
-            font=ctk.CTkFont(size=12),
-            text_color="gray"
-        )
-        category_label.pack(pady=2)
+        index = product_index.get_product_index()
+        category = self.category_var.get()
+        gone = []
+        for product_id in product_ids:
+            current = self.products_grid.get_item(product_id)
+            if current is None:
+                continue
+            product = index.products.get(product_id)
+            if product is None or product['quantity'] <= 0 or category not in ("All", product['category_name']):
+                gone.append(product_id)
+                continue
+            current.update(product)
+            card = self.products_grid.row_for(product_id)
+            if card is not None:
+                card.show(current)
+        self.products_grid.remove_items(gone)
+    
+    def schedule_product_search(self, event=None):
+        """Search as you type, once the user pauses"""
+        if self.search_job is not None:
+            self.search_entry.after_cancel(self.search_job)
+        self.search_job = self.search_entry.after(SEARCH_DEBOUNCE_MS, self.search_products)
+    
+    def search_products(self):
+        """Show the products matching the search box from the in-memory index"""
+        self.search_job = None
+        if not self.products_grid.winfo_exists():
+            return
+        index = product_index.get_product_index()
+        if not index.is_loaded:
+            self.load_products()
+            return
         
-        # Description
-        desc_label = ctk.CTkLabel(
-            card,
-            text=product['description'] or 'No description',
-            font=ctk.CTkFont(size=11),
-            wraplength=230,
-            text_color="gray"
+        category = self.category_var.get()
+        products = index.search(
+            self.search_entry.get(),
+            category=None if category == "All" else category,
+            in_stock_only=True
         )
-        desc_label.pack(pady=5)
         
-        # Price
-        price_label = ctk.CTkLabel(
-            card,
-            text=f"${product['price']:.2f}",
-            font=ctk.CTkFont(size=18, weight="bold"),
-            text_color="green"
-        )
-        price_label.pack(pady=5)
+        # Everything is in memory: no more pages, and drop any page still in flight
+        self.products_generation += 1
+        self.products_has_more = False
+        self.products_loading = False
+        self.products_grid.set_items(products)
+        self.products_grid.set_message("" if products else "No products found")
+    
+    def load_more_products(self):
+        """Fetch the next page of products and append it to the grid"""
+        if self.products_loading or not self.products_has_more:
+            return
+        self.products_loading = True
         
-        # Stock
-        stock_label = ctk.CTkLabel(
-            card,
-            text=f"In Stock: {product['quantity']}",
-            font=ctk.CTkFont(size=12)
-        )
-        stock_label.pack(pady=2)
+        search_term = self.products_search
+        category = self.products_category
+        after = self.products_after
+        generation = self.products_generation
         
-        # Quantity selector
-        qty_frame = ctk.CTkFrame(card, fg_color="transparent")
-        qty_frame.pack(pady=10)
+        def fetch_products(connection):
+            cursor = connection.cursor(dictionary=True)
+            page = product_service.fetch_catalog_page(cursor, search_term, category, PRODUCT_PAGE_SIZE, after)
+            cursor.close()
+            return page
         
-        qty_label = ctk.CTkLabel(qty_frame, text="Qty:", font=ctk.CTkFont(size=12))
-        qty_label.pack(side="left", padx=5)
+        def render_products(page):
+            if generation != self.products_generation:
+                return
+            products, next_after = page
+            self.products_loading = False
+            self.products_has_more = next_after is not None
+            self.products_after = next_after
+            
+            self.products_grid.append_items(products)
+            self.products_grid.set_message("" if self.products_grid.items else "No products found")
         
-        qty_spinbox = ctk.CTkEntry(qty_frame, width=60)
-        qty_spinbox.insert(0, "1")
-        qty_spinbox.pack(side="left", padx=5)
+        def show_error(e):
+            self.products_loading = False
+            self.products_grid.set_message("")
+            messagebox.showerror("Error", f"Failed to load products: {e}")
         
-        # Add to cart button
-        add_button = ctk.CTkButton(
-            card,
-            text="Add to Cart",
-            width=200,
-            command=lambda: self.add_to_cart(product, qty_spinbox)
+        db_worker.run_async(
+            self.main_app,
+            fetch_products,
+            render_products,
+            on_error=show_error,
+            widget=self.products_grid,
+            tag="customer.products"
         )
-        add_button.pack(pady=10)
-        
-        return card
     
     def add_to_cart(self, product, qty_entry):
         # Validate quantity input
@@ -360,16 +401,33 @@ class CustomerDashboard:
                 qty_entry.delete(0, "end")
                 qty_entry.insert(0, "1")
                 return
-            if quantity > product['quantity']:
-                messagebox.showerror("Error", f"Only {product['quantity']} items available in stock")
-                qty_entry.delete(0, "end")
-                qty_entry.insert(0, str(product['quantity']))
+            
+        except ValueError:
+            messagebox.showerror("Error", "Please enter a valid quantity")
+            return
+        
+        # Hold the units before they go into the cart, so other customers cannot take them meanwhile;
+        # the hold checks live stock, the product card's quantity may be stale
+        customer_id = self.main_app.current_user['id']
+        
+        def reserve(connection):
+            return stock_reservations.reserve(connection, customer_id, product['id'], quantity)
+        
+        def on_reserved(result):
+            reserved, available = result
+            if not reserved:
+                messagebox.showerror("Error", f"Only {available} more of {product['name']} available right now")
+                if qty_entry.winfo_exists():
+                    qty_entry.delete(0, "end")
+                    qty_entry.insert(0, str(max(available, 1)))
                 return
             
             # Check if product already in cart
             for item in self.cart:
                 if item['product_id'] == product['id']:
                     item['quantity'] += quantity
+                    # Most this customer can have in the cart, as of this hold
+                    item['available_stock'] = item['quantity'] + available
                     messagebox.showinfo("Success", f"Updated {product['name']} quantity in cart")
                     self.update_cart_button()
                     return
@@ -380,14 +438,24 @@ class CustomerDashboard:
                 'name': product['name'],
                 'price': float(product['price']),
                 'quantity': quantity,
-                'available_stock': product['quantity']
+                'available_stock': quantity + available
             })
             
             messagebox.showinfo("Success", f"Added {product['name']} to cart")
             self.update_cart_button()
-            
-        except ValueError:
-            messagebox.showerror("Error", "Please enter a valid quantity")
+        
+        self.run_query(reserve, on_reserved, "Failed to add to cart")
+    
+    def release_holds(self, product_ids=None):
+        """Give back the stock held for cart items (all of them if product_ids is None)"""
+        customer_id = self.main_app.current_user['id']
+        db_worker.run_async(
+            self.main_app,
+            lambda connection: stock_reservations.release(connection, customer_id, product_ids),
+            lambda result: None,
+            # The holds expire on their own if this fails
+            on_error=lambda e: print(f"Error: {e}")
+        )
     
     def update_cart_button(self):
         self.cart_button.configure(text=f"🛒 Cart ({len(self.cart)})")
@@ -431,6 +499,7 @@ class CustomerDashboard:
         ctk.CTkLabel(headers_frame, text="Product", font=ctk.CTkFont(size=14, weight="bold"), width=200).pack(side="left", padx=10)
         ctk.CTkLabel(headers_frame, text="Price", font=ctk.CTkFont(size=14, weight="bold"), width=100).pack(side="left", padx=10)
         ctk.CTkLabel(headers_frame, text="Quantity", font=ctk.CTkFont(size=14, weight="bold"), width=100).pack(side="left", padx=10)
+        ctk.CTkLabel(headers_frame, text="Available", font=ctk.CTkFont(size=14, weight="bold"), width=100).pack(side="left", padx=10)
         ctk.CTkLabel(headers_frame, text="Total", font=ctk.CTkFont(size=14, weight="bold"), width=100).pack(side="left", padx=10)
         ctk.CTkLabel(headers_frame, text="Action", font=ctk.CTkFont(size=14, weight="bold"), width=100).pack(side="left", padx=10)
         
@@ -442,6 +511,7 @@ class CustomerDashboard:
             ctk.CTkLabel(item_frame, text=item['name'], width=200).pack(side="left", padx=10)
             ctk.CTkLabel(item_frame, text=f"${item['price']:.2f}", width=100).pack(side="left", padx=10)
             ctk.CTkLabel(item_frame, text=str(item['quantity']), width=100).pack(side="left", padx=10)
+            ctk.CTkLabel(item_frame, text=str(item['available_stock']), width=100).pack(side="left", padx=10)
             ctk.CTkLabel(item_frame, text=f"${item['price'] * item['quantity']:.2f}", width=100).pack(side="left", padx=10)
             
             remove_button = ctk.CTkButton(
@@ -488,6 +558,7 @@ class CustomerDashboard:
     
     def remove_from_cart(self, item):
         self.cart.remove(item)
+        self.release_holds([item['product_id']])
         self.update_cart_button()
         self.show_cart()
     
@@ -496,52 +567,50 @@ class CustomerDashboard:
             messagebox.showwarning("Cart Empty", "Your cart is empty. Add products to cart first.")
             return
         
+        # Ignore repeated clicks while the checkout is in flight
+        if self.placing_order:
+            return
+        self.placing_order = True
+        
         # Place order directly without asking for shipping address
         address = "Not provided"  # Default address
-        
-        try:
-            connection = db_config.create_connection()
-            if connection:
-                cursor = connection.cursor()
-                
-                # Calculate total
-                total = sum(item['price'] * item['quantity'] for item in self.cart)
-                
-                # Create order
-                cursor.execute(
-                    """INSERT INTO orders (customer_id, total_amount, shipping_address, status)
-                    VALUES (%s, %s, %s, 'pending')""",
-                    (self.main_app.current_user['id'], total, address)
+        customer_id = self.main_app.current_user['id']
+        lines = [{'product_id': item['product_id'], 'quantity': item['quantity']} for item in self.cart]
+        
+        def checkout(connection):
+            return order_service.place_order(connection, customer_id, lines, address)
+        
+        def on_done(result):
+            self.placing_order = False
+            order_id, failures = result
+            if failures:
+                details = "\n".join(
+                    f"- {failure['name'] or 'Product #' + str(failure['product_id'])}: "
+                    f"{failure['requested']} requested, {failure['available']} available"
+                    for failure in failures
+                )
+                messagebox.showerror(
+                    "Not Enough Stock",
+                    f"Your order was not placed. These items are short:\n\n{details}\n\n"
+                    "Please adjust your cart and try again."
                 )
-                order_id = cursor.lastrowid
-                
-                # Add order items and update inventory
-                for item in self.cart:
-                    cursor.execute(
-                        """INSERT INTO order_items (order_id, product_id, quantity, price)
-                        VALUES (%s, %s, %s, %s)""",
-                        (order_id, item['product_id'], item['quantity'], item['price'])
-                    )
-                    
-                    # Update product quantity
-                    cursor.execute(
-                        """UPDATE products SET quantity = quantity - %s WHERE id = %s""",
-                        (item['quantity'], item['product_id'])
-                    )
-                
-                connection.commit()
-                cursor.close()
-                connection.close()
-                
-                # Clear cart
-                self.cart = []
-                self.update_cart_button()
-                
-                messagebox.showinfo("Success", f"Order #{order_id} placed successfully!")
-                self.show_orders()
-                
-        except Error as e:
-            messagebox.showerror("Error", f"Failed to place order: {e}")
+                return
+            
+            dashboard_stats.invalidate()
+            change_log.get_change_feed().poll_now()
+            
+            # Clear cart
+            self.cart = []
+            self.update_cart_button()
+            
+            messagebox.showinfo("Success", f"Order #{order_id} placed successfully!")
+            self.show_orders()
+        
+        def on_error(error):
+            self.placing_order = False
+            messagebox.showerror("Error", f"Failed to place order: {error}")
+        
+        db_worker.run_async(self.main_app, checkout, on_done, on_error=on_error)
     
     def show_orders(self):
         self.clear_content()
@@ -554,110 +623,238 @@ class CustomerDashboard:
         )
         title_label.pack(pady=20)
         
-        try:
-            connection = db_config.create_connection()
-            if connection:
-                cursor = connection.cursor(dictionary=True)
-                
-                # Get customer orders
-                cursor.execute(
-                    """SELECT * FROM orders 
-                    WHERE customer_id = %s 
-                    ORDER BY order_date DESC""",
-                    (self.main_app.current_user['id'],)
+        # Orders frame with scrollbar
+        orders_container = ctk.CTkFrame(self.content_frame)
+        orders_container.pack(fill="both", expand=True, padx=20, pady=10)
+        
+        canvas = tk.Canvas(orders_container, bg=self.content_frame.cget("fg_color")[1])
+        scrollbar = ctk.CTkScrollbar(orders_container, command=canvas.yview)
+        self.order_history_frame = ctk.CTkFrame(canvas)
+        
+        def update_scrollregion(event=None):
+            canvas.configure(scrollregion=canvas.bbox("all"))
+        
+        def update_canvas_width(event=None):
+            canvas_items = canvas.find_all()
+            if canvas_items and canvas.winfo_width() > 1:
+                canvas.itemconfig(canvas_items[0], width=canvas.winfo_width())
+        
+        self.order_history_frame.bind("<Configure>", update_scrollregion)
+        canvas.create_window((0, 0), window=self.order_history_frame, anchor="nw")
+        canvas.configure(yscrollcommand=scrollbar.set)
+        canvas.pack(side="left", fill="both", expand=True)
+        scrollbar.pack(side="right", fill="y")
+        canvas.bind("<Configure>", update_canvas_width)
+        
+        # Keyset of the oldest order shown so far; None means start from the newest
+        self.order_history_before = None
+        # order id -> status label, patched when staff change the order
+        self.order_status_labels = {}
+        self.order_history_more_button = None
+        self.load_order_history()
+    
+    def load_order_history(self):
+        """Append the next page of older orders to the order history"""
+        if self.order_history_more_button is not None:
+            self.order_history_more_button.destroy()
+            self.order_history_more_button = None
+        loading_label = self.create_loading_label(self.order_history_frame)
+        
+        customer_id = self.main_app.current_user['id']
+        before = self.order_history_before
+        
+        def fetch_orders(connection):
+            cursor = connection.cursor(dictionary=True)
+            page = order_service.fetch_customer_orders(cursor, customer_id, ORDER_HISTORY_PAGE_SIZE, before)
+            cursor.close()
+            return page
+        
+        def render_orders(page):
+            orders, has_more = page
+            loading_label.destroy()
+            
+            if not orders and before is None:
+                no_orders_label = ctk.CTkLabel(
+                    self.order_history_frame,
+                    text="You have no orders yet",
+                    font=ctk.CTkFont(size=16)
+                )
+                no_orders_label.pack(pady=50)
+                return
+            
+            for order in orders:
+                self.create_order_history_card(order)
+            
+            if orders:
+                self.order_history_before = (orders[-1]['order_date'], orders[-1]['id'])
+            
+            if has_more:
+                self.order_history_more_button = ctk.CTkButton(
+                    self.order_history_frame,
+                    text="Load older orders",
+                    width=200,
+                    command=self.load_order_history
+                )
+                self.order_history_more_button.pack(pady=15)
+        
+        self.run_query(fetch_orders, render_orders, "Failed to load orders", widget=loading_label)
+    
+    def on_orders_changed(self, changes):
+        """Re-read the status of the shown orders that changed (change log subscriber)"""
+        if not hasattr(self, 'order_history_frame') or not self.order_history_frame.winfo_exists():
+            return
+        changed = self.order_status_labels if changes is None else changes['orders']
+        order_ids = [order_id for order_id in changed if order_id in self.order_status_labels]
+        if not order_ids:
+            return
+        customer_id = self.main_app.current_user['id']
+        
+        def fetch_statuses(connection):
+            cursor = connection.cursor()
+            placeholders = ", ".join(["%s"] * len(order_ids))
+            cursor.execute(
+                f"SELECT id, status FROM orders WHERE id IN ({placeholders}) AND customer_id = %s",
+                (*order_ids, customer_id)
+            )
+            statuses = cursor.fetchall()
+            cursor.close()
+            return statuses
+        
+        def render_statuses(statuses):
+            for order_id, status in statuses:
+                self.order_status_labels[order_id].configure(
+                    text=status.upper(),
+                    text_color=self.order_status_colors.get(status, 'gray')
                 )
-                orders = cursor.fetchall()
-                
-                if not orders:
-                    no_orders_label = ctk.CTkLabel(
-                        self.content_frame,
-                        text="You have no orders yet",
-                        font=ctk.CTkFont(size=16)
-                    )
-                    no_orders_label.pack(pady=50)
-                else:
-                    # Orders frame with scrollbar
-                    orders_container = ctk.CTkFrame(self.content_frame)
-                    orders_container.pack(fill="both", expand=True, padx=20, pady=10)
-                    
-                    for order in orders:
-                        order_frame = ctk.CTkFrame(orders_container)
-                        order_frame.pack(fill="x", padx=10, pady=10)
-                        
-                        # Order header
-                        header_frame = ctk.CTkFrame(order_frame)
-                        header_frame.pack(fill="x", padx=10, pady=10)
-                        
-                        ctk.CTkLabel(
-                            header_frame,
-                            text=f"Order #{order['id']}",
-                            font=ctk.CTkFont(size=16, weight="bold")
-                        ).pack(side="left", padx=10)
-                        
-                        ctk.CTkLabel(
-                            header_frame,
-                            text=f"Date: {order['order_date'].strftime('%Y-%m-%d %H:%M')}",
-                            font=ctk.CTkFont(size=12)
-                        ).pack(side="left", padx=10)
-                        
-                        # Status badge
-                        status_colors = {
-                            'pending': 'orange',
-                            'processing': 'blue',
-                            'shipped': 'purple',
-                            'delivered': 'green',
-                            'cancelled': 'red'
-                        }
-                        ctk.CTkLabel(
-                            header_frame,
-                            text=order['status'].upper(),
-                            font=ctk.CTkFont(size=12, weight="bold"),
-                            text_color=status_colors.get(order['status'], 'gray')
-                        ).pack(side="right", padx=10)
-                        
-                        ctk.CTkLabel(
-                            header_frame,
-                            text=f"Total: ${order['total_amount']:.2f}",
-                            font=ctk.CTkFont(size=14, weight="bold")
-                        ).pack(side="right", padx=10)
-                        
-                        # Get order items
-                        cursor.execute(
-                            """SELECT oi.*, p.name as product_name
-                            FROM order_items oi
-                            JOIN products p ON oi.product_id = p.id
-                            WHERE oi.order_id = %s""",
-                            (order['id'],)
-                        )
-                        items = cursor.fetchall()
-                        
-                        # Items frame
-                        items_frame = ctk.CTkFrame(order_frame)
-                        items_frame.pack(fill="x", padx=10, pady=(0, 10))
-                        
-                        for item in items:
-                            item_text = f"  • {item['product_name']} x {item['quantity']} - ${item['price'] * item['quantity']:.2f}"
-                            ctk.CTkLabel(
-                                items_frame,
-                                text=item_text,
-                                font=ctk.CTkFont(size=12)
-                            ).pack(anchor="w", padx=10, pady=2)
-                        
-                        # Shipping address
-                        if order['shipping_address']:
-                            ctk.CTkLabel(
-                                order_frame,
-                                text=f"Shipping to: {order['shipping_address']}",
-                                font=ctk.CTkFont(size=11),
-                                text_color="gray"
-                            ).pack(anchor="w", padx=20, pady=(0, 10))
-                
-                cursor.close()
-                connection.close()
-                
-        except Error as e:
-            messagebox.showerror("Error", f"Failed to load orders: {e}")
+        
+        self.run_query(fetch_statuses, render_statuses, "Failed to refresh orders", widget=self.order_history_frame)
+    
+    def create_order_history_card(self, order):
+        order_frame = ctk.CTkFrame(self.order_history_frame)
+        order_frame.pack(fill="x", padx=10, pady=10)
+        
+        # Order header
+        header_frame = ctk.CTkFrame(order_frame)
+        header_frame.pack(fill="x", padx=10, pady=10)
+        
+        ctk.CTkLabel(
+            header_frame,
+            text=f"Order #{order['id']}",
+            font=ctk.CTkFont(size=16, weight="bold")
+        ).pack(side="left", padx=10)
+        
+        ctk.CTkLabel(
+            header_frame,
+            text=f"Date: {order['order_date'].strftime('%Y-%m-%d %H:%M')}",
+            font=ctk.CTkFont(size=12)
+        ).pack(side="left", padx=10)
+        
+        # Status badge
+        status_label = ctk.CTkLabel(
+            header_frame,
+            text=order['status'].upper(),
+            font=ctk.CTkFont(size=12, weight="bold"),
+            text_color=self.order_status_colors.get(order['status'], 'gray')
+        )
+        status_label.pack(side="right", padx=10)
+        self.order_status_labels[order['id']] = status_label
+        
+        ctk.CTkLabel(
+            header_frame,
+            text=f"Total: ${order['total_amount']:.2f}",
+            font=ctk.CTkFont(size=14, weight="bold")
+        ).pack(side="right", padx=10)
+        
+        # Items frame
+        items_frame = ctk.CTkFrame(order_frame)
+        items_frame.pack(fill="x", padx=10, pady=(0, 10))
+        
+        for item in order['items']:
+            item_text = f"  • {item['product_name']} x {item['quantity']} - ${item['price'] * item['quantity']:.2f}"
+            ctk.CTkLabel(
+                items_frame,
+                text=item_text,
+                font=ctk.CTkFont(size=12)
+            ).pack(anchor="w", padx=10, pady=2)
+        
+        # Shipping address
+        if order['shipping_address']:
+            ctk.CTkLabel(
+                order_frame,
+                text=f"Shipping to: {order['shipping_address']}",
+                font=ctk.CTkFont(size=11),
+                text_color="gray"
+            ).pack(anchor="w", padx=20, pady=(0, 10))
     
     def logout(self):
         if messagebox.askyesno("Logout", "Are you sure you want to logout?"):
+            if self.cart:
+                self.release_holds()
             self.main_app.logout()
+
+
+class ProductCard(ctk.CTkFrame):
+    """Reusable product card for the virtualized catalog grid; show() rebinds it to another product"""
+    
+    def __init__(self, parent, dashboard):
+        super().__init__(parent, width=250, height=300)
+        self.dashboard = dashboard
+        self.pack_propagate(False)
+        self.product = None
+        fonts = dashboard.get_card_fonts()
+        
+        # Product name
+        self.name_label = ctk.CTkLabel(self, text="", font=fonts['name'], wraplength=230)
+        self.name_label.pack(pady=(10, 5))
+        
+        # Category
+        self.category_label = ctk.CTkLabel(self, text="", font=fonts['small'], text_color="gray")
+        self.category_label.pack(pady=2)
+        
+        # Description
+        self.desc_label = ctk.CTkLabel(
+            self,
+            text="",
+            font=fonts['description'],
+            wraplength=230,
+            text_color="gray"
+        )
+        self.desc_label.pack(pady=5)
+        
+        # Price
+        self.price_label = ctk.CTkLabel(self, text="", font=fonts['price'], text_color="green")
+        self.price_label.pack(pady=5)
+        
+        # Stock
+        self.stock_label = ctk.CTkLabel(self, text="", font=fonts['small'])
+        self.stock_label.pack(pady=2)
+        
+        # Quantity selector
+        qty_frame = ctk.CTkFrame(self, fg_color="transparent")
+        qty_frame.pack(pady=10)
+        
+        qty_label = ctk.CTkLabel(qty_frame, text="Qty:", font=fonts['small'])
+        qty_label.pack(side="left", padx=5)
+        
+        self.qty_entry = ctk.CTkEntry(qty_frame, width=60)
+        self.qty_entry.pack(side="left", padx=5)
+        
+        # Add to cart button
+        add_button = ctk.CTkButton(
+            self,
+            text="Add to Cart",
+            width=200,
+            command=lambda: self.dashboard.add_to_cart(self.product, self.qty_entry)
+        )
+        add_button.pack(pady=10)
+    
+    def show(self, product):
+        """Fill the card with another product's data"""
+        self.product = product
+        self.name_label.configure(text=product['name'])
+        self.category_label.configure(text=f"Category: {product['category_name'] or 'N/A'}")
+        self.desc_label.configure(text=product['description'] or 'No description')
+        self.price_label.configure(text=f"${product['price']:.2f}")
+        self.stock_label.configure(text=f"In Stock: {product['quantity']}")
+        self.qty_entry.delete(0, "end")
+        self.qty_entry.insert(0, "1")
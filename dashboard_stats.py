@@ -0,0 +1,72 @@
+"""
+Dashboard Stats
+The counters shown on the admin and staff dashboards and reports, read
+from the trigger-maintained system_counters row and cached for a few
+seconds so switching tabs is instant.
+
+Code paths that change users, products or orders call invalidate() after
+committing, so the next dashboard shows their change straight away.
+"""
+import threading
+import time
+
+# How long a snapshot is reused before the counters are read again (seconds)
+STATS_TTL_SECONDS = 15
+
+# One row kept current by triggers (see migrations/0003_system_counters.py)
+STATS_QUERY = "SELECT * FROM system_counters WHERE id = 1"
+
+
+class DashboardStats:
+    def __init__(self, ttl=STATS_TTL_SECONDS):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._snapshot = None
+        self._fetched_at = 0.0
+        # Bumped by invalidate() so a read that started before a write is not cached
+        self._generation = 0
+
+    def cached(self):
+        """Return the cached snapshot if it is still fresh, else None"""
+        with self._lock:
+            if self._snapshot is not None and time.monotonic() - self._fetched_at < self.ttl:
+                return self._snapshot
+            return None
+
+    def get(self, connection):
+        """Return the counters, reading them from MySQL when the cache is stale (worker thread)"""
+        snapshot = self.cached()
+        if snapshot is not None:
+            return snapshot
+
+        with self._lock:
+            generation = self._generation
+
+        cursor = connection.cursor(dictionary=True)
+        cursor.execute(STATS_QUERY)
+        snapshot = cursor.fetchone()
+        cursor.close()
+
+        with self._lock:
+            if generation == self._generation:
+                self._snapshot = snapshot
+                self._fetched_at = time.monotonic()
+        return snapshot
+
+    def invalidate(self):
+        with self._lock:
+            self._generation += 1
+            self._snapshot = None
+
+
+_stats = DashboardStats()
+
+def get_stats(connection):
+    return _stats.get(connection)
+
+def cached_stats():
+    return _stats.cached()
+
+def invalidate():
+    """Drop the cached counters; call after committing a write that changes them"""
+    _stats.invalidate()
@@ -5,7 +5,7 @@ Usage: python db.py
 
 This script:
 1. Creates the database if it doesn't exist
-2. Creates all required tables (users, categories, suppliers, products, orders, order_items)
+2. Applies the schema migrations in migrations/ (tables, indexes, counters, rollups)
 3. Inserts sample data for testing
 
 Note: Database connection details are configured in .env file or use defaults:
@@ -1,157 +1,278 @@
 import mysql.connector
-from mysql.connector import Error
+from mysql.connector import Error, pooling
+from mysql.connector.errors import PoolError
+import importlib.util
 import os
+import re
+import threading
+import time
+from contextlib import contextmanager
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
+# Shared connection pool, created on first use by get_pool()
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_connection_settings(include_database=True):
+    """Connection arguments read from the .env file"""
+    settings = {
+        'host': os.getenv('DB_HOST', 'localhost'),
+        'user': os.getenv('DB_USER', 'root'),
+        'password': os.getenv('DB_PASSWORD', '')
+    }
+    if include_database:
+        settings['database'] = os.getenv('DB_NAME', 'inventory_system')
+    return settings
+
+def get_pool_size():
+    """Number of pooled connections (DB_POOL_SIZE in .env, 1-32)"""
+    try:
+        size = int(os.getenv('DB_POOL_SIZE', '5'))
+    except ValueError:
+        size = 5
+    return max(1, min(size, 32))
+
+def get_pool():
+    """Return the process-wide connection pool, creating it on first use"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = pooling.MySQLConnectionPool(
+                    pool_name=os.getenv('DB_POOL_NAME', 'sims_pool'),
+                    pool_size=get_pool_size(),
+                    pool_reset_session=True,
+                    **get_connection_settings()
+                )
+    return _pool
+
+def _checkout_connection():
+    """Take a connection from the pool, waiting up to DB_POOL_TIMEOUT seconds if all are in use"""
+    pool = get_pool()
+    deadline = time.monotonic() + float(os.getenv('DB_POOL_TIMEOUT', '10'))
+    while True:
+        try:
+            # The pool pings the connection on checkout and reconnects it
+            # if the server has dropped it, so callers always get a live one
+            return pool.get_connection()
+        except PoolError:
+            if time.monotonic() >= deadline:
+                raise
+            time.sleep(0.05)
+
+@contextmanager
+def get_connection():
+    """Borrow a health-checked connection from the shared pool.
+
+    Usage:
+        with db_config.get_connection() as connection:
+            cursor = connection.cursor()
+            ...
+
+    The connection goes back to the pool when the block exits; uncommitted
+    work is rolled back if the block raises.
+    """
+    connection = _checkout_connection()
+    try:
+        yield connection
+    except Exception:
+        try:
+            connection.rollback()
+        except Error:
+            pass
+        raise
+    finally:
+        # close() on a pooled connection returns it to the pool
+        connection.close()
+
+@contextmanager
+def borrow_spare_connections(count, reserve=1):
+    """Borrow up to `count` pooled connections that are free right now, without waiting.
+
+    Yields a list of 0 to `count` connections. At least `reserve` of the
+    connections that were free are left in the pool, so callers on the Tk
+    thread never queue behind background work.
+    """
+    pool = get_pool()
+    borrowed = []
+    try:
+        while len(borrowed) < count + reserve:
+            try:
+                borrowed.append(pool.get_connection())
+            except PoolError:
+                break
+        # Give the reserve back; the rest is the caller's
+        keep = min(count, max(0, len(borrowed) - reserve))
+        for connection in borrowed[keep:]:
+            connection.close()
+        borrowed = borrowed[:keep]
+        yield borrowed
+    finally:
+        for connection in borrowed:
+            connection.close()
+
 def create_connection():
-    """Create a database connection to MySQL database"""
+    """Create a standalone (unpooled) database connection to MySQL database.
+
+    Prefer get_connection(), which reuses pooled connections.
+    """
     connection = None
     try:
-        connection = mysql.connector.connect(
-            host=os.getenv('DB_HOST', 'localhost'),
-            user=os.getenv('DB_USER', 'root'),
-            password=os.getenv('DB_PASSWORD', ''),
-            database=os.getenv('DB_NAME', 'inventory_system')
-        )
+        connection = mysql.connector.connect(**get_connection_settings())
         # Removed print statement to avoid console spam
     except Error as e:
         print(f"The error '{e}' occurred")
     
     return connection
 
+def index_exists(cursor, table, index_name):
+    cursor.execute(
+        """SELECT COUNT(*) FROM information_schema.statistics
+        WHERE table_schema = DATABASE() AND table_name = %s AND index_name = %s""",
+        (table, index_name)
+    )
+    return cursor.fetchone()[0] > 0
+
+def create_index(cursor, table, index_name, columns, kind=""):
+    """Create an index unless one with the same name already exists (MySQL has no CREATE INDEX IF NOT EXISTS).
+
+    The index is built online (ALGORITHM=INPLACE), so the table stays
+    readable and writable while a large index builds; FULLTEXT indexes
+    only allow reads meanwhile (LOCK=SHARED).
+    """
+    if not index_exists(cursor, table, index_name):
+        # kind is an index modifier such as "UNIQUE" or "FULLTEXT"
+        lock = "SHARED" if kind.upper() == "FULLTEXT" else "NONE"
+        cursor.execute(
+            f"ALTER TABLE {table} ADD {kind} INDEX {index_name} ({columns}), ALGORITHM=INPLACE, LOCK={lock}"
+        )
+
+def drop_index(cursor, table, index_name):
+    """Drop an index if it exists (in place, without blocking writes)"""
+    if index_exists(cursor, table, index_name):
+        cursor.execute(f"ALTER TABLE {table} DROP INDEX {index_name}, ALGORITHM=INPLACE, LOCK=NONE")
+
+def add_column(cursor, table, column, definition):
+    """Add a column to an existing table unless it is already there"""
+    cursor.execute(f"SHOW COLUMNS FROM {table} LIKE %s", (column,))
+    if cursor.fetchone() is None:
+        cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+
+def create_trigger(cursor, trigger_name, definition):
+    """Create a trigger unless one with the same name already exists"""
+    cursor.execute(
+        """SELECT COUNT(*) FROM information_schema.triggers
+        WHERE trigger_schema = DATABASE() AND trigger_name = %s""",
+        (trigger_name,)
+    )
+    if cursor.fetchone()[0] == 0:
+        cursor.execute(f"CREATE TRIGGER {trigger_name} {definition}")
+
+# daily_sales rows with this product_id hold a day's order totals (see migration 0004)
+DAILY_TOTAL_PRODUCT_ID = 0
+
+# Versioned schema migrations: migrations/NNNN_description.py files, each with
+# an upgrade(cursor) function, applied in order and recorded in schema_version.
+# Migrations must be safe to re-run (use create_index/add_column/create_trigger),
+# since DDL commits implicitly and a failed migration is retried as a whole.
+# A migration keeps its own DDL: once numbered, what it applies never changes.
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "migrations")
+MIGRATION_FILE = re.compile(r"^(\d+)_(\w+)\.py$")
+# Named lock held while migrating, so two clients starting together don't both migrate
+MIGRATION_LOCK_NAME = "sims_schema_migration"
+MIGRATION_LOCK_TIMEOUT = 300
+
+def list_migrations():
+    """[(version, name, path)] of every migration file, in version order"""
+    migrations = []
+    for filename in os.listdir(MIGRATIONS_DIR):
+        match = MIGRATION_FILE.match(filename)
+        if match:
+            migrations.append((int(match.group(1)), match.group(2), os.path.join(MIGRATIONS_DIR, filename)))
+    return sorted(migrations)
+
+def get_schema_version(cursor):
+    """Highest applied migration version (0 for a database that predates schema_version)"""
+    try:
+        cursor.execute("SELECT MAX(version) FROM schema_version")
+    except Error as e:
+        if e.errno == 1146:  # ER_NO_SUCH_TABLE
+            return 0
+        raise
+    return cursor.fetchone()[0] or 0
+
+def _load_migration(version, name, path):
+    spec = importlib.util.spec_from_file_location(f"migration_{version:04d}_{name}", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+def migrate(connection):
+    """Apply the pending migrations; returns how many were applied.
+
+    When the schema is current this is one query on schema_version, so it
+    is cheap enough to run at every application start.
+    """
+    migrations = list_migrations()
+    cursor = connection.cursor()
+    try:
+        if not migrations or get_schema_version(cursor) >= migrations[-1][0]:
+            return 0
+
+        cursor.execute("SELECT GET_LOCK(%s, %s)", (MIGRATION_LOCK_NAME, MIGRATION_LOCK_TIMEOUT))
+        if cursor.fetchone()[0] != 1:
+            raise RuntimeError("Timed out waiting for another client to finish migrating the database")
+        try:
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS schema_version (
+                    version INT PRIMARY KEY,
+                    name VARCHAR(100) NOT NULL,
+                    applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+                """)
+            # Another client may have migrated while we waited for the lock
+            current = get_schema_version(cursor)
+            applied = 0
+            for version, name, path in migrations:
+                if version <= current:
+                    continue
+                _load_migration(version, name, path).upgrade(cursor)
+                cursor.execute("INSERT INTO schema_version (version, name) VALUES (%s, %s)", (version, name))
+                connection.commit()
+                applied += 1
+                print(f"Applied migration {version:04d}_{name}")
+            return applied
+        finally:
+            cursor.execute("SELECT RELEASE_LOCK(%s)", (MIGRATION_LOCK_NAME,))
+            cursor.fetchone()
+    finally:
+        cursor.close()
+
+def ensure_schema():
+    """Bring the database schema up to date at application start"""
+    with get_connection() as connection:
+        return migrate(connection)
+
 def create_database():
     """Create a database if it doesn't exist"""
     connection = None
     try:
-        connection = mysql.connector.connect(
-            host=os.getenv('DB_HOST', 'localhost'),
-            user=os.getenv('DB_USER', 'root'),
-            password=os.getenv('DB_PASSWORD', '')
-        )
+        connection = mysql.connector.connect(**get_connection_settings(include_database=False))
         cursor = connection.cursor()
         
         # Create database if it doesn't exist
         cursor.execute(f"CREATE DATABASE IF NOT EXISTS {os.getenv('DB_NAME', 'inventory_system')}")
         
         # Connect to the database
-        connection = mysql.connector.connect(
-            host=os.getenv('DB_HOST', 'localhost'),
-            user=os.getenv('DB_USER', 'root'),
-            password=os.getenv('DB_PASSWORD', ''),
-            database=os.getenv('DB_NAME', 'inventory_system')
-        )
+        connection.close()
+        connection = mysql.connector.connect(**get_connection_settings())
         cursor = connection.cursor()
         
-        # Create users table first (no dependencies)
-        # Check if table exists and has old schema (full_name column)
-        cursor.execute("SHOW TABLES LIKE 'users'")
-        table_exists = cursor.fetchone()
-        
-        if table_exists:
-            # Check if table has old schema (full_name) or new schema (first_name/last_name)
-            cursor.execute("SHOW COLUMNS FROM users LIKE 'full_name'")
-            has_full_name = cursor.fetchone()
-            
-            if has_full_name:
-                # Migrate old schema to new schema
-                try:
-                    cursor.execute("ALTER TABLE users ADD COLUMN first_name VARCHAR(100) AFTER id")
-                    cursor.execute("ALTER TABLE users ADD COLUMN last_name VARCHAR(100) AFTER first_name")
-                    # Split full_name into first_name and last_name
-                    cursor.execute("UPDATE users SET first_name = SUBSTRING_INDEX(full_name, ' ', 1), last_name = SUBSTRING_INDEX(full_name, ' ', -1) WHERE first_name IS NULL")
-                    cursor.execute("ALTER TABLE users MODIFY first_name VARCHAR(100) NOT NULL")
-                    cursor.execute("ALTER TABLE users MODIFY last_name VARCHAR(100) NOT NULL")
-                    # Drop old full_name column
-                    cursor.execute("ALTER TABLE users DROP COLUMN full_name")
-                    connection.commit()
-                    print("Database schema migrated successfully from full_name to first_name/last_name")
-                except Exception as e:
-                    print(f"Migration warning: {e}. Using existing schema.")
-        else:
-            # Create new table with new schema
-            cursor.execute("""
-            CREATE TABLE IF NOT EXISTS users (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                first_name VARCHAR(100) NOT NULL,
-                last_name VARCHAR(100) NOT NULL,
-                email VARCHAR(100) UNIQUE NOT NULL,
-                password VARCHAR(255) NOT NULL,
-                phone_number VARCHAR(20),
-                user_type ENUM('customer', 'staff', 'admin') NOT NULL,
-                is_approved BOOLEAN DEFAULT FALSE,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-            """)
-        
-        # Create categories table (no dependencies)
-        cursor.execute("""
-        CREATE TABLE IF NOT EXISTS categories (
-            id INT AUTO_INCREMENT PRIMARY KEY,
-            name VARCHAR(100) NOT NULL,
-            description TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-        """)
-        
-        # Create suppliers table (no dependencies)
-        cursor.execute("""
-        CREATE TABLE IF NOT EXISTS suppliers (
-            id INT AUTO_INCREMENT PRIMARY KEY,
-            name VARCHAR(100) NOT NULL,
-            contact_person VARCHAR(100),
-            email VARCHAR(100),
-            phone VARCHAR(20),
-            address TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-        """)
-        
-        # Create products table (depends on categories and suppliers)
-        cursor.execute("""
-        CREATE TABLE IF NOT EXISTS products (
-            id INT AUTO_INCREMENT PRIMARY KEY,
-            name VARCHAR(100) NOT NULL,
-            description TEXT,
-            category_id INT,
-            supplier_id INT,
-            price DECIMAL(10, 2) NOT NULL,
-            quantity INT NOT NULL DEFAULT 0,
-            reorder_level INT DEFAULT 10,
-            image_path VARCHAR(255),
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (category_id) REFERENCES categories(id) ON DELETE SET NULL,
-            FOREIGN KEY (supplier_id) REFERENCES suppliers(id) ON DELETE SET NULL
-        )
-        """)
-        
-        # Create orders table (depends on users)
-        cursor.execute("""
-        CREATE TABLE IF NOT EXISTS orders (
-            id INT AUTO_INCREMENT PRIMARY KEY,
-            customer_id INT NOT NULL,
-            order_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            status ENUM('pending', 'approved','rejected') DEFAULT 'pending',
-            total_amount DECIMAL(10, 2) NOT NULL,
-            shipping_address TEXT,
-            FOREIGN KEY (customer_id) REFERENCES users(id) ON DELETE CASCADE
-        )
-        """)
-        
-        # Create order_items table (depends on orders and products)
-        cursor.execute("""
-        CREATE TABLE IF NOT EXISTS order_items (
-            id INT AUTO_INCREMENT PRIMARY KEY,
-            order_id INT NOT NULL,
-            product_id INT NOT NULL,
-            quantity INT NOT NULL,
-            price DECIMAL(10, 2) NOT NULL,
-            FOREIGN KEY (order_id) REFERENCES orders(id) ON DELETE CASCADE,
-            FOREIGN KEY (product_id) REFERENCES products(id) ON DELETE CASCADE
-        )
-        """)
+        # Tables, indexes, counters and rollups
+        migrate(connection)
         
         # Insert default admin user
         cursor.execute("""
@@ -0,0 +1,122 @@
+"""
+Background Database Worker
+Runs queries on a small thread pool so the Tk mainloop never waits on MySQL.
+
+Each task borrows a connection from the shared pool in db_config, and its
+result (or exception) is handed back to the Tk thread by polling a queue
+with main_app.after(). Tk widgets must only be touched from the callbacks,
+never from the query function itself.
+
+Usage:
+    def fetch(connection):
+        cursor = connection.cursor(dictionary=True)
+        cursor.execute("SELECT ...")
+        rows = cursor.fetchall()
+        cursor.close()
+        return rows
+
+    db_worker.run_async(self.main_app, fetch, self.render_rows,
+                        on_error=..., widget=self.rows_frame, tag="rows")
+"""
+import itertools
+import queue
+from concurrent.futures import ThreadPoolExecutor
+import db_config
+
+# How often the Tk thread checks for finished queries (milliseconds)
+POLL_INTERVAL_MS = 30
+
+
+class DatabaseExecutor:
+    def __init__(self, max_workers=None):
+        # Leave one pooled connection for the short writes still done on the Tk thread
+        if max_workers is None:
+            max_workers = max(1, db_config.get_pool_size() - 1)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="db-worker")
+        self._results = queue.Queue()
+        self._tickets = itertools.count(1)
+        # The attributes below are only used on the Tk thread
+        self._latest = {}
+        self._pending = 0
+        self._polling = False
+
+    def submit(self, func, *args, **kwargs):
+        """Run func(connection, *args, **kwargs) on a worker thread and return its Future"""
+        return self._executor.submit(self._run, func, args, kwargs)
+
+    @staticmethod
+    def _run(func, args, kwargs):
+        with db_config.get_connection() as connection:
+            return func(connection, *args, **kwargs)
+
+    def run_async(self, main_app, func, on_success, on_error=None, widget=None, tag=None, args=()):
+        """Run func(connection, *args) in the background and deliver the result on the Tk thread.
+
+        on_success(result) or on_error(exception) is called from main_app's
+        mainloop. The callback is skipped if `widget` has been destroyed in the
+        meantime, or if a newer task with the same `tag` has been submitted
+        (so a slow, stale query never overwrites a fresh one).
+        Must be called from the Tk thread.
+        """
+        ticket = next(self._tickets)
+        if tag is not None:
+            self._latest[tag] = ticket
+
+        future = self.submit(func, *args)
+        future.add_done_callback(
+            lambda f: self._results.put((f, ticket, tag, widget, on_success, on_error))
+        )
+
+        self._pending += 1
+        if not self._polling:
+            self._polling = True
+            main_app.after(POLL_INTERVAL_MS, lambda: self._drain(main_app))
+        return future
+
+    def _drain(self, main_app):
+        """Deliver finished results on the Tk thread, then keep polling while work is outstanding"""
+        while True:
+            try:
+                future, ticket, tag, widget, on_success, on_error = self._results.get_nowait()
+            except queue.Empty:
+                break
+            self._pending -= 1
+
+            if tag is not None and self._latest.get(tag) != ticket:
+                continue
+            if widget is not None and not widget.winfo_exists():
+                continue
+
+            error = future.exception()
+            try:
+                if error is None:
+                    on_success(future.result())
+                elif on_error:
+                    on_error(error)
+                else:
+                    print(f"Background query failed: {error}")
+            except Exception as e:
+                print(f"Error in background query callback: {e}")
+
+        if self._pending > 0:
+            main_app.after(POLL_INTERVAL_MS, lambda: self._drain(main_app))
+        else:
+            self._polling = False
+
+    def shutdown(self, wait=False):
+        self._executor.shutdown(wait=wait)
+
+
+_executor = None
+
+def get_executor():
+    """Return the process-wide executor, creating it on first use (Tk thread only)"""
+    global _executor
+    if _executor is None:
+        _executor = DatabaseExecutor()
+    return _executor
+
+def run_async(main_app, func, on_success, on_error=None, widget=None, tag=None, args=()):
+    """Shortcut for get_executor().run_async(...)"""
+    return get_executor().run_async(main_app, func, on_success, on_error=on_error,
+                                    widget=widget, tag=tag, args=args)
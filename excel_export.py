@@ -0,0 +1,177 @@
+"""
+Full History Excel Export
+Streams complete orders, order lines, products and customers into an
+.xlsx file without holding the data in memory.
+
+Rows are read from unbuffered (server-side streamed) cursors in batches
+and appended to an openpyxl write-only workbook, which flushes each row to
+disk as it goes, so memory stays flat however many rows are exported.
+A dataset larger than one sheet continues on "Orders (2)", "Orders (3)"...
+
+Progress is reported on an optional export_jobs.ExportJob after every batch.
+"""
+import os
+import openpyxl
+from mysql.connector import Error
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
+from openpyxl.styles import Font, PatternFill
+
+# Excel's hard limit on rows per worksheet (the header takes one of them)
+EXCEL_MAX_ROWS = 1048576
+# Rows fetched from MySQL per round trip
+FETCH_BATCH_SIZE = 5000
+
+# Sheet title -> query; the column names become the header row
+DATASETS = [
+    ("Orders", """
+        SELECT o.id as `Order ID`, o.order_date as `Order Date`, o.status as `Status`,
+               o.total_amount as `Total Amount`, o.customer_id as `Customer ID`,
+               CONCAT(u.first_name, ' ', u.last_name) as `Customer Name`, u.email as `Customer Email`,
+               o.shipping_address as `Shipping Address`
+        FROM orders o
+        JOIN users u ON o.customer_id = u.id
+        ORDER BY o.id
+    """),
+    ("Order Lines", """
+        SELECT oi.id as `Line ID`, oi.order_id as `Order ID`, oi.product_id as `Product ID`,
+               p.name as `Product Name`, oi.quantity as `Quantity`, oi.price as `Unit Price`,
+               oi.quantity * oi.price as `Line Total`
+        FROM order_items oi
+        JOIN products p ON oi.product_id = p.id
+        ORDER BY oi.id
+    """),
+    ("Products", """
+        SELECT p.id as `Product ID`, p.name as `Name`, c.name as `Category`, s.name as `Supplier`,
+               p.price as `Price`, p.quantity as `Quantity`, p.reorder_level as `Reorder Level`,
+               p.created_at as `Created At`
+        FROM products p
+        LEFT JOIN categories c ON p.category_id = c.id
+        LEFT JOIN suppliers s ON p.supplier_id = s.id
+        ORDER BY p.id
+    """),
+    ("Customers", """
+        SELECT id as `Customer ID`, first_name as `First Name`, last_name as `Last Name`,
+               email as `Email`, phone_number as `Phone`, created_at as `Registered At`
+        FROM users
+        WHERE user_type = 'customer'
+        ORDER BY id
+    """),
+]
+
+
+def _flushed_bytes(workbook):
+    """Bytes streamed so far into the workbook's temporary sheet files"""
+    total = 0
+    for sheet in workbook.worksheets:
+        path = getattr(getattr(sheet, "_writer", None), "out", None)
+        if isinstance(path, str):
+            try:
+                total += os.path.getsize(path)
+            except OSError:
+                pass
+    return total
+
+
+def count_rows(connection, query):
+    """Number of rows a dataset query will return"""
+    cursor = connection.cursor()
+    cursor.execute(f"SELECT COUNT(*) FROM ({query}) as dataset")
+    total = cursor.fetchone()[0]
+    cursor.close()
+    return total
+
+
+def _clean(value):
+    # Control characters are not allowed in .xlsx cells
+    if isinstance(value, str):
+        return ILLEGAL_CHARACTERS_RE.sub("", value)
+    return value
+
+
+class _SheetWriter:
+    """Appends rows to a write-only sheet, starting a new sheet at Excel's row limit"""
+
+    def __init__(self, workbook, title, headers):
+        self.workbook = workbook
+        self.title = title
+        self.headers = headers
+        self.part = 0
+        self.sheet = None
+        self.rows_in_sheet = 0
+
+    def _new_sheet(self):
+        self.part += 1
+        title = self.title if self.part == 1 else f"{self.title} ({self.part})"
+        self.sheet = self.workbook.create_sheet(title)
+
+        header_cells = []
+        for header in self.headers:
+            cell = WriteOnlyCell(self.sheet, value=header)
+            cell.font = Font(bold=True, color="FFFFFF")
+            cell.fill = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
+            header_cells.append(cell)
+        self.sheet.append(header_cells)
+        self.rows_in_sheet = 1
+
+    def append(self, row):
+        if self.sheet is None or self.rows_in_sheet >= EXCEL_MAX_ROWS:
+            self._new_sheet()
+        self.sheet.append([_clean(value) for value in row])
+        self.rows_in_sheet += 1
+
+    def finish(self):
+        # An empty dataset still gets its sheet with the header row
+        if self.sheet is None:
+            self._new_sheet()
+
+
+def export_dataset(connection, workbook, title, query, job=None):
+    """Stream one query into one or more sheets; returns the number of rows written"""
+    cursor = connection.cursor(buffered=False)
+    try:
+        cursor.execute(query)
+        writer = _SheetWriter(workbook, title, list(cursor.column_names))
+        total = 0
+        while True:
+            rows = cursor.fetchmany(FETCH_BATCH_SIZE)
+            if not rows:
+                break
+            for row in rows:
+                writer.append(row)
+            total += len(rows)
+            if job is not None:
+                job.add_rows(len(rows), _flushed_bytes(workbook))
+        writer.finish()
+        return total
+    except BaseException:
+        # Stopped mid-stream (cancelled or a write failed): read off the rest of the
+        # result so the cursor closes cleanly and the original error propagates
+        try:
+            connection.consume_results()
+        except Error:
+            pass
+        raise
+    finally:
+        cursor.close()
+
+
+def export_full_history(connection, filename, job=None):
+    """Write every dataset to `filename`; returns {sheet title: rows written}"""
+    if job is not None:
+        job.set_stage("Counting rows...")
+        job.total_rows = sum(count_rows(connection, query) for title, query in DATASETS)
+
+    workbook = openpyxl.Workbook(write_only=True)
+    counts = {}
+    for title, query in DATASETS:
+        if job is not None:
+            job.set_stage(f"Writing {title}...")
+        counts[title] = export_dataset(connection, workbook, title, query, job)
+
+    if job is not None:
+        job.set_stage("Saving workbook...")
+    workbook.save(filename)
+    if job is not None:
+        job.bytes_written = os.path.getsize(filename)
+    return counts
@@ -0,0 +1,215 @@
+"""
+Query Plan Check
+Runs EXPLAIN on every hot dashboard query and fails if any of them scans a
+whole table (or a whole index) instead of seeking into an index.
+Usage: python explain_check.py [--min-rows N]
+
+The shared data-access functions (order_service, product_service,
+report_service, product_index) are called with a cursor that runs EXPLAIN
+in place of each statement, so the plans are those of the exact SQL the
+dashboards send. Queries still written inline in the dashboards are listed
+in INLINE_QUERIES.
+
+A plan fails when it reads a table with access type ALL (full table scan)
+or index (full index scan) and either no index could serve it at all, or
+the optimizer expects to read at least --min-rows rows. The optimizer
+happily scans small tables, so run it against a database of realistic
+size (e.g. a copy of production) for the row check to mean anything.
+
+Queries that scan by design are listed in KNOWN_FULL_SCANS with the reason;
+their plans are still printed, marked "known", but do not fail the check.
+"""
+import argparse
+import sys
+from datetime import datetime, timedelta
+import change_log
+import db_config
+import order_service
+import product_service
+import report_service
+import stock_reservations
+from product_index import ProductIndex
+
+# Default row estimate from which a full scan fails the check
+DEFAULT_MIN_ROWS = 1000
+# Access types that read a whole table or a whole index
+FULL_SCAN_TYPES = ("ALL", "index")
+
+# Queries the dashboards still build inline (Tk code, so they cannot be called here)
+INLINE_QUERIES = [
+    ("staff: low stock alerts (show_alerts)", """
+        SELECT p.*, c.name as category_name, s.name as supplier_name
+        FROM products p
+        LEFT JOIN categories c ON p.category_id = c.id
+        LEFT JOIN suppliers s ON p.supplier_id = s.id
+        WHERE p.is_low_stock = TRUE
+        ORDER BY p.quantity ASC
+    """, ()),
+    ("admin: pending staff (load_users)", """
+        SELECT * FROM users WHERE 1=1 AND user_type = %s AND is_approved = FALSE ORDER BY created_at DESC
+    """, ("staff",)),
+    ("admin: all users (load_users, no filters)", """
+        SELECT * FROM users WHERE 1=1 ORDER BY created_at DESC
+    """, ()),
+    ("admin/staff: dashboard stats", "SELECT * FROM system_counters WHERE id = 1", ()),
+]
+
+# Query name -> why a full scan is accepted there
+KNOWN_FULL_SCANS = {
+    "reports: top products (all time)": (
+        "all-time units per product aggregates every order line; it runs on a worker and "
+        f"the report is cached for {report_service.REPORT_TTL_SECONDS}s"
+    ),
+    "reports: top customers": (
+        "all-time spend per customer aggregates every order; it runs on a worker and "
+        f"the report is cached for {report_service.REPORT_TTL_SECONDS}s"
+    ),
+    "admin: all users (load_users, no filters)": (
+        "lists every user, so it reads the whole table whatever the plan"
+    ),
+}
+
+
+class ExplainCursor:
+    """Cursor stand-in that records the EXPLAIN plan of every statement instead of running it"""
+
+    def __init__(self, cursor, plans, name):
+        self.cursor = cursor
+        self.plans = plans
+        self.name = name
+
+    def execute(self, query, params=()):
+        self.cursor.execute("EXPLAIN " + query, params)
+        self.plans.append((self.name, self.cursor.fetchall()))
+
+    def fetchall(self):
+        return []
+
+    def fetchone(self):
+        return None
+
+    def close(self):
+        pass
+
+
+class ExplainConnection:
+    """Connection stand-in handing out ExplainCursors"""
+
+    def __init__(self, connection, plans):
+        self.connection = connection
+        self.plans = plans
+        self.name = None
+
+    def cursor(self, **kwargs):
+        return ExplainCursor(self.connection.cursor(dictionary=True), self.plans, self.name)
+
+
+def hot_queries():
+    """(name, func(connection)) for every data-access call the dashboards make on page loads"""
+    now = datetime.now()
+    month_ago = now - timedelta(days=30)
+
+    def with_cursor(func):
+        def run(connection):
+            cursor = connection.cursor(dictionary=True)
+            func(cursor)
+            cursor.close()
+        return run
+
+    return [
+        ("staff: order board, all statuses", with_cursor(
+            lambda cursor: order_service.fetch_order_board_page(cursor, None, 50, (now, 1000)))),
+        ("staff: order board, pending", with_cursor(
+            lambda cursor: order_service.fetch_order_board_page(cursor, "pending", 50, (now, 1000)))),
+        ("staff: order feed poll", with_cursor(
+            lambda cursor: order_service.fetch_order_feed(cursor, 1000, month_ago))),
+        ("staff/customer: order lines", with_cursor(
+            lambda cursor: order_service.fetch_order_items(cursor, [1, 2, 3]))),
+        ("customer: order history", with_cursor(
+            lambda cursor: order_service.fetch_customer_orders(cursor, 2, 20, (now, 1000)))),
+        ("customer: catalog page", with_cursor(
+            lambda cursor: product_service.fetch_catalog_page(cursor, after=("M", 1)))),
+        ("customer: catalog page by category", with_cursor(
+            lambda cursor: product_service.fetch_catalog_page(cursor, category="Electronics"))),
+        ("customer: catalog search", with_cursor(
+            lambda cursor: product_service.fetch_catalog_page(cursor, search_term="laptop"))),
+        ("staff: product search", with_cursor(
+            lambda cursor: product_service.fetch_products(cursor, "wireless mouse"))),
+        ("customer: stock held in carts", with_cursor(
+            lambda cursor: stock_reservations.held_quantities(cursor, [1, 2, 3], exclude_customer_id=2))),
+        ("all clients: change log poll", with_cursor(
+            lambda cursor: change_log.fetch_changes(cursor, 1000))),
+        ("search index: incremental refresh",
+            lambda connection: ProductIndex.fetch_changes(connection, month_ago)),
+        ("admin: sales for a date range", with_cursor(
+            lambda cursor: report_service.fetch_sales_report(cursor, month_ago, now, "day"))),
+        ("reports: top products (all time)", with_cursor(
+            lambda cursor: report_service.fetch_top_products(cursor))),
+        ("reports: top customers", with_cursor(
+            lambda cursor: report_service.fetch_top_customers(cursor))),
+        ("reports: low stock list",
+            lambda connection: list(report_service.iter_low_stock_items(connection))),
+        ("reports: order appendix",
+            lambda connection: list(report_service.iter_orders(connection, month_ago, now))),
+    ]
+
+
+def collect_plans(connection):
+    """Return [(query name, EXPLAIN rows)] for every hot query"""
+    plans = []
+    explain_connection = ExplainConnection(connection, plans)
+    for name, run in hot_queries():
+        explain_connection.name = name
+        run(explain_connection)
+
+    cursor = connection.cursor(dictionary=True)
+    for name, query, params in INLINE_QUERIES:
+        cursor.execute("EXPLAIN " + query, params)
+        plans.append((name, cursor.fetchall()))
+    cursor.close()
+    return plans
+
+
+def full_scan_problem(row, min_rows):
+    """Why this EXPLAIN row fails the check, or None if it is fine"""
+    table = row.get('table') or ""
+    # Derived tables and unions are materialized results, not base tables
+    if table.startswith("<") or row.get('type') not in FULL_SCAN_TYPES:
+        return None
+    rows = row.get('rows') or 0
+    if not row.get('key') and not row.get('possible_keys'):
+        return f"full scan of {table}, no usable index"
+    if rows >= min_rows:
+        return f"full scan of {table}, ~{rows} rows"
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fail if a hot dashboard query does a full scan")
+    parser.add_argument("--min-rows", type=int, default=DEFAULT_MIN_ROWS,
+                        help=f"row estimate from which a full scan fails (default {DEFAULT_MIN_ROWS})")
+    args = parser.parse_args()
+
+    with db_config.get_connection() as connection:
+        plans = collect_plans(connection)
+
+    failures = 0
+    for name, rows in plans:
+        problems = [problem for problem in (full_scan_problem(row, args.min_rows) for row in rows) if problem]
+        known = problems and name in KNOWN_FULL_SCANS
+        failures += bool(problems) and not known
+        print(f"{'known' if known else 'FAIL' if problems else 'ok':5}  {name}")
+        for row in rows:
+            print(f"        {row.get('table')}: type={row.get('type')} key={row.get('key')} "
+                  f"rows={row.get('rows')} {row.get('Extra') or ''}")
+        for problem in problems:
+            print(f"        -> {problem}")
+        if known:
+            print(f"        (accepted: {KNOWN_FULL_SCANS[name]})")
+
+    print(f"\n{len(plans)} statements checked, {failures} with full scans")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,87 @@
+"""
+Export Jobs
+Runs long exports on a database worker while the dashboard stays usable.
+
+The export function receives an ExportJob and reports its progress on it
+(rows written, bytes flushed, current stage). The Tk thread only reads
+those numbers to draw the progress bar. Cancelling sets a flag that the
+export sees at its next progress report; it then stops and the partially
+written files are removed.
+"""
+import os
+import threading
+import db_worker
+
+
+class ExportCancelled(Exception):
+    """Raised inside an export when the user cancels it"""
+
+
+class ExportJob:
+    def __init__(self, title, filename=None):
+        self.title = title
+        # Files the export writes; removed if it fails or is cancelled
+        self.files = [filename] if filename else []
+        self.stage = "Starting..."
+        # Expected number of rows, or None when unknown (indeterminate progress)
+        self.total_rows = None
+        self.rows_written = 0
+        self.bytes_written = 0
+        self.finished = False
+        self._cancel = threading.Event()
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    def cancel(self):
+        self._cancel.set()
+
+    def check_cancelled(self):
+        if self._cancel.is_set():
+            raise ExportCancelled()
+
+    def add_file(self, path):
+        self.files.append(path)
+
+    def set_stage(self, stage):
+        self.check_cancelled()
+        self.stage = stage
+
+    def add_rows(self, count, bytes_written=None):
+        """Record progress from the export (worker thread); raises ExportCancelled if cancelled"""
+        self.rows_written += count
+        if bytes_written is not None:
+            self.bytes_written = bytes_written
+        self.check_cancelled()
+
+
+def start_export(main_app, job, export, on_done, on_error):
+    """Run export(connection, job) in the background.
+
+    on_done(result) or on_error(exception) is called on the Tk thread; a
+    cancelled export reports ExportCancelled to on_error.
+    """
+    def run(connection):
+        try:
+            return export(connection, job)
+        except BaseException:
+            # Never leave truncated files behind
+            for path in job.files:
+                if os.path.exists(path):
+                    try:
+                        os.remove(path)
+                    except OSError:
+                        pass
+            raise
+        finally:
+            job.finished = True
+
+    return db_worker.run_async(main_app, run, on_done, on_error=on_error)
+
+
+def format_bytes(count):
+    for unit in ("B", "KB", "MB", "GB"):
+        if count < 1024 or unit == "GB":
+            return f"{count:.0f} {unit}" if unit == "B" else f"{count:.1f} {unit}"
+        count /= 1024
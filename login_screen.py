@@ -248,8 +248,7 @@ class LoginScreen(ctk.CTkToplevel):
             return
         
         try:
-            connection = db_config.create_connection()
-            if connection:
+            with db_config.get_connection() as connection:
                 cursor = connection.cursor(dictionary=True)
                 
                 # Get user by email
@@ -279,7 +278,6 @@ class LoginScreen(ctk.CTkToplevel):
                     messagebox.showerror("Login Failed", "Invalid email or password")
                 
                 cursor.close()
-                connection.close()
                 
         except Error as e:
             messagebox.showerror("Database Error", f"An error occurred: {e}")
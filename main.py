@@ -1,6 +1,7 @@
 import os
 import customtkinter as ctk
 from PIL import Image, ImageTk
+import change_log
 import db_config
 
 # Set appearance mode and theme
@@ -145,15 +146,13 @@ class InventoryManagementSystem(ctk.CTk):
         # Clear current user
         self.current_user = None
         
+        # Stop watching for changes until the next login
+        change_log.stop_change_feed()
+        
         # Clear main frame
         for widget in self.main_frame.winfo_children():
             widget.destroy()
         
-        # Close database connection if dashboard has one
-        if hasattr(self, 'current_dashboard') and hasattr(self.current_dashboard, 'db_connection'):
-            if self.current_dashboard.db_connection and self.current_dashboard.db_connection.is_connected():
-                self.current_dashboard.db_connection.close()
-        
         # Clear dashboard reference
         if hasattr(self, 'current_dashboard'):
             del self.current_dashboard
@@ -162,5 +161,10 @@ class InventoryManagementSystem(ctk.CTk):
         self.create_home_screen()
 
 if __name__ == "__main__":
+    # Apply pending schema migrations (a single query when the schema is current)
+    try:
+        db_config.ensure_schema()
+    except Exception as e:
+        print(f"Database migration failed: {e}")
     app = InventoryManagementSystem()
     app.mainloop()
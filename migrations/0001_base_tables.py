@@ -0,0 +1,105 @@
+"""
+Base tables: users, categories, suppliers, products, orders, order_items.
+Also upgrades databases from before first_name/last_name, products.updated_at
+and products.is_low_stock.
+"""
+from db_config import add_column
+
+
+def upgrade(cursor):
+    cursor.execute("SHOW TABLES LIKE 'users'")
+    if cursor.fetchone() is not None:
+        # Databases from before first_name/last_name store a single full_name
+        cursor.execute("SHOW COLUMNS FROM users LIKE 'full_name'")
+        if cursor.fetchone() is not None:
+            cursor.execute("ALTER TABLE users ADD COLUMN first_name VARCHAR(100) AFTER id")
+            cursor.execute("ALTER TABLE users ADD COLUMN last_name VARCHAR(100) AFTER first_name")
+            # Split full_name into first_name and last_name
+            cursor.execute("UPDATE users SET first_name = SUBSTRING_INDEX(full_name, ' ', 1), last_name = SUBSTRING_INDEX(full_name, ' ', -1) WHERE first_name IS NULL")
+            cursor.execute("ALTER TABLE users MODIFY first_name VARCHAR(100) NOT NULL")
+            cursor.execute("ALTER TABLE users MODIFY last_name VARCHAR(100) NOT NULL")
+            cursor.execute("ALTER TABLE users DROP COLUMN full_name")
+
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS users (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            first_name VARCHAR(100) NOT NULL,
+            last_name VARCHAR(100) NOT NULL,
+            email VARCHAR(100) UNIQUE NOT NULL,
+            password VARCHAR(255) NOT NULL,
+            phone_number VARCHAR(20),
+            user_type ENUM('customer', 'staff', 'admin') NOT NULL,
+            is_approved BOOLEAN DEFAULT FALSE,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """)
+
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS categories (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            name VARCHAR(100) NOT NULL,
+            description TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """)
+
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS suppliers (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            name VARCHAR(100) NOT NULL,
+            contact_person VARCHAR(100),
+            email VARCHAR(100),
+            phone VARCHAR(20),
+            address TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """)
+
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS products (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            name VARCHAR(100) NOT NULL,
+            description TEXT,
+            category_id INT,
+            supplier_id INT,
+            price DECIMAL(10, 2) NOT NULL,
+            quantity INT NOT NULL DEFAULT 0,
+            reorder_level INT DEFAULT 10,
+            image_path VARCHAR(255),
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+            is_low_stock BOOLEAN AS (IFNULL(quantity <= reorder_level, FALSE)) STORED NOT NULL,
+            FOREIGN KEY (category_id) REFERENCES categories(id) ON DELETE SET NULL,
+            FOREIGN KEY (supplier_id) REFERENCES suppliers(id) ON DELETE SET NULL
+        )
+        """)
+
+    # The product search index refreshes by updated_at
+    add_column(cursor, "products", "updated_at", "TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP")
+    # Low-stock flag: quantity <= reorder_level compares two columns, which no index
+    # can serve; a stored generated column can be indexed
+    add_column(cursor, "products", "is_low_stock", "BOOLEAN AS (IFNULL(quantity <= reorder_level, FALSE)) STORED NOT NULL")
+
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS orders (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            customer_id INT NOT NULL,
+            order_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            status ENUM('pending', 'approved','rejected') DEFAULT 'pending',
+            total_amount DECIMAL(10, 2) NOT NULL,
+            shipping_address TEXT,
+            FOREIGN KEY (customer_id) REFERENCES users(id) ON DELETE CASCADE
+        )
+        """)
+
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS order_items (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            order_id INT NOT NULL,
+            product_id INT NOT NULL,
+            quantity INT NOT NULL,
+            price DECIMAL(10, 2) NOT NULL,
+            FOREIGN KEY (order_id) REFERENCES orders(id) ON DELETE CASCADE,
+            FOREIGN KEY (product_id) REFERENCES products(id) ON DELETE CASCADE
+        )
+        """)
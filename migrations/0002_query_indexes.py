@@ -0,0 +1,29 @@
+"""Indexes for the catalog, order board, search index refresh and the hot dashboard queries"""
+from db_config import create_index, drop_index
+
+
+def upgrade(cursor):
+    # Keyset pagination for the staff order board (newest first)
+    create_index(cursor, "orders", "idx_orders_date_id", "order_date, id")
+    # Keyset pagination for the customer catalog (alphabetical)
+    create_index(cursor, "products", "idx_products_name_id", "name, id")
+    # Product search (MATCH ... AGAINST) without scanning every description
+    create_index(cursor, "products", "ft_products_name_description", "name, description", kind="FULLTEXT")
+    # Incremental refresh of the in-memory product search index
+    create_index(cursor, "products", "idx_products_updated_at", "updated_at")
+
+    # Composite indexes for the hot dashboard queries (InnoDB appends the primary
+    # key to every secondary index, so these also serve the (..., id) keysets).
+    # Staff order board filtered by status, newest first
+    create_index(cursor, "orders", "idx_orders_status_date", "status, order_date")
+    # Customer order history, newest first
+    create_index(cursor, "orders", "idx_orders_customer_date", "customer_id, order_date")
+    # Order line lookups by order id, covering so the lines are read from the index alone
+    create_index(cursor, "order_items", "idx_order_items_order_covering", "order_id, product_id, quantity, price")
+    # Low-stock alerts and reports: a range over the flagged rows only, in quantity order
+    create_index(cursor, "products", "idx_products_low_stock", "is_low_stock, quantity")
+    # Admin user list filtered by type and approval, newest first
+    create_index(cursor, "users", "idx_users_type_approved_created", "user_type, is_approved, created_at")
+
+    # Superseded by idx_products_low_stock (the two-column comparison could only scan it)
+    drop_index(cursor, "products", "idx_products_stock")
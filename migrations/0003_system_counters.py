@@ -0,0 +1,82 @@
+"""system_counters: running totals for the dashboards and reports, maintained by triggers"""
+from db_config import create_trigger
+
+
+# system_counters: one row of running totals kept current by triggers, so the
+# dashboards and reports read a single row instead of scanning orders/products.
+# For each source table: counter column -> SQL term for one row (`r` is the
+# row alias, NEW/OLD in triggers). A counter is the sum of its term over all rows.
+SYSTEM_COUNTERS = {
+    "users": {
+        "total_users": lambda r: "1",
+        "total_customers": lambda r: f"IFNULL({r}.user_type = 'customer', 0)",
+        "pending_staff": lambda r: f"IFNULL({r}.user_type = 'staff' AND NOT {r}.is_approved, 0)",
+    },
+    "products": {
+        "total_products": lambda r: "1",
+        "total_stock": lambda r: f"{r}.quantity",
+        "low_stock_count": lambda r: f"{r}.is_low_stock",
+    },
+    "orders": {
+        "total_orders": lambda r: "1",
+        "sales_orders": lambda r: f"IFNULL({r}.status != 'cancelled', 0)",
+        "pending_orders": lambda r: f"IFNULL({r}.status = 'pending', 0)",
+        "processing_orders": lambda r: f"IFNULL({r}.status = 'processing', 0)",
+        "total_revenue": lambda r: f"IF(IFNULL({r}.status != 'cancelled', 0), {r}.total_amount, 0)",
+    },
+}
+
+
+def rebuild_system_counters(cursor, replace=True):
+    """Recompute every counter from the base tables (replace=False only fills a missing row)"""
+    columns = []
+    values = []
+    for table, counters in SYSTEM_COUNTERS.items():
+        for column, term in counters.items():
+            columns.append(column)
+            values.append(f"(SELECT COALESCE(SUM({term(table)}), 0) FROM {table})")
+    verb = "REPLACE" if replace else "INSERT IGNORE"
+    cursor.execute(
+        f"{verb} INTO system_counters (id, {', '.join(columns)}) SELECT 1, {', '.join(values)}"
+    )
+
+
+def upgrade(cursor):
+    columns = ",\n".join(
+        f"            {column} {'DECIMAL(15, 2)' if column == 'total_revenue' else 'BIGINT'} NOT NULL DEFAULT 0"
+        for counters in SYSTEM_COUNTERS.values() for column in counters
+    )
+    cursor.execute(f"""
+        CREATE TABLE IF NOT EXISTS system_counters (
+            id TINYINT PRIMARY KEY,
+{columns}
+        )
+        """)
+    rebuild_system_counters(cursor, replace=False)
+
+    for table, counters in SYSTEM_COUNTERS.items():
+        changes = {
+            "insert": [f"{column} = {column} + ({term('NEW')})" for column, term in counters.items()],
+            "update": [f"{column} = {column} + ({term('NEW')}) - ({term('OLD')})"
+                       for column, term in counters.items() if term('NEW') != "1"],
+            "delete": [f"{column} = {column} - ({term('OLD')})" for column, term in counters.items()],
+        }
+        for event, assignments in changes.items():
+            timing = "BEFORE" if table == "users" and event == "delete" else "AFTER"
+            body = f"UPDATE system_counters SET {', '.join(assignments)} WHERE id = 1"
+            if table == "users" and event == "delete":
+                # Deleting a customer cascades to their orders, and cascaded deletes
+                # do not fire the orders triggers: take their orders off here instead
+                order_terms = SYSTEM_COUNTERS["orders"]
+                body = f"""UPDATE system_counters c, (
+                        SELECT {', '.join(f"COALESCE(SUM({term('orders')}), 0) as {column}" for column, term in order_terms.items())}
+                        FROM orders WHERE customer_id = OLD.id
+                    ) o
+                    SET {', '.join(f"c.{column} = c.{column} - ({term('OLD')})" for column, term in counters.items())},
+                        {', '.join(f"c.{column} = c.{column} - o.{column}" for column in order_terms)}
+                    WHERE c.id = 1"""
+            create_trigger(
+                cursor,
+                f"trg_{table}_{event}_counters",
+                f"{timing} {event.upper()} ON {table} FOR EACH ROW {body}"
+            )
@@ -0,0 +1,131 @@
+"""daily_sales: per-day, per-product sales rollup for the date-range reports, maintained by triggers"""
+from db_config import create_trigger
+
+
+# daily_sales: sales rolled up per day and product, kept current by triggers, so
+# period reports read a few hundred rollup rows instead of scanning order_items.
+# Rows with product_id = DAILY_TOTAL_PRODUCT_ID hold the day's order count and
+# order revenue (an order spans several products, so its count cannot be summed
+# from the product rows); product rows hold the orders, units and line revenue
+# of that product. Only orders that count as sales are rolled up.
+# (db_config.DAILY_TOTAL_PRODUCT_ID, read by the reports, has the same value.)
+DAILY_TOTAL_PRODUCT_ID = 0
+SALE_CONDITION = "{r}.status != 'cancelled'"
+
+
+def _daily_total_upsert(order, sign):
+    """Add (sign "+") or remove ("-") one order's contribution to its day's total row"""
+    return f"""INSERT INTO daily_sales (day, product_id, order_count, revenue, units)
+        VALUES (DATE({order}.order_date), {DAILY_TOTAL_PRODUCT_ID}, {sign}1, {sign}{order}.total_amount, 0)
+        ON DUPLICATE KEY UPDATE order_count = order_count + VALUES(order_count), revenue = revenue + VALUES(revenue)"""
+
+
+def _daily_product_upsert(order, sign):
+    """Add or remove every line of one order in its day's product rows"""
+    return f"""INSERT INTO daily_sales (day, product_id, order_count, revenue, units)
+        SELECT DATE({order}.order_date), oi.product_id, {sign}COUNT(*), {sign}SUM(oi.quantity * oi.price), {sign}SUM(oi.quantity)
+        FROM order_items oi WHERE oi.order_id = {order}.id GROUP BY oi.product_id
+        ON DUPLICATE KEY UPDATE order_count = order_count + VALUES(order_count),
+            revenue = revenue + VALUES(revenue), units = units + VALUES(units)"""
+
+
+def rebuild_daily_sales(cursor):
+    """Recompute the whole rollup from orders and order_items"""
+    cursor.execute("DELETE FROM daily_sales")
+    cursor.execute(f"""
+        INSERT INTO daily_sales (day, product_id, order_count, revenue, units)
+        SELECT DATE(o.order_date), {DAILY_TOTAL_PRODUCT_ID}, COUNT(*), SUM(o.total_amount), 0
+        FROM orders o WHERE {SALE_CONDITION.format(r='o')}
+        GROUP BY DATE(o.order_date)
+        """)
+    cursor.execute(f"""
+        INSERT INTO daily_sales (day, product_id, order_count, revenue, units)
+        SELECT DATE(o.order_date), oi.product_id, COUNT(*), SUM(oi.quantity * oi.price), SUM(oi.quantity)
+        FROM order_items oi JOIN orders o ON oi.order_id = o.id
+        WHERE {SALE_CONDITION.format(r='o')}
+        GROUP BY DATE(o.order_date), oi.product_id
+        """)
+
+
+def upgrade(cursor):
+    cursor.execute("SHOW TABLES LIKE 'daily_sales'")
+    exists = cursor.fetchone() is not None
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS daily_sales (
+            day DATE NOT NULL,
+            product_id INT NOT NULL,
+            order_count BIGINT NOT NULL DEFAULT 0,
+            revenue DECIMAL(15, 2) NOT NULL DEFAULT 0,
+            units BIGINT NOT NULL DEFAULT 0,
+            PRIMARY KEY (day, product_id)
+        )
+        """)
+    if not exists:
+        rebuild_daily_sales(cursor)
+
+    new_sale = SALE_CONDITION.format(r="NEW")
+    old_sale = SALE_CONDITION.format(r="OLD")
+    # Order placed: the day total now, the product rows as its lines arrive
+    create_trigger(
+        cursor,
+        "trg_orders_insert_daily_sales",
+        f"AFTER INSERT ON orders FOR EACH ROW BEGIN IF {new_sale} THEN {_daily_total_upsert('NEW', '+')}; END IF; END"
+    )
+    create_trigger(
+        cursor,
+        "trg_order_items_insert_daily_sales",
+        f"""AFTER INSERT ON order_items FOR EACH ROW
+        INSERT INTO daily_sales (day, product_id, order_count, revenue, units)
+        SELECT DATE(o.order_date), NEW.product_id, 1, NEW.quantity * NEW.price, NEW.quantity
+        FROM orders o WHERE o.id = NEW.order_id AND {SALE_CONDITION.format(r='o')}
+        ON DUPLICATE KEY UPDATE order_count = order_count + VALUES(order_count),
+            revenue = revenue + VALUES(revenue), units = units + VALUES(units)"""
+    )
+    # Status (or date/amount) change: move the whole order out of and back into the rollup
+    create_trigger(
+        cursor,
+        "trg_orders_update_daily_sales",
+        f"""AFTER UPDATE ON orders FOR EACH ROW BEGIN
+        IF NOT (OLD.status <=> NEW.status AND OLD.order_date <=> NEW.order_date
+                AND OLD.total_amount <=> NEW.total_amount) THEN
+            IF {old_sale} THEN
+                {_daily_total_upsert('OLD', '-')};
+                {_daily_product_upsert('OLD', '-')};
+            END IF;
+            IF {new_sale} THEN
+                {_daily_total_upsert('NEW', '+')};
+                {_daily_product_upsert('NEW', '+')};
+            END IF;
+        END IF;
+        END"""
+    )
+    # BEFORE DELETE, while the order's lines still exist (the cascade removes them unseen)
+    create_trigger(
+        cursor,
+        "trg_orders_delete_daily_sales",
+        f"""BEFORE DELETE ON orders FOR EACH ROW BEGIN
+        IF {old_sale} THEN
+            {_daily_total_upsert('OLD', '-')};
+            {_daily_product_upsert('OLD', '-')};
+        END IF;
+        END"""
+    )
+    # Deleting a customer cascades to their orders without firing the orders triggers
+    create_trigger(
+        cursor,
+        "trg_users_delete_daily_sales",
+        f"""BEFORE DELETE ON users FOR EACH ROW BEGIN
+        INSERT INTO daily_sales (day, product_id, order_count, revenue, units)
+        SELECT DATE(o.order_date), {DAILY_TOTAL_PRODUCT_ID}, -COUNT(*), -SUM(o.total_amount), 0
+        FROM orders o WHERE o.customer_id = OLD.id AND {SALE_CONDITION.format(r='o')}
+        GROUP BY DATE(o.order_date)
+        ON DUPLICATE KEY UPDATE order_count = order_count + VALUES(order_count), revenue = revenue + VALUES(revenue);
+        INSERT INTO daily_sales (day, product_id, order_count, revenue, units)
+        SELECT DATE(o.order_date), oi.product_id, -COUNT(*), -SUM(oi.quantity * oi.price), -SUM(oi.quantity)
+        FROM order_items oi JOIN orders o ON oi.order_id = o.id
+        WHERE o.customer_id = OLD.id AND {SALE_CONDITION.format(r='o')}
+        GROUP BY DATE(o.order_date), oi.product_id
+        ON DUPLICATE KEY UPDATE order_count = order_count + VALUES(order_count),
+            revenue = revenue + VALUES(revenue), units = units + VALUES(units);
+        END"""
+    )
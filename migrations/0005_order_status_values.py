@@ -0,0 +1,22 @@
+"""
+Give orders.status one set of values everywhere.
+
+db_config created ENUM('pending', 'approved', 'rejected') while schema.sql
+declared ENUM('pending', 'processing', 'shipped', 'delivered', 'cancelled'),
+so a database's allowed statuses depended on how it was created. The staff
+board approves and rejects orders; the counters, reports and order history
+also know the fulfilment statuses. The union keeps every existing row valid.
+"""
+
+
+STATUS_TYPE = "enum('pending','approved','rejected','processing','shipped','delivered','cancelled')"
+
+
+def upgrade(cursor):
+    cursor.execute("SHOW COLUMNS FROM orders LIKE 'status'")
+    column_type = cursor.fetchone()[1]
+    if isinstance(column_type, bytes):
+        column_type = column_type.decode()
+    # Changing an ENUM other than by appending values copies the table, so skip it when already done
+    if column_type.lower() != STATUS_TYPE:
+        cursor.execute(f"ALTER TABLE orders MODIFY status {STATUS_TYPE} DEFAULT 'pending'")
@@ -0,0 +1,22 @@
+"""stock_reservations: expiring holds on stock for items in customers' carts"""
+from db_config import create_index
+
+
+def upgrade(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS stock_reservations (
+            id BIGINT AUTO_INCREMENT PRIMARY KEY,
+            customer_id INT NOT NULL,
+            product_id INT NOT NULL,
+            quantity INT NOT NULL,
+            expires_at DATETIME NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE KEY uq_reservations_customer_product (customer_id, product_id),
+            FOREIGN KEY (customer_id) REFERENCES users(id) ON DELETE CASCADE,
+            FOREIGN KEY (product_id) REFERENCES products(id) ON DELETE CASCADE
+        )
+        """)
+    # Available-to-sell: SUM(quantity) of a product's unexpired holds, read from the index alone
+    create_index(cursor, "stock_reservations", "idx_reservations_product_expiry", "product_id, expires_at, quantity, customer_id")
+    # The sweeper's DELETE ... WHERE expires_at <= NOW()
+    create_index(cursor, "stock_reservations", "idx_reservations_expiry", "expires_at")
@@ -0,0 +1,8 @@
+"""orders.updated_at: lets the staff order board poll for changed orders"""
+from db_config import add_column, create_index
+
+
+def upgrade(cursor):
+    add_column(cursor, "orders", "updated_at", "TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP")
+    # The order feed's WHERE updated_at >= watermark
+    create_index(cursor, "orders", "idx_orders_updated_at", "updated_at")
@@ -0,0 +1,47 @@
+"""change_log: trigger-fed log of changed rows, polled by the clients to invalidate their caches"""
+from db_config import create_index, create_trigger
+
+
+# change_log: one row per changed row of the tables the clients cache, written
+# by triggers with an ever-increasing version, so every client learns what
+# changed with one range read on the primary key (see change_log.py).
+# Table -> {dependent table: foreign key column} for the rows a delete of it
+# changes through ON DELETE CASCADE / SET NULL, which fire no triggers.
+CHANGE_LOG_TABLES = {
+    "products": {},
+    "orders": {},
+    "users": {"orders": "customer_id"},
+    "suppliers": {"products": "supplier_id"},
+    "categories": {"products": "category_id"},
+}
+
+
+def upgrade(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS change_log (
+            version BIGINT AUTO_INCREMENT PRIMARY KEY,
+            table_name VARCHAR(32) NOT NULL,
+            row_id INT NOT NULL,
+            changed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """)
+    # Pruning old entries: DELETE ... WHERE changed_at < ...
+    create_index(cursor, "change_log", "idx_change_log_changed_at", "changed_at")
+
+    for table, dependents in CHANGE_LOG_TABLES.items():
+        for event, row in (("insert", "NEW"), ("update", "NEW"), ("delete", "OLD")):
+            body = f"INSERT INTO change_log (table_name, row_id) VALUES ('{table}', {row}.id)"
+            timing = "AFTER"
+            if event == "delete" and dependents:
+                # BEFORE DELETE, while the dependent rows still point at this one
+                timing = "BEFORE"
+                body = "BEGIN " + body + "; " + "".join(
+                    f"INSERT INTO change_log (table_name, row_id) "
+                    f"SELECT '{dependent}', id FROM {dependent} WHERE {column} = OLD.id; "
+                    for dependent, column in dependents.items()
+                ) + "END"
+            create_trigger(
+                cursor,
+                f"trg_{table}_{event}_change_log",
+                f"{timing} {event.upper()} ON {table} FOR EACH ROW {body}"
+            )
@@ -0,0 +1,263 @@
+"""
+Order Service
+Shared order data access used by the staff and customer dashboards.
+All functions take an open cursor created with dictionary=True, except
+place_order and set_order_status, which need the connection to own their
+transaction.
+"""
+import stock_reservations
+
+# Maximum number of order ids sent in one IN (...) list
+ITEM_BATCH_SIZE = 1000
+# Maximum number of new orders returned by one poll of the order feed
+FEED_LIMIT = 200
+
+BOARD_QUERY = """
+    SELECT o.*, u.first_name as customer_name, u.email as customer_email
+    FROM orders o
+    JOIN users u ON o.customer_id = u.id
+"""
+
+
+def fetch_order_items(cursor, order_ids):
+    """Fetch the line items of many orders in one round trip per batch, grouped by order id"""
+    order_ids = list(order_ids)
+    items_by_order = {order_id: [] for order_id in order_ids}
+
+    for start in range(0, len(order_ids), ITEM_BATCH_SIZE):
+        batch = order_ids[start:start + ITEM_BATCH_SIZE]
+        placeholders = ", ".join(["%s"] * len(batch))
+        cursor.execute(
+            f"""SELECT oi.*, p.name as product_name
+            FROM order_items oi
+            JOIN products p ON oi.product_id = p.id
+            WHERE oi.order_id IN ({placeholders})
+            ORDER BY oi.order_id, oi.id""",
+            tuple(batch)
+        )
+        for item in cursor.fetchall():
+            items_by_order[item['order_id']].append(item)
+
+    return items_by_order
+
+
+def attach_order_items(cursor, orders):
+    """Set order['items'] on every order using a single batched item query"""
+    items_by_order = fetch_order_items(cursor, [order['id'] for order in orders])
+    for order in orders:
+        order['items'] = items_by_order[order['id']]
+    return orders
+
+
+def fetch_customer_orders(cursor, customer_id, limit, before=None):
+    """Fetch one page of a customer's orders, newest first.
+
+    `before` is the (order_date, id) of the last order already shown; the
+    page continues strictly after it (keyset pagination), so every page costs
+    the same no matter how far back the customer scrolls.
+    Returns (orders, has_more); each order carries its items under 'items'.
+    """
+    query = "SELECT * FROM orders WHERE customer_id = %s"
+    params = [customer_id]
+    if before is not None:
+        query += " AND (order_date < %s OR (order_date = %s AND id < %s))"
+        params.extend([before[0], before[0], before[1]])
+    query += " ORDER BY order_date DESC, id DESC LIMIT %s"
+    # Ask for one extra row to learn whether an older page exists
+    params.append(limit + 1)
+
+    cursor.execute(query, params)
+    orders = cursor.fetchall()
+    has_more = len(orders) > limit
+    orders = orders[:limit]
+
+    attach_order_items(cursor, orders)
+    return orders, has_more
+
+
+def fetch_order_board_page(cursor, status=None, limit=50, before=None):
+    """Fetch one page of the staff order board, newest first.
+
+    Uses keyset pagination on (order_date, id), backed by the
+    idx_orders_date_id index: `before` is the (order_date, id) of the last
+    order already on the board. Returns (orders, has_more); each order
+    carries its items under 'items'.
+    """
+    query = BOARD_QUERY
+    conditions = []
+    params = []
+    if status:
+        conditions.append("o.status = %s")
+        params.append(status)
+    if before is not None:
+        conditions.append("(o.order_date < %s OR (o.order_date = %s AND o.id < %s))")
+        params.extend([before[0], before[0], before[1]])
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+    query += " ORDER BY o.order_date DESC, o.id DESC LIMIT %s"
+    params.append(limit + 1)
+
+    cursor.execute(query, params)
+    orders = cursor.fetchall()
+    has_more = len(orders) > limit
+    orders = orders[:limit]
+
+    attach_order_items(cursor, orders)
+    return orders, has_more
+
+
+def fetch_order_feed_position(cursor):
+    """(newest order id, newest updated_at) to start polling the order feed from"""
+    cursor.execute("SELECT MAX(id) as last_id, MAX(updated_at) as watermark FROM orders")
+    row = cursor.fetchone()
+    return row['last_id'] or 0, row['watermark']
+
+
+def fetch_order_feed(cursor, last_seen_id, watermark, limit=FEED_LIMIT):
+    """Poll for orders placed after `last_seen_id` or changed since `watermark`.
+
+    One query: a primary key range for the new orders (oldest first, at
+    most `limit`) and an idx_orders_updated_at range for the changed ones.
+    >= so changes within the same second as the watermark are not missed;
+    seeing a change twice is harmless. Returns the orders with their
+    items, in board-query form; if `limit` of them are new (id above
+    `last_seen_id`), more may be waiting, so poll again straight away.
+    """
+    query = f"({BOARD_QUERY} WHERE o.id > %s ORDER BY o.id LIMIT %s)"
+    params = [last_seen_id, limit]
+    if watermark is not None:
+        query += f" UNION ALL ({BOARD_QUERY} WHERE o.updated_at >= %s AND o.id <= %s)"
+        params.extend([watermark, last_seen_id])
+    cursor.execute(query, params)
+    return attach_order_items(cursor, cursor.fetchall())
+
+
+def place_order(connection, customer_id, lines, shipping_address):
+    """Check out a cart atomically; returns (order_id, failures).
+
+    `lines` are dicts with 'product_id' and 'quantity'. The products are
+    locked, every line is checked against the stock not held for other
+    customers' carts and only then is stock decremented, all in one
+    transaction, so concurrent buyers can never oversell. The customer's
+    own holds are consumed by the order. The number of round trips is the
+    same for any cart size: one locking read, one read of the holds, one
+    multi-row conditional UPDATE, the order INSERT, one batched INSERT of
+    the order lines and one DELETE of the holds.
+
+    If any line cannot be filled nothing is written and order_id is None;
+    failures lists {'product_id', 'name', 'requested', 'available'} for
+    each such line (available is 0 for a product that no longer exists).
+    Prices are taken from the locked product rows, not from the client.
+    """
+    requested = {}
+    for line in lines:
+        requested[line['product_id']] = requested.get(line['product_id'], 0) + line['quantity']
+    product_ids = sorted(requested)
+    placeholders = ", ".join(["%s"] * len(product_ids))
+
+    cursor = connection.cursor(dictionary=True)
+    try:
+        # Lock in id order so two checkouts sharing products cannot deadlock
+        cursor.execute(
+            f"SELECT id, name, price, quantity FROM products WHERE id IN ({placeholders}) ORDER BY id FOR UPDATE",
+            tuple(product_ids)
+        )
+        products = {row['id']: row for row in cursor.fetchall()}
+
+        # Units other customers have in their carts are not for sale
+        holds_cursor = connection.cursor()
+        held = stock_reservations.held_quantities(holds_cursor, products, exclude_customer_id=customer_id)
+        holds_cursor.close()
+
+        failures = []
+        for product_id in product_ids:
+            product = products.get(product_id)
+            available = product['quantity'] - held.get(product_id, 0) if product else 0
+            if available < requested[product_id]:
+                failures.append({
+                    'product_id': product_id,
+                    'name': product['name'] if product else None,
+                    'requested': requested[product_id],
+                    'available': available,
+                })
+        if failures:
+            connection.rollback()
+            return None, failures
+
+        # One conditional decrement for every line; the quantity guard holds even without the locks
+        line_rows = " UNION ALL ".join(["SELECT %s as id, %s as quantity, %s as held"] * len(product_ids))
+        cursor.execute(
+            f"""UPDATE products p
+            JOIN ({line_rows}) line ON p.id = line.id
+            SET p.quantity = p.quantity - line.quantity
+            WHERE p.quantity - line.held >= line.quantity""",
+            tuple(
+                value for product_id in product_ids
+                for value in (product_id, requested[product_id], held.get(product_id, 0))
+            )
+        )
+        if cursor.rowcount != len(product_ids):
+            raise RuntimeError("Stock changed during checkout; please try again")
+
+        total = sum(products[product_id]['price'] * requested[product_id] for product_id in product_ids)
+        cursor.execute(
+            """INSERT INTO orders (customer_id, total_amount, shipping_address, status)
+            VALUES (%s, %s, %s, 'pending')""",
+            (customer_id, total, shipping_address)
+        )
+        order_id = cursor.lastrowid
+
+        # executemany sends the lines as one multi-row INSERT
+        cursor.executemany(
+            "INSERT INTO order_items (order_id, product_id, quantity, price) VALUES (%s, %s, %s, %s)",
+            [(order_id, product_id, requested[product_id], products[product_id]['price']) for product_id in product_ids]
+        )
+        # The bought units are no longer held, they are gone from stock
+        cursor.execute(
+            f"DELETE FROM stock_reservations WHERE customer_id = %s AND product_id IN ({placeholders})",
+            (customer_id, *product_ids)
+        )
+        connection.commit()
+        return order_id, []
+    except Exception:
+        connection.rollback()
+        raise
+    finally:
+        cursor.close()
+
+
+def set_order_status(connection, order_ids, new_status, from_status='pending'):
+    """Move many orders from `from_status` to `new_status` in one transaction.
+
+    The orders still in `from_status` are locked, then changed with a single
+    UPDATE ... WHERE id IN (...) per ITEM_BATCH_SIZE ids, and committed
+    together. Orders another user has already moved on are left alone.
+    Returns the ids that were changed.
+    """
+    order_ids = sorted(set(order_ids))
+    cursor = connection.cursor()
+    try:
+        changed = []
+        for start in range(0, len(order_ids), ITEM_BATCH_SIZE):
+            batch = order_ids[start:start + ITEM_BATCH_SIZE]
+            placeholders = ", ".join(["%s"] * len(batch))
+            cursor.execute(
+                f"SELECT id FROM orders WHERE id IN ({placeholders}) AND status = %s ORDER BY id FOR UPDATE",
+                (*batch, from_status)
+            )
+            locked = [row[0] for row in cursor.fetchall()]
+            if not locked:
+                continue
+            placeholders = ", ".join(["%s"] * len(locked))
+            cursor.execute(
+                f"UPDATE orders SET status = %s WHERE id IN ({placeholders})",
+                (new_status, *locked)
+            )
+            changed.extend(locked)
+        connection.commit()
+        return changed
+    except Exception:
+        connection.rollback()
+        raise
+    finally:
+        cursor.close()
@@ -0,0 +1,274 @@
+"""
+PDF Reports
+Renders the admin reports (sales summary, top products, inventory with the
+low-stock list, top customers, sales breakdown for a date range and an
+order appendix) to PDF with reportlab's platypus flowables.
+
+Long tables are never built in one piece: rows are fetched in batches and
+turned into page-sized RowBlock chunks that the document pulls in as it
+lays out pages, so a 100k-row appendix renders in bounded memory.
+"""
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.lib.units import cm
+from reportlab.pdfbase.pdfmetrics import stringWidth
+from reportlab.platypus import Flowable, PageBreak, Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+import report_service
+
+# Rows per chunk of a streamed table (about one page)
+ROWS_PER_CHUNK = 40
+# Row height and font size of streamed tables (points)
+ROW_HEIGHT = 14
+ROW_FONT_SIZE = 8
+# Flowables kept queued ahead of the page being laid out
+STORY_LOOKAHEAD = 5
+
+HEADER_STYLE = [
+    ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#366092")),
+    ("TEXTCOLOR", (0, 0), (-1, 0), colors.white),
+    ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
+]
+BODY_STYLE = [
+    ("FONTSIZE", (0, 0), (-1, -1), 9),
+    ("GRID", (0, 0), (-1, -1), 0.25, colors.grey),
+    ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
+]
+
+
+class StreamingStory(list):
+    """A story that pulls flowables from an iterator as the document consumes it.
+
+    reportlab's build() re-checks len(story) before every flowable, so
+    topping the list up there keeps only a few flowables in memory at once.
+    """
+
+    def __init__(self, flowables, lookahead=STORY_LOOKAHEAD):
+        super().__init__()
+        self._source = iter(flowables)
+        self._lookahead = lookahead
+
+    def __len__(self):
+        while list.__len__(self) < self._lookahead:
+            try:
+                self.append(next(self._source))
+            except StopIteration:
+                break
+        return list.__len__(self)
+
+
+def _table(rows, col_widths):
+    """A small platypus table with a styled header row"""
+    table = Table(rows, colWidths=col_widths, repeatRows=1)
+    table.setStyle(TableStyle(BODY_STYLE + HEADER_STYLE))
+    return table
+
+
+class RowBlock(Flowable):
+    """A run of fixed-height table rows drawn straight onto the canvas.
+
+    Much cheaper than a platypus Table for long listings: no cell layout,
+    just strings and grid lines. Splits by whole rows at page ends and
+    repeats the header row on every page.
+    """
+
+    def __init__(self, headers, rows, col_widths):
+        super().__init__()
+        self.headers = headers
+        self.rows = rows
+        self.col_widths = col_widths
+
+    def wrap(self, available_width, available_height):
+        self.width = sum(self.col_widths)
+        self.height = (len(self.rows) + 1) * ROW_HEIGHT
+        return self.width, self.height
+
+    def split(self, available_width, available_height):
+        fits = int(available_height // ROW_HEIGHT) - 1
+        if fits < 1 or fits >= len(self.rows):
+            return []
+        return [
+            RowBlock(self.headers, self.rows[:fits], self.col_widths),
+            RowBlock(self.headers, self.rows[fits:], self.col_widths),
+        ]
+
+    def _draw_rows(self, rows, top, font, color):
+        # One text object for the whole block is far cheaper than drawString per cell
+        text_object = self.canv.beginText()
+        text_object.setFont(font, ROW_FONT_SIZE)
+        text_object.setFillColor(color)
+        for index, values in enumerate(rows, 1):
+            y = top - index * ROW_HEIGHT + 4
+            x = 0
+            for value, width in zip(values, self.col_widths):
+                text = "" if value is None else str(value)
+                # Clip text that would run into the next column (measured only when it might)
+                if len(text) * ROW_FONT_SIZE > width - 6:
+                    while text and stringWidth(text, font, ROW_FONT_SIZE) > width - 6:
+                        text = text[:-2] + "…" if len(text) > 2 else ""
+                text_object.setTextOrigin(x + 3, y)
+                text_object.textOut(text)
+                x += width
+        self.canv.drawText(text_object)
+
+    def draw(self):
+        canvas = self.canv
+        top = self.height
+        canvas.setFillColor(colors.HexColor("#366092"))
+        canvas.rect(0, top - ROW_HEIGHT, self.width, ROW_HEIGHT, stroke=0, fill=1)
+        self._draw_rows([self.headers], top, "Helvetica-Bold", colors.white)
+        self._draw_rows(self.rows, top - ROW_HEIGHT, "Helvetica", colors.black)
+
+        # Grid
+        canvas.setStrokeColor(colors.grey)
+        canvas.setLineWidth(0.25)
+        for index in range(len(self.rows) + 2):
+            canvas.line(0, top - index * ROW_HEIGHT, self.width, top - index * ROW_HEIGHT)
+        x = 0
+        for width in [0] + self.col_widths:
+            x += width
+            canvas.line(x, 0, x, top)
+
+
+def streamed_table(headers, rows, col_widths, on_rows=None):
+    """Yield the rows as RowBlocks of ROWS_PER_CHUNK rows, pulling rows only as needed"""
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= ROWS_PER_CHUNK:
+            yield RowBlock(headers, chunk, col_widths)
+            if on_rows:
+                on_rows(len(chunk))
+            chunk = []
+    if chunk:
+        yield RowBlock(headers, chunk, col_widths)
+        if on_rows:
+            on_rows(len(chunk))
+
+
+def _money(value):
+    return f"${value or 0:,.2f}"
+
+
+def _story(connection, report, start, end, granularity, job):
+    styles = getSampleStyleSheet()
+    heading = styles["Heading2"]
+    body = styles["BodyText"]
+    on_rows = job.add_rows if job is not None else None
+
+    yield Paragraph("Smart Inventory Management System - Reports", styles["Title"])
+    yield Paragraph(
+        f"Generated on {report.generated_at:%Y-%m-%d %H:%M:%S} | Period {start:%Y-%m-%d} to {end:%Y-%m-%d}",
+        body
+    )
+    yield Spacer(1, 0.5 * cm)
+
+    # Sales summary and top products
+    yield Paragraph("Sales Report", heading)
+    yield Paragraph(f"Total Orders: {report.total_orders} | Total Revenue: {_money(report.total_revenue)}", body)
+    yield _table(
+        [["Rank", "Product Name", "Total Sold", "Revenue"]] + [
+            [rank, product.name, product.total_sold, _money(product.revenue)]
+            for rank, product in enumerate(report.top_products, 1)
+        ],
+        [1.5 * cm, 8 * cm, 3 * cm, 4 * cm]
+    )
+    yield Spacer(1, 0.5 * cm)
+
+    # Sales for the chosen period, bucketed by day/week/month
+    cursor = connection.cursor(dictionary=True)
+    sales = report_service.fetch_sales_report(cursor, start, end, granularity)
+    cursor.close()
+    yield Paragraph(f"Sales by {granularity}", heading)
+    yield Paragraph(
+        f"Orders: {sales.order_count} | Revenue: {_money(sales.revenue)} | Units Sold: {sales.units}",
+        body
+    )
+    yield from streamed_table(
+        ["Period", "Orders", "Units", "Revenue"],
+        ([period.period, period.order_count, period.units, _money(period.revenue)] for period in sales.periods),
+        [5 * cm, 3.5 * cm, 3.5 * cm, 5 * cm]
+    )
+    if sales.top_products:
+        yield Spacer(1, 0.3 * cm)
+        yield _table(
+            [["Rank", "Top Products in Period", "Total Sold", "Revenue"]] + [
+                [rank, product.name, product.total_sold, _money(product.revenue)]
+                for rank, product in enumerate(sales.top_products, 1)
+            ],
+            [1.5 * cm, 8 * cm, 3 * cm, 4 * cm]
+        )
+    yield Spacer(1, 0.5 * cm)
+
+    # Customers
+    yield Paragraph("Customer Report", heading)
+    yield Paragraph(f"Total Customers: {report.total_customers}", body)
+    yield _table(
+        [["Rank", "Customer Name", "Email", "Orders", "Total Spent"]] + [
+            [rank, customer.full_name, customer.email, customer.order_count, _money(customer.total_spent)]
+            for rank, customer in enumerate(report.top_customers, 1)
+        ],
+        [1.5 * cm, 4.5 * cm, 6 * cm, 2 * cm, 3 * cm]
+    )
+
+    # Inventory with the full low-stock list
+    yield PageBreak()
+    yield Paragraph("Inventory Report", heading)
+    yield Paragraph(
+        f"Total Products: {report.total_products} | Total Stock Units: {report.total_stock} | "
+        f"Low Stock Items: {report.low_stock_count}",
+        body
+    )
+    yield from streamed_table(
+        ["Product ID", "Product Name", "Quantity", "Reorder Level"],
+        ([item.id, item.name, item.quantity, item.reorder_level]
+         for item in report_service.iter_low_stock_items(connection)),
+        [2.5 * cm, 8 * cm, 3 * cm, 3.5 * cm],
+        on_rows
+    )
+
+    # Appendix: every order in the period
+    yield PageBreak()
+    yield Paragraph("Appendix - Orders", heading)
+    yield from streamed_table(
+        ["Order ID", "Date", "Customer", "Status", "Total"],
+        ([order['id'], f"{order['order_date']:%Y-%m-%d %H:%M}", order['customer_name'],
+          order['status'], _money(order['total_amount'])]
+         for order in report_service.iter_orders(connection, start, end)),
+        [2 * cm, 3.5 * cm, 5.5 * cm, 2.5 * cm, 3.5 * cm],
+        on_rows
+    )
+
+
+def _draw_page_number(canvas, doc):
+    canvas.saveState()
+    canvas.setFont("Helvetica", 8)
+    canvas.drawRightString(A4[0] - 2 * cm, 1.2 * cm, f"Page {doc.page}")
+    canvas.restoreState()
+
+
+def export_pdf_report(connection, filename, start, end, granularity="month", job=None):
+    """Render the reports for orders placed in [start, end) to `filename`"""
+    if job is not None:
+        job.set_stage("Computing reports...")
+    report = report_service.get_report_service().get_report(connection)
+    if job is not None:
+        job.total_rows = report.low_stock_count + report_service.count_orders(connection, start, end)
+        job.set_stage("Rendering PDF...")
+
+    doc = SimpleDocTemplate(
+        filename,
+        pagesize=A4,
+        leftMargin=2 * cm,
+        rightMargin=2 * cm,
+        topMargin=2 * cm,
+        bottomMargin=2 * cm,
+        title="SIMS Reports",
+        pageCompression=1
+    )
+    doc.build(
+        StreamingStory(_story(connection, report, start, end, granularity, job)),
+        onFirstPage=_draw_page_number,
+        onLaterPages=_draw_page_number
+    )
+    return doc.page
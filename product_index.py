@@ -0,0 +1,256 @@
+"""
+Product Search Index
+An in-memory index of the product catalog for search-as-you-type.
+
+Words from each product's name and description go into an inverted index
+(word -> product ids) and a prefix trie, so a query such as "wire mou"
+resolves to the products having a word starting with "wire" and a word
+starting with "mou" without touching MySQL. The products are also kept in
+name order, so results come out sorted without sorting on every keystroke.
+
+The index is loaded once per session and then refreshed incrementally:
+only products whose updated_at moved past the last refresh are re-read.
+The rows are fetched on a database worker and applied on the Tk thread,
+so the index itself needs no locking.
+"""
+import bisect
+import re
+import db_worker
+
+_WORD = re.compile(r"\w+")
+
+
+def tokenize(text):
+    """Split text into lowercase words"""
+    return _WORD.findall(text.lower()) if text else []
+
+
+class _TrieNode:
+    __slots__ = ("children", "is_word")
+
+    def __init__(self):
+        self.children = {}
+        self.is_word = False
+
+
+class ProductIndex:
+    def __init__(self):
+        self.products = {}   # product id -> product row
+        self._postings = {}  # word -> set of product ids
+        self._words = {}     # product id -> words indexed for it
+        self._by_name = []   # (name, product id) of every product, sorted
+        self._trie = _TrieNode()
+        # Newest updated_at seen so far (None while the catalog is empty)
+        self.watermark = None
+        self.is_loaded = False
+        self._refreshing = False
+        self._waiting = []
+
+    # ---------------- Loading ----------------
+    @staticmethod
+    def fetch_changes(connection, since=None, indexed_ids=frozenset()):
+        """Read the products changed since `since` (all of them if None); runs on a worker.
+
+        Returns (rows, product_ids). product_ids is the full id list, only
+        fetched when the row count shows some of `indexed_ids` were deleted.
+        """
+        cursor = connection.cursor(dictionary=True)
+        query = """
+            SELECT p.*, c.name as category_name
+            FROM products p
+            LEFT JOIN categories c ON p.category_id = c.id
+        """
+        params = ()
+        if since is not None:
+            # >= so rows updated within the same second as the watermark are not missed
+            query += " WHERE p.updated_at >= %s"
+            params = (since,)
+        cursor.execute(query, params)
+        rows = cursor.fetchall()
+
+        product_ids = None
+        if indexed_ids:
+            cursor.execute("SELECT COUNT(*) as total FROM products")
+            total = cursor.fetchone()['total']
+            if total != len(indexed_ids | {row['id'] for row in rows}):
+                cursor.execute("SELECT id FROM products")
+                product_ids = [row['id'] for row in cursor.fetchall()]
+        cursor.close()
+        return rows, product_ids
+
+    def apply_changes(self, rows, product_ids=None):
+        """Index the fetched rows and drop products that no longer exist (Tk thread)"""
+        # A large batch (e.g. the first load) is sorted once instead of inserted row by row
+        bulk = len(rows) > len(self._by_name)
+        for row in rows:
+            self._index(row, keep_order=not bulk)
+            if self.watermark is None or row['updated_at'] > self.watermark:
+                self.watermark = row['updated_at']
+        if bulk:
+            self._by_name = sorted((product['name'], product_id) for product_id, product in self.products.items())
+
+        if product_ids is not None:
+            existing = set(product_ids)
+            for product_id in [pid for pid in self.products if pid not in existing]:
+                self.remove(product_id)
+
+        self.is_loaded = True
+
+    def invalidate(self):
+        """Re-read every product on the next refresh (e.g. after categories changed)"""
+        self.watermark = None
+
+    def refresh(self, main_app, on_ready=None):
+        """Load the index, or pull in what changed since the last refresh.
+
+        on_ready() runs on the Tk thread once the index is current. Calls
+        made while a refresh is running wait for that refresh.
+        """
+        if on_ready:
+            self._waiting.append(on_ready)
+        if self._refreshing:
+            return
+        self._refreshing = True
+        since = self.watermark
+        indexed_ids = frozenset(self.products)
+
+        def apply(result):
+            self.apply_changes(*result)
+            done()
+
+        def done(error=None):
+            if error is not None:
+                print(f"Error refreshing product index: {error}")
+            self._refreshing = False
+            waiting, self._waiting = self._waiting, []
+            for callback in waiting:
+                callback()
+
+        db_worker.run_async(main_app, self.fetch_changes, apply, on_error=done, args=(since, indexed_ids))
+
+    # ---------------- Updating ----------------
+    def add(self, product):
+        """Index a product, replacing any previous version of it"""
+        self._index(product)
+
+    def _index(self, product, keep_order=True):
+        product_id = product['id']
+        if product_id in self.products:
+            self.remove(product_id, keep_order)
+
+        words = set(tokenize(product['name'])) | set(tokenize(product['description']))
+        self.products[product_id] = product
+        if keep_order:
+            bisect.insort(self._by_name, (product['name'], product_id))
+        self._words[product_id] = words
+        for word in words:
+            ids = self._postings.get(word)
+            if ids is None:
+                ids = self._postings[word] = set()
+                self._insert_word(word)
+            ids.add(product_id)
+
+    def remove(self, product_id, keep_order=True):
+        product = self.products.pop(product_id, None)
+        if product is not None and keep_order:
+            key = (product['name'], product_id)
+            position = bisect.bisect_left(self._by_name, key)
+            if position < len(self._by_name) and self._by_name[position] == key:
+                del self._by_name[position]
+        for word in self._words.pop(product_id, ()):
+            ids = self._postings.get(word)
+            if ids is None:
+                continue
+            ids.discard(product_id)
+            if not ids:
+                del self._postings[word]
+                self._remove_word(word)
+
+    def _insert_word(self, word):
+        node = self._trie
+        for char in word:
+            node = node.children.setdefault(char, _TrieNode())
+        node.is_word = True
+
+    def _remove_word(self, word):
+        # Unmark the word and prune the branch nodes it leaves empty
+        path = [self._trie]
+        for char in word:
+            node = path[-1].children.get(char)
+            if node is None:
+                return
+            path.append(node)
+        path[-1].is_word = False
+        for depth in range(len(word), 0, -1):
+            node = path[depth]
+            if node.is_word or node.children:
+                break
+            del path[depth - 1].children[word[depth - 1]]
+
+    # ---------------- Searching ----------------
+    def _words_with_prefix(self, prefix):
+        node = self._trie
+        for char in prefix:
+            node = node.children.get(char)
+            if node is None:
+                return []
+
+        words = []
+        stack = [(node, prefix)]
+        while stack:
+            node, word = stack.pop()
+            if node.is_word:
+                words.append(word)
+            for char, child in node.children.items():
+                stack.append((child, word + char))
+        return words
+
+    def _matching_ids(self, prefix):
+        ids = set()
+        for word in self._words_with_prefix(prefix):
+            ids |= self._postings[word]
+        return ids
+
+    def search(self, query="", category=None, in_stock_only=False):
+        """Return the products matching every word of the query as a prefix, sorted by name"""
+        terms = tokenize(query)
+        if terms:
+            # Start from the rarest term so the intersections stay small
+            matches = sorted((self._matching_ids(term) for term in set(terms)), key=len)
+            ids = matches[0]
+            for other in matches[1:]:
+                ids = ids & other
+                if not ids:
+                    break
+        else:
+            ids = None
+
+        products = self.products
+        if ids is None and not category and not in_stock_only:
+            return [products[product_id] for _, product_id in self._by_name]
+        if ids is not None and len(ids) * 8 < len(self._by_name):
+            # A handful of matches: sorting them beats walking the whole catalog
+            ordered = sorted((self.products[product_id]['name'], product_id) for product_id in ids)
+        else:
+            ordered = self._by_name
+        results = []
+        for _, product_id in ordered:
+            if ids is not None and product_id not in ids:
+                continue
+            product = products[product_id]
+            if category and product['category_name'] != category:
+                continue
+            if in_stock_only and product['quantity'] <= 0:
+                continue
+            results.append(product)
+        return results
+
+
+_index = None
+
+def get_product_index():
+    """Return the session-wide product index (Tk thread only)"""
+    global _index
+    if _index is None:
+        _index = ProductIndex()
+    return _index
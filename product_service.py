@@ -0,0 +1,133 @@
+"""
+Product Service
+Shared product catalog queries used by the dashboards.
+All functions take an open cursor created with dictionary=True.
+"""
+import re
+
+# Words shorter than InnoDB's innodb_ft_min_token_size (default 3) are not in
+# the FULLTEXT index, so searches made only of such words fall back to LIKE
+FULLTEXT_MIN_WORD_LENGTH = 3
+
+# Characters with a special meaning in boolean-mode MATCH ... AGAINST
+_BOOLEAN_OPERATORS = re.compile(r'[+\-<>()~*"@]')
+
+
+def build_fulltext_query(search_term):
+    """Turn user input into a boolean-mode query: every word required, prefix matched.
+
+    Returns None when no word is long enough to be in the FULLTEXT index.
+    """
+    words = _BOOLEAN_OPERATORS.sub(" ", search_term).split()
+    words = [word for word in words if len(word) >= FULLTEXT_MIN_WORD_LENGTH]
+    if not words:
+        return None
+    return " ".join(f"+{word}*" for word in words)
+
+
+def search_filter(search_term):
+    """Build the product search condition for `search_term`.
+
+    Returns (condition, params, fulltext_query). fulltext_query is None when
+    the term is too short for the FULLTEXT index and the condition is the
+    LIKE fallback; otherwise it should also be used for relevance ordering.
+    """
+    fulltext_query = build_fulltext_query(search_term)
+    if fulltext_query is None:
+        return (
+            "(p.name LIKE %s OR p.description LIKE %s)",
+            [f"%{search_term}%", f"%{search_term}%"],
+            None
+        )
+    return (
+        "MATCH(p.name, p.description) AGAINST (%s IN BOOLEAN MODE)",
+        [fulltext_query],
+        fulltext_query
+    )
+
+
+def fetch_products(cursor, search_term=""):
+    """Fetch every product for the staff inventory, best matches first when searching"""
+    query = "SELECT p.*, c.name as category_name"
+    params = []
+    conditions = []
+    fulltext_query = None
+
+    if search_term:
+        condition, condition_params, fulltext_query = search_filter(search_term)
+        conditions.append(condition)
+        if fulltext_query is not None:
+            query += ", MATCH(p.name, p.description) AGAINST (%s IN BOOLEAN MODE) as relevance"
+            params.append(fulltext_query)
+        params.extend(condition_params)
+
+    query += """
+        FROM products p
+        LEFT JOIN categories c ON p.category_id = c.id
+    """
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+    query += " ORDER BY relevance DESC, p.name" if fulltext_query is not None else " ORDER BY p.name"
+
+    cursor.execute(query, params)
+    return cursor.fetchall()
+
+
+def fetch_catalog_page(cursor, search_term="", category=None, limit=60, after=None):
+    """Fetch one page of in-stock products for the customer catalog.
+
+    Without a search (or with a LIKE fallback search) products are ordered
+    by name and paged by keyset on idx_products_name_id: `after` is the
+    (name, id) of the last product already shown. A FULLTEXT search is
+    ordered by relevance and `after` is the number of rows already shown.
+    Returns (products, next_after); next_after is None on the last page.
+    """
+    query = "SELECT p.*, c.name as category_name"
+    params = []
+    fulltext_query = None
+    conditions = ["p.quantity > 0"]
+    condition_params = []
+
+    # Add search filter
+    if search_term:
+        condition, search_params, fulltext_query = search_filter(search_term)
+        conditions.append(condition)
+        condition_params.extend(search_params)
+        if fulltext_query is not None:
+            query += ", MATCH(p.name, p.description) AGAINST (%s IN BOOLEAN MODE) as relevance"
+            params.append(fulltext_query)
+
+    # Add category filter
+    if category:
+        conditions.append("c.name = %s")
+        condition_params.append(category)
+
+    if fulltext_query is None and after is not None:
+        conditions.append("(p.name > %s OR (p.name = %s AND p.id > %s))")
+        condition_params.extend([after[0], after[0], after[1]])
+
+    query += """
+        FROM products p
+        LEFT JOIN categories c ON p.category_id = c.id
+        WHERE """ + " AND ".join(conditions)
+    params.extend(condition_params)
+
+    # Ask for one extra row to learn whether another page exists
+    if fulltext_query is not None:
+        offset = after or 0
+        query += " ORDER BY relevance DESC, p.id LIMIT %s OFFSET %s"
+        params.extend([limit + 1, offset])
+    else:
+        query += " ORDER BY p.name, p.id LIMIT %s"
+        params.append(limit + 1)
+
+    cursor.execute(query, params)
+    products = cursor.fetchall()
+    has_more = len(products) > limit
+    products = products[:limit]
+
+    if not has_more or not products:
+        return products, None
+    if fulltext_query is not None:
+        return products, offset + len(products)
+    return products, (products[-1]['name'], products[-1]['id'])
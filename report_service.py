@@ -0,0 +1,376 @@
+"""
+Report Service
+Computes the admin report dataset once and caches it, so the on-screen
+reports and the Excel export share one set of queries.
+
+The summary totals come from the system_counters row; the expensive
+sections (top products, top customers, low-stock list) run in parallel
+on whatever pooled connections are free at that moment (never waiting
+for one, and always leaving one free), the rest on the caller's own
+connection. get_report() is meant to be called from a database worker,
+never from the Tk thread. The change log feed calls invalidate() when
+users, products or orders change, so the next report is recomputed.
+
+Sales figures for a date range (totals, daily/weekly/monthly buckets and
+top products) are read from the daily_sales rollup, which is small and
+indexed by day, so they are cheap enough to query on demand.
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from decimal import Decimal
+from typing import List
+import db_config
+import dashboard_stats
+
+# How long a computed report is reused before it is recomputed (seconds)
+REPORT_TTL_SECONDS = 300
+# Rows in the "top" sections
+TOP_LIMIT = 5
+# Rows per query when streaming long report tables
+STREAM_BATCH_SIZE = 1000
+# Breakdown granularity -> SQL expression labelling a daily_sales row's period
+PERIOD_LABELS = {
+    "day": "DATE_FORMAT(day, '%Y-%m-%d')",
+    "week": "DATE_FORMAT(day, '%x-W%v')",
+    "month": "DATE_FORMAT(day, '%Y-%m')",
+}
+
+
+@dataclass(frozen=True)
+class TopProduct:
+    name: str
+    total_sold: int
+    revenue: Decimal
+
+
+@dataclass(frozen=True)
+class TopCustomer:
+    full_name: str
+    email: str
+    order_count: int
+    total_spent: Decimal
+
+
+@dataclass(frozen=True)
+class LowStockItem:
+    id: int
+    name: str
+    quantity: int
+    reorder_level: int
+
+
+@dataclass(frozen=True)
+class SalesPeriod:
+    period: str
+    order_count: int
+    revenue: Decimal
+    units: int = 0
+
+
+@dataclass(frozen=True)
+class SalesReport:
+    start: date
+    end: date
+    granularity: str
+    order_count: int
+    revenue: Decimal
+    units: int
+    periods: List[SalesPeriod] = field(default_factory=list)
+    top_products: List[TopProduct] = field(default_factory=list)
+
+
+@dataclass(frozen=True)
+class ReportData:
+    generated_at: datetime
+    total_orders: int
+    total_revenue: Decimal
+    total_products: int
+    total_stock: int
+    low_stock_count: int
+    total_customers: int
+    top_products: List[TopProduct] = field(default_factory=list)
+    top_customers: List[TopCustomer] = field(default_factory=list)
+    low_stock_items: List[LowStockItem] = field(default_factory=list)
+
+
+def _day(value):
+    """The date part of a date or datetime bound"""
+    return value.date() if isinstance(value, datetime) else value
+
+
+def _day_range(start, end):
+    """daily_sales condition and params for days in [start, end); either bound may be None"""
+    conditions = []
+    params = []
+    if start is not None:
+        conditions.append("day >= %s")
+        params.append(_day(start))
+    if end is not None:
+        # An end with a time of day after midnight still includes that day's sales
+        partial_day = isinstance(end, datetime) and end.time() != datetime.min.time()
+        conditions.append("day <= %s" if partial_day else "day < %s")
+        params.append(_day(end))
+    return "".join(f" AND {condition}" for condition in conditions), params
+
+
+def fetch_top_products(cursor, limit=TOP_LIMIT):
+    """Best-selling products by units over every order line"""
+    cursor.execute("""
+        SELECT p.name, SUM(oi.quantity) as total_sold, SUM(oi.quantity * oi.price) as revenue
+        FROM order_items oi
+        JOIN products p ON oi.product_id = p.id
+        GROUP BY p.id
+        ORDER BY total_sold DESC
+        LIMIT %s
+    """, (limit,))
+    return [TopProduct(row['name'], int(row['total_sold']), row['revenue']) for row in cursor.fetchall()]
+
+
+def fetch_period_top_products(cursor, start, end, limit=TOP_LIMIT):
+    """Best-selling products by units for days in [start, end).
+
+    Read from the daily_sales rollup, so like the period totals it only
+    counts orders that are not cancelled; products with no such sales are
+    left out.
+    """
+    condition, params = _day_range(start, end)
+    cursor.execute(f"""
+        SELECT p.name, SUM(ds.units) as total_sold, SUM(ds.revenue) as revenue
+        FROM daily_sales ds
+        JOIN products p ON ds.product_id = p.id
+        WHERE ds.product_id != {db_config.DAILY_TOTAL_PRODUCT_ID}{condition}
+        GROUP BY p.id
+        HAVING total_sold > 0
+        ORDER BY total_sold DESC
+        LIMIT %s
+    """, params + [limit])
+    return [TopProduct(row['name'], int(row['total_sold']), row['revenue']) for row in cursor.fetchall()]
+
+
+def fetch_top_customers(cursor, limit=TOP_LIMIT):
+    cursor.execute("""
+        SELECT CONCAT(u.first_name, ' ', u.last_name) as full_name, u.email, COUNT(o.id) as order_count, SUM(o.total_amount) as total_spent
+        FROM users u
+        JOIN orders o ON u.id = o.customer_id
+        WHERE u.user_type = 'customer' AND o.status != 'cancelled'
+        GROUP BY u.id
+        ORDER BY total_spent DESC
+        LIMIT %s
+    """, (limit,))
+    return [
+        TopCustomer(row['full_name'], row['email'], row['order_count'], row['total_spent'])
+        for row in cursor.fetchall()
+    ]
+
+
+def fetch_low_stock_items(cursor):
+    cursor.execute("""
+        SELECT id, name, quantity, reorder_level
+        FROM products
+        WHERE is_low_stock = TRUE
+        ORDER BY quantity ASC
+    """)
+    return [
+        LowStockItem(row['id'], row['name'], row['quantity'], row['reorder_level'])
+        for row in cursor.fetchall()
+    ]
+
+
+def fetch_sales_breakdown(cursor, start, end, granularity="month"):
+    """Orders, revenue and units per day/week/month for days in [start, end)"""
+    label = PERIOD_LABELS[granularity]
+    condition, params = _day_range(start, end)
+    total = db_config.DAILY_TOTAL_PRODUCT_ID
+    cursor.execute(f"""
+        SELECT {label} as period,
+               SUM(IF(product_id = {total}, order_count, 0)) as order_count,
+               SUM(IF(product_id = {total}, revenue, 0)) as revenue,
+               SUM(IF(product_id = {total}, 0, units)) as units
+        FROM daily_sales
+        WHERE 1 = 1{condition}
+        GROUP BY period
+        HAVING order_count > 0
+        ORDER BY period
+    """, params)
+    return [
+        SalesPeriod(row['period'], int(row['order_count']), row['revenue'], int(row['units']))
+        for row in cursor.fetchall()
+    ]
+
+
+def fetch_sales_report(cursor, start, end, granularity="month"):
+    """Totals, period buckets and top products for days in [start, end)"""
+    periods = fetch_sales_breakdown(cursor, start, end, granularity)
+    return SalesReport(
+        start=_day(start),
+        end=_day(end),
+        granularity=granularity,
+        order_count=sum(period.order_count for period in periods),
+        revenue=sum((period.revenue for period in periods), Decimal(0)),
+        units=sum(period.units for period in periods),
+        periods=periods,
+        top_products=fetch_period_top_products(cursor, start, end)
+    )
+
+
+def iter_low_stock_items(connection, batch_size=STREAM_BATCH_SIZE):
+    """Yield every low-stock item, lowest quantity first, fetching batch_size rows at a time"""
+    cursor = connection.cursor(dictionary=True)
+    after = None
+    try:
+        while True:
+            query = "SELECT id, name, quantity, reorder_level FROM products WHERE is_low_stock = TRUE"
+            params = []
+            if after is not None:
+                query += " AND (quantity > %s OR (quantity = %s AND id > %s))"
+                params.extend([after[0], after[0], after[1]])
+            query += " ORDER BY quantity, id LIMIT %s"
+            params.append(batch_size)
+            cursor.execute(query, params)
+            rows = cursor.fetchall()
+            for row in rows:
+                yield LowStockItem(row['id'], row['name'], row['quantity'], row['reorder_level'])
+            if len(rows) < batch_size:
+                return
+            after = (rows[-1]['quantity'], rows[-1]['id'])
+    finally:
+        cursor.close()
+
+
+def iter_orders(connection, start, end, batch_size=STREAM_BATCH_SIZE):
+    """Yield the orders placed in [start, end), oldest first, batch_size rows at a time"""
+    cursor = connection.cursor(dictionary=True)
+    after = None
+    try:
+        while True:
+            query = """
+                SELECT o.id, o.order_date, o.status, o.total_amount,
+                       CONCAT(u.first_name, ' ', u.last_name) as customer_name
+                FROM orders o
+                JOIN users u ON o.customer_id = u.id
+                WHERE o.order_date >= %s AND o.order_date < %s
+            """
+            params = [start, end]
+            if after is not None:
+                query += " AND (o.order_date > %s OR (o.order_date = %s AND o.id > %s))"
+                params.extend([after[0], after[0], after[1]])
+            query += " ORDER BY o.order_date, o.id LIMIT %s"
+            params.append(batch_size)
+            cursor.execute(query, params)
+            rows = cursor.fetchall()
+            yield from rows
+            if len(rows) < batch_size:
+                return
+            after = (rows[-1]['order_date'], rows[-1]['id'])
+    finally:
+        cursor.close()
+
+
+def count_orders(connection, start, end):
+    cursor = connection.cursor()
+    cursor.execute("SELECT COUNT(*) FROM orders WHERE order_date >= %s AND order_date < %s", (start, end))
+    total = cursor.fetchone()[0]
+    cursor.close()
+    return total
+
+
+def _run_section(fetch, connection):
+    """Run one report section on a connection of its own"""
+    cursor = connection.cursor(dictionary=True)
+    try:
+        return fetch(cursor)
+    finally:
+        cursor.close()
+
+
+class ReportService:
+    def __init__(self, ttl=REPORT_TTL_SECONDS):
+        self.ttl = ttl
+        self._report = None
+        self._computed_at = 0.0
+        # Held while computing, so concurrent callers wait for one computation
+        self._lock = threading.Lock()
+        # Guards the cached report; never held for long, so invalidate() does not wait for a computation
+        self._state_lock = threading.Lock()
+        # Bumped by invalidate() so a report computed from data read before a write is not cached
+        self._generation = 0
+        self._sections = ThreadPoolExecutor(max_workers=3, thread_name_prefix="report-section")
+
+    def cached(self):
+        """Return the cached report if it is still fresh, else None"""
+        with self._state_lock:
+            if self._report is not None and time.monotonic() - self._computed_at < self.ttl:
+                return self._report
+            return None
+
+    def get_report(self, connection, refresh=False):
+        """Return the report, computing it unless a fresh one is cached (worker thread)"""
+        with self._lock:
+            if not refresh:
+                report = self.cached()
+                if report is not None:
+                    return report
+            with self._state_lock:
+                generation = self._generation
+
+            sections = [fetch_top_products, fetch_top_customers, fetch_low_stock_items]
+            # Only connections that are free right now; a busy pool means running serially
+            with db_config.borrow_spare_connections(len(sections)) as spare:
+                # Start the sections that got a connection first, run the rest and the counters meanwhile
+                futures = [
+                    self._sections.submit(_run_section, fetch, section_connection)
+                    for fetch, section_connection in zip(sections, spare)
+                ]
+                try:
+                    results = [_run_section(fetch, connection) for fetch in sections[len(spare):]]
+                    counters = dashboard_stats.get_stats(connection)
+                finally:
+                    # The spare connections go back to the pool on leaving the block; never while in use
+                    wait(futures)
+                results = [future.result() for future in futures] + results
+            top_products, top_customers, low_stock_items = results
+
+            report = ReportData(
+                generated_at=datetime.now(),
+                total_orders=counters['sales_orders'],
+                total_revenue=counters['total_revenue'],
+                total_products=counters['total_products'],
+                total_stock=counters['total_stock'],
+                low_stock_count=counters['low_stock_count'],
+                total_customers=counters['total_customers'],
+                top_products=top_products,
+                top_customers=top_customers,
+                low_stock_items=low_stock_items
+            )
+            with self._state_lock:
+                if generation == self._generation:
+                    self._report = report
+                    self._computed_at = time.monotonic()
+            return report
+
+    def invalidate(self):
+        with self._state_lock:
+            self._generation += 1
+            self._report = None
+
+
+_service = None
+_service_lock = threading.Lock()
+
+def get_report_service():
+    """Return the process-wide report service"""
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = ReportService()
+        return _service
+
+def invalidate():
+    """Drop the cached report, if one was ever computed; call after a write that changes it"""
+    with _service_lock:
+        service = _service
+    if service is not None:
+        service.invalidate()
@@ -4,6 +4,8 @@
 -- This file contains all table definitions for the system
 -- Run this script to understand the database structure
 -- To create database: Run db.py (which uses db_config.py)
+-- The schema itself is defined by the versioned migrations in
+-- migrations/ (applied by db_config.migrate); keep this file in step
 -- =====================================================
 
 -- Create Database
@@ -67,6 +69,8 @@ CREATE TABLE IF NOT EXISTS products (
     reorder_level INT DEFAULT 10,
     image_path VARCHAR(255),
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    is_low_stock BOOLEAN AS (IFNULL(quantity <= reorder_level, FALSE)) STORED NOT NULL,
     FOREIGN KEY (category_id) REFERENCES categories(id) ON DELETE SET NULL,
     FOREIGN KEY (supplier_id) REFERENCES suppliers(id) ON DELETE SET NULL
 );
@@ -80,9 +84,10 @@ CREATE TABLE IF NOT EXISTS orders (
     id INT AUTO_INCREMENT PRIMARY KEY,
     customer_id INT NOT NULL,
     order_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    status ENUM('pending', 'processing', 'shipped', 'delivered', 'cancelled') DEFAULT 'pending',
+    status ENUM('pending', 'approved', 'rejected', 'processing', 'shipped', 'delivered', 'cancelled') DEFAULT 'pending',
     total_amount DECIMAL(10, 2) NOT NULL,
     shipping_address TEXT,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
     FOREIGN KEY (customer_id) REFERENCES users(id) ON DELETE CASCADE
 );
 
@@ -101,6 +106,90 @@ CREATE TABLE IF NOT EXISTS order_items (
     FOREIGN KEY (product_id) REFERENCES products(id) ON DELETE CASCADE
 );
 
+-- =====================================================
+-- TABLE: system_counters
+-- Description: Single row (id = 1) of running totals for the dashboards
+--              and reports. Kept current by the trg_*_counters triggers on
+--              users, products and orders, which db_config.create_database
+--              creates and seeds from the base tables.
+-- Dependencies: users, products, orders
+-- =====================================================
+CREATE TABLE IF NOT EXISTS system_counters (
+    id TINYINT PRIMARY KEY,
+    total_users BIGINT NOT NULL DEFAULT 0,
+    total_customers BIGINT NOT NULL DEFAULT 0,
+    pending_staff BIGINT NOT NULL DEFAULT 0,
+    total_products BIGINT NOT NULL DEFAULT 0,
+    total_stock BIGINT NOT NULL DEFAULT 0,
+    low_stock_count BIGINT NOT NULL DEFAULT 0,
+    total_orders BIGINT NOT NULL DEFAULT 0,
+    sales_orders BIGINT NOT NULL DEFAULT 0,
+    pending_orders BIGINT NOT NULL DEFAULT 0,
+    processing_orders BIGINT NOT NULL DEFAULT 0,
+    total_revenue DECIMAL(15, 2) NOT NULL DEFAULT 0
+);
+
+-- =====================================================
+-- TABLE: daily_sales
+-- Description: Sales rolled up per day and product for the date-range
+--              reports. Rows with product_id = 0 hold the day's order
+--              count and order revenue; product rows hold orders, units
+--              and line revenue. Kept current by the trg_*_daily_sales
+--              triggers, which db_config.create_database creates.
+-- Dependencies: orders, order_items
+-- =====================================================
+CREATE TABLE IF NOT EXISTS daily_sales (
+    day DATE NOT NULL,
+    product_id INT NOT NULL,
+    order_count BIGINT NOT NULL DEFAULT 0,
+    revenue DECIMAL(15, 2) NOT NULL DEFAULT 0,
+    units BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (day, product_id)
+);
+
+-- =====================================================
+-- TABLE: change_log
+-- Description: One row per changed row of products, orders, users,
+--              suppliers and categories, written by the trg_*_change_log
+--              triggers under an increasing version. Clients poll it
+--              (version > last seen) to refresh what they cache.
+-- =====================================================
+CREATE TABLE IF NOT EXISTS change_log (
+    version BIGINT AUTO_INCREMENT PRIMARY KEY,
+    table_name VARCHAR(32) NOT NULL,
+    row_id INT NOT NULL,
+    changed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- =====================================================
+-- TABLE: stock_reservations
+-- Description: Expiring holds on stock for items in customers' carts.
+--              Available-to-sell = products.quantity minus the unexpired
+--              holds; expired rows are deleted by a background sweeper.
+-- Dependencies: users, products
+-- =====================================================
+CREATE TABLE IF NOT EXISTS stock_reservations (
+    id BIGINT AUTO_INCREMENT PRIMARY KEY,
+    customer_id INT NOT NULL,
+    product_id INT NOT NULL,
+    quantity INT NOT NULL,
+    expires_at DATETIME NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE KEY uq_reservations_customer_product (customer_id, product_id),
+    FOREIGN KEY (customer_id) REFERENCES users(id) ON DELETE CASCADE,
+    FOREIGN KEY (product_id) REFERENCES products(id) ON DELETE CASCADE
+);
+
+-- =====================================================
+-- TABLE: schema_version
+-- Description: Migrations applied to this database (migrations/NNNN_*.py)
+-- =====================================================
+CREATE TABLE IF NOT EXISTS schema_version (
+    version INT PRIMARY KEY,
+    name VARCHAR(100) NOT NULL,
+    applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
 -- =====================================================
 -- INDEXES (for better query performance)
 -- =====================================================
@@ -111,6 +200,27 @@ CREATE INDEX idx_order_customer ON orders(customer_id);
 CREATE INDEX idx_order_status ON orders(status);
 CREATE INDEX idx_order_item_order ON order_items(order_id);
 CREATE INDEX idx_order_item_product ON order_items(product_id);
+-- Keyset pagination for the staff order board: ORDER BY order_date DESC, id DESC
+CREATE INDEX idx_orders_date_id ON orders(order_date, id);
+CREATE INDEX idx_products_name_id ON products(name, id);
+-- Product search: MATCH(name, description) AGAINST (... IN BOOLEAN MODE)
+CREATE FULLTEXT INDEX ft_products_name_description ON products(name, description);
+-- Incremental refresh of the in-memory product search index
+CREATE INDEX idx_products_updated_at ON products(updated_at);
+-- Staff order feed: orders changed since the last poll
+CREATE INDEX idx_orders_updated_at ON orders(updated_at);
+-- Composite indexes for the hot dashboard queries (check with explain_check.py)
+CREATE INDEX idx_orders_status_date ON orders(status, order_date);
+CREATE INDEX idx_orders_customer_date ON orders(customer_id, order_date);
+CREATE INDEX idx_order_items_order_covering ON order_items(order_id, product_id, quantity, price);
+-- Low-stock lists: WHERE is_low_stock ORDER BY quantity
+CREATE INDEX idx_products_low_stock ON products(is_low_stock, quantity);
+-- Available-to-sell (SUM of unexpired holds per product) and the reservation sweeper
+CREATE INDEX idx_reservations_product_expiry ON stock_reservations(product_id, expires_at, quantity, customer_id);
+CREATE INDEX idx_reservations_expiry ON stock_reservations(expires_at);
+CREATE INDEX idx_users_type_approved_created ON users(user_type, is_approved, created_at);
+-- Pruning of old change_log entries
+CREATE INDEX idx_change_log_changed_at ON change_log(changed_at);
 
 -- =====================================================
 -- SAMPLE DATA INSERTS
@@ -2,7 +2,23 @@ import customtkinter as ctk
 from tkinter import messagebox, ttk
 import tkinter as tk
 from mysql.connector import Error
+import change_log
 import db_config
+import db_worker
+import dashboard_stats
+import order_service
+import product_service
+import product_index
+from virtual_list import VirtualList
+
+# Orders fetched per page of the order board
+ORDER_PAGE_SIZE = 50
+# Fixed height of one order card slot on the board (card + spacing)
+ORDER_ROW_HEIGHT = 230
+# Line items listed on a card before collapsing into "+N more"
+ORDER_CARD_MAX_ITEMS = 3
+# Pause after the last keystroke before searching as you type (milliseconds)
+SEARCH_DEBOUNCE_MS = 150
 
 class StaffDashboard:
     def __init__(self, parent, main_app):
@@ -23,8 +39,21 @@ class StaffDashboard:
         self.content_frame = ctk.CTkFrame(self.container)
         self.content_frame.pack(fill="both", expand=True, padx=10, pady=10)
         
+        # Order board state (the board exists only while Manage Orders is shown)
+        self.order_board = None
+        self.selected_orders = set()
+        # (last seen order id, newest updated_at) of the order feed; None until the first poll
+        self.order_feed_position = None
+        
         # Show dashboard by default
         self.show_dashboard()
+        
+        # Keep the order board, the pending badge and the inventory current with other clients' changes
+        change_feed = change_log.get_change_feed()
+        change_feed.subscribe(("orders",), lambda changes: self.poll_orders(), self.container)
+        change_feed.subscribe(("products", "categories"), self.on_products_changed, self.container)
+        change_feed.start(main_app)
+        self.poll_orders()
     
     def create_header(self):
         header_frame = ctk.CTkFrame(self.container, height=60)
@@ -64,14 +93,14 @@ class StaffDashboard:
         )
         dashboard_btn.pack(side="left", padx=10)
         
-        orders_btn = ctk.CTkButton(
+        self.orders_btn = ctk.CTkButton(
             nav_frame,
             text="Manage Orders",
             font=ctk.CTkFont(size=14),
-            width=120,
+            width=150,
             command=self.show_orders
         )
-        orders_btn.pack(side="left", padx=10)
+        self.orders_btn.pack(side="left", padx=10)
         
         inventory_btn = ctk.CTkButton(
             nav_frame,
@@ -95,6 +124,22 @@ class StaffDashboard:
         for widget in self.content_frame.winfo_children():
             widget.destroy()
     
+    def run_query(self, func, on_success, error_message, widget=None, tag=None):
+        """Run func(connection) on the background worker and pass its result to on_success"""
+        db_worker.run_async(
+            self.main_app,
+            func,
+            on_success,
+            on_error=lambda e: messagebox.showerror("Error", f"{error_message}: {e}"),
+            widget=widget,
+            tag=tag
+        )
+    
+    def create_loading_label(self, parent):
+        label = ctk.CTkLabel(parent, text="Loading...", font=ctk.CTkFont(size=14), text_color="gray")
+        label.pack(pady=20)
+        return label
+    
     def show_dashboard(self):
         self.clear_content()
         
@@ -110,38 +155,27 @@ class StaffDashboard:
         stats_frame = ctk.CTkFrame(self.content_frame)
         stats_frame.pack(fill="x", padx=20, pady=20)
         
-        try:
-            connection = db_config.create_connection()
-            if connection:
-                cursor = connection.cursor()
-                
-                # Get pending orders count
-                cursor.execute("SELECT COUNT(*) FROM orders WHERE status = 'pending'")
-                pending_orders = cursor.fetchone()[0]
-                
-                # Get low stock products count
-                cursor.execute("SELECT COUNT(*) FROM products WHERE quantity <= reorder_level")
-                low_stock = cursor.fetchone()[0]
-                
-                # Get total products
-                cursor.execute("SELECT COUNT(*) FROM products")
-                total_products = cursor.fetchone()[0]
-                
-                # Get processing orders
-                cursor.execute("SELECT COUNT(*) FROM orders WHERE status = 'processing'")
-                processing_orders = cursor.fetchone()[0]
-                
-                cursor.close()
-                connection.close()
-                
-                # Display stats
-                self.create_stat_card(stats_frame, "Pending Orders", pending_orders, "orange").pack(side="left", padx=20, pady=20, expand=True)
-                self.create_stat_card(stats_frame, "Processing Orders", processing_orders, "blue").pack(side="left", padx=20, pady=20, expand=True)
-                self.create_stat_card(stats_frame, "Low Stock Items", low_stock, "red").pack(side="left", padx=20, pady=20, expand=True)
-                self.create_stat_card(stats_frame, "Total Products", total_products, "green").pack(side="left", padx=20, pady=20, expand=True)
-                
-        except Error as e:
-            messagebox.showerror("Error", f"Failed to load dashboard: {e}")
+        loading_label = self.create_loading_label(stats_frame)
+        
+        def render_stats(stats):
+            pending_orders = stats['pending_orders']
+            processing_orders = stats['processing_orders']
+            low_stock = stats['low_stock_count']
+            total_products = stats['total_products']
+            loading_label.destroy()
+            
+            # Display stats
+            self.create_stat_card(stats_frame, "Pending Orders", pending_orders, "orange").pack(side="left", padx=20, pady=20, expand=True)
+            self.create_stat_card(stats_frame, "Processing Orders", processing_orders, "blue").pack(side="left", padx=20, pady=20, expand=True)
+            self.create_stat_card(stats_frame, "Low Stock Items", low_stock, "red").pack(side="left", padx=20, pady=20, expand=True)
+            self.create_stat_card(stats_frame, "Total Products", total_products, "green").pack(side="left", padx=20, pady=20, expand=True)
+        
+        # All counters come from one cached snapshot; only go to MySQL when it has expired
+        stats = dashboard_stats.cached_stats()
+        if stats is not None:
+            render_stats(stats)
+        else:
+            self.run_query(dashboard_stats.get_stats, render_stats, "Failed to load dashboard", widget=stats_frame)
         
         # Quick actions
         actions_frame = ctk.CTkFrame(self.content_frame)
@@ -227,214 +261,292 @@ class StaffDashboard:
         )
         status_menu.pack(side="left", padx=10)
         
-        # Orders frame with scrollbar
-        orders_container = ctk.CTkFrame(self.content_frame)
-        orders_container.pack(fill="both", expand=True, padx=20, pady=10)
+        # Bulk actions on the selected pending orders
+        self.selected_orders = set()
+        self.orders_updating = False
         
-        # Create canvas and scrollbar
-        canvas = tk.Canvas(orders_container, bg=self.content_frame.cget("fg_color")[1])
-        scrollbar = ctk.CTkScrollbar(orders_container, command=canvas.yview)
-        self.orders_frame = ctk.CTkFrame(canvas)
-        
-        # Store references
-        self.orders_canvas = canvas
-        self.orders_container = orders_container
-        
-        def update_scrollregion(event=None):
-            canvas.configure(scrollregion=canvas.bbox("all"))
+        ctk.CTkButton(
+            filter_frame,
+            text="✗ Reject Selected",
+            width=140,
+            fg_color="red",
+            hover_color="darkred",
+            font=ctk.CTkFont(size=12),
+            command=lambda: self.update_order_status(self.selected_orders, 'rejected')
+        ).pack(side="right", padx=10)
         
-        def update_canvas_width(event=None):
-            canvas_width = canvas.winfo_width()
-            if canvas_width > 1:
-                canvas_items = canvas.find_all()
-                if canvas_items:
-                    canvas.itemconfig(canvas_items[0], width=canvas_width)
+        ctk.CTkButton(
+            filter_frame,
+            text="✓ Approve Selected",
+            width=150,
+            fg_color="green",
+            hover_color="darkgreen",
+            font=ctk.CTkFont(size=12),
+            command=lambda: self.update_order_status(self.selected_orders, 'approved')
+        ).pack(side="right", padx=10)
         
-        self.orders_frame.bind("<Configure>", update_scrollregion)
+        ctk.CTkButton(
+            filter_frame,
+            text="Clear",
+            width=70,
+            font=ctk.CTkFont(size=12),
+            command=self.clear_order_selection
+        ).pack(side="right", padx=5)
         
-        canvas_window = canvas.create_window((0, 0), window=self.orders_frame, anchor="nw")
-        canvas.configure(yscrollcommand=scrollbar.set)
+        ctk.CTkButton(
+            filter_frame,
+            text="Select All Pending",
+            width=140,
+            font=ctk.CTkFont(size=12),
+            command=self.select_all_pending
+        ).pack(side="right", padx=5)
         
-        canvas.pack(side="left", fill="both", expand=True)
-        scrollbar.pack(side="right", fill="y")
+        self.selection_label = ctk.CTkLabel(filter_frame, text="", font=ctk.CTkFont(size=12), text_color="gray")
+        self.selection_label.pack(side="right", padx=10)
         
-        # Update canvas window width on resize
-        canvas.bind("<Configure>", update_canvas_width)
+        # Virtualized order board: only the cards near the viewport exist as widgets
+        self.order_board = VirtualList(
+            self.content_frame,
+            row_height=ORDER_ROW_HEIGHT,
+            create_row=lambda parent: OrderCard(parent, self),
+            bind_row=lambda card, order: card.show(order),
+            on_near_end=self.load_more_orders,
+            bg=self.content_frame.cget("fg_color")[1],
+            key=lambda order: order['id']
+        )
+        self.order_board.pack(fill="both", expand=True, padx=20, pady=10)
         
         self.load_orders()
     
     def load_orders(self):
-        # Clear orders frame
-        for widget in self.orders_frame.winfo_children():
-            widget.destroy()
-        
-        try:
-            connection = db_config.create_connection()
-            if connection:
-                cursor = connection.cursor(dictionary=True)
-                
-                # Build query
-                query = """
-                    SELECT o.*, u.first_name as customer_name, u.email as customer_email
-                    FROM orders o
-                    JOIN users u ON o.customer_id = u.id
-                """
-                
-                status_filter = self.order_status_var.get()
-                if status_filter != "All":
-                    query += " WHERE o.status = %s"
-                    cursor.execute(query + " ORDER BY o.order_date DESC", (status_filter,))
-                else:
-                    cursor.execute(query + " ORDER BY o.order_date DESC")
-                
-                orders = cursor.fetchall()
-                
-                if not orders:
-                    no_orders_label = ctk.CTkLabel(
-                        self.orders_frame,
-                        text="No orders found",
-                        font=ctk.CTkFont(size=16)
-                    )
-                    no_orders_label.pack(pady=50)
-                else:
-                    for order in orders:
-                        self.create_order_card(order, cursor)
-                
-                cursor.close()
-                connection.close()
-                
-        except Error as e:
-            messagebox.showerror("Error", f"Failed to load orders: {e}")
+        """Reload the order board from the newest order"""
+        self.order_board.set_items([])
+        self.order_board.set_message("Loading...")
+        self.selected_orders.clear()
+        self.update_selection_label()
+        
+        # Keyset of the oldest order on the board; None means start from the newest
+        self.orders_before = None
+        self.orders_has_more = True
+        self.orders_loading = False
+        self.load_more_orders()
     
-    def create_order_card(self, order, cursor):
-        card = ctk.CTkFrame(self.orders_frame)
-        card.pack(fill="x", padx=20, pady=10)
-        
-        # Header - use grid for better alignment
-        header_frame = ctk.CTkFrame(card, fg_color="transparent")
-        header_frame.pack(fill="x", padx=15, pady=(15, 5))
-        
-        # Order ID and Customer on left
-        left_header = ctk.CTkFrame(header_frame, fg_color="transparent")
-        left_header.pack(side="left", fill="x", expand=True)
-        
-        ctk.CTkLabel(
-            left_header,
-            text=f"Order #{order['id']}",
-            font=ctk.CTkFont(size=16, weight="bold")
-        ).pack(side="left", padx=(0, 20))
-        
-        ctk.CTkLabel(
-            left_header,
-            text=f"Customer: {order['customer_name']}",
-            font=ctk.CTkFont(size=12)
-        ).pack(side="left", padx=(0, 15))
-        
-        ctk.CTkLabel(
-            left_header,
-            text=f"Date: {order['order_date'].strftime('%Y-%m-%d %H:%M')}",
-            font=ctk.CTkFont(size=12),
-            text_color="gray"
-        ).pack(side="left")
+    def load_more_orders(self):
+        """Fetch the next page of older orders and append it to the board"""
+        if self.orders_loading or not self.orders_has_more:
+            return
+        self.orders_loading = True
+        
+        status_filter = self.order_status_var.get()
+        status = None if status_filter == "All" else status_filter
+        before = self.orders_before
+        
+        def fetch_orders(connection):
+            cursor = connection.cursor(dictionary=True)
+            page = order_service.fetch_order_board_page(cursor, status, ORDER_PAGE_SIZE, before)
+            cursor.close()
+            return page
+        
+        def render_orders(page):
+            orders, has_more = page
+            self.orders_loading = False
+            self.orders_has_more = has_more
+            if orders:
+                self.orders_before = (orders[-1]['order_date'], orders[-1]['id'])
+            
+            self.order_board.append_items(orders)
+            self.order_board.set_message("" if self.order_board.items else "No orders found")
         
-        # Total on right
-        ctk.CTkLabel(
-            header_frame,
-            text=f"${order['total_amount']:.2f}",
-            font=ctk.CTkFont(size=18, weight="bold"),
-            text_color="green"
-        ).pack(side="right", padx=10)
+        def show_error(e):
+            self.orders_loading = False
+            self.order_board.set_message("")
+            messagebox.showerror("Error", f"Failed to load orders: {e}")
         
-        # Get order items
-        cursor.execute(
-            """SELECT oi.*, p.name as product_name
-            FROM order_items oi
-            JOIN products p ON oi.product_id = p.id
-            WHERE oi.order_id = %s""",
-            (order['id'],)
+        db_worker.run_async(
+            self.main_app,
+            fetch_orders,
+            render_orders,
+            on_error=show_error,
+            widget=self.order_board,
+            tag="staff.orders"
         )
-        items = cursor.fetchall()
-        
-        # Items section
-        items_frame = ctk.CTkFrame(card, fg_color="transparent")
-        items_frame.pack(fill="x", padx=15, pady=(5, 10))
-        
-        for item in items:
-            item_text = f"• {item['product_name']} x {item['quantity']} - ${item['price'] * item['quantity']:.2f}"
-            ctk.CTkLabel(
-                items_frame,
-                text=item_text,
-                font=ctk.CTkFont(size=12),
-                anchor="w"
-            ).pack(anchor="w", padx=5, pady=2)
-        
     
-        
-        # Actions - use grid for better alignment
-        actions_frame = ctk.CTkFrame(card, fg_color="transparent")
-        actions_frame.pack(fill="x", padx=15, pady=(5, 15))
-        
-        # Left side - Status
-        status_colors = {
-            'pending': 'orange',
-            'approved': 'green',
-            'rejected': 'red',
-        }
-        
-        status_color = status_colors.get(order['status'], 'gray')
-        status_label = ctk.CTkLabel(
-            actions_frame,
-            text=f"Status: {order['status'].upper()}",
-            font=ctk.CTkFont(size=13, weight="bold"),
-            text_color=status_color
+    def poll_orders(self):
+        """Fetch orders placed or changed since the last poll and merge them into the board (run on change log news)"""
+        if not self.container.winfo_exists():
+            return
+        position = self.order_feed_position
+        
+        def fetch_feed(connection):
+            cursor = connection.cursor(dictionary=True)
+            if position is None:
+                orders = []
+                new_position = order_service.fetch_order_feed_position(cursor)
+            else:
+                orders = order_service.fetch_order_feed(cursor, *position)
+                new_position = None
+            cursor.close()
+            stats = dashboard_stats.get_stats(connection)
+            return orders, new_position, stats['pending_orders']
+        
+        def apply_feed(result):
+            orders, new_position, pending_count = result
+            # A full page of new orders: more may be waiting behind it
+            more_waiting = position is not None and sum(
+                order['id'] > position[0] for order in orders) >= order_service.FEED_LIMIT
+            if new_position is not None:
+                self.order_feed_position = new_position
+            elif orders:
+                last_id, watermark = self.order_feed_position
+                for order in orders:
+                    last_id = max(last_id, order['id'])
+                    if watermark is None or order['updated_at'] > watermark:
+                        watermark = order['updated_at']
+                self.order_feed_position = (last_id, watermark)
+            
+            if orders and self.order_board is not None and self.order_board.winfo_exists():
+                self.merge_order_feed(orders)
+            self.orders_btn.configure(text=f"Manage Orders ({pending_count})" if pending_count else "Manage Orders")
+            if more_waiting:
+                self.poll_orders()
+        
+        db_worker.run_async(
+            self.main_app,
+            fetch_feed,
+            apply_feed,
+            on_error=lambda e: print(f"Error polling orders: {e}"),
+            widget=self.container,
+            tag="staff.order_feed"
         )
-        status_label.pack(side="left", padx=5)
-        
-        # Right side - Action buttons (only show for pending orders)
-        if order['status'] == 'pending':
-            button_frame = ctk.CTkFrame(actions_frame, fg_color="transparent")
-            button_frame.pack(side="right", padx=10)
+    
+    def merge_order_feed(self, orders):
+        """Patch changed cards, drop the ones leaving the filter and insert new matches in date order"""
+        board = self.order_board
+        status_filter = self.order_status_var.get()
+        dropped = []
+        selected_count = len(self.selected_orders)
+        for order in orders:
+            if order['status'] != 'pending':
+                self.selected_orders.discard(order['id'])
+            matches = status_filter in ("All", order['status'])
+            current = board.get_item(order['id'])
+            if current is not None:
+                if not matches:
+                    dropped.append(order['id'])
+                    continue
+                current.update(order)
+                card = board.row_for(order['id'])
+                if card is not None:
+                    card.show_status(current)
+            elif matches and self.order_in_loaded_range(order):
+                board.insert_item(self.order_board_position(order), order)
+        board.remove_items(dropped)
+        
+        if not self.orders_loading:
+            board.set_message("" if board.items else "No orders found")
+        if len(self.selected_orders) != selected_count:
+            self.update_selection_label()
+    
+    def order_in_loaded_range(self, order):
+        """Whether the order sorts among the pages already loaded (older ones arrive with the next page)"""
+        if not self.orders_has_more:
+            return True
+        return self.orders_before is not None and (order['order_date'], order['id']) > self.orders_before
+    
+    def order_board_position(self, order):
+        """Index keeping the board sorted by (order_date, id), newest first; new orders land at the top"""
+        key = (order['order_date'], order['id'])
+        for index, item in enumerate(self.order_board.items):
+            if (item['order_date'], item['id']) < key:
+                return index
+        return len(self.order_board.items)
+    
+    def toggle_order_selection(self, order_id, selected):
+        if selected:
+            self.selected_orders.add(order_id)
+        else:
+            self.selected_orders.discard(order_id)
+        self.update_selection_label()
+    
+    def select_all_pending(self):
+        """Select every pending order loaded on the board"""
+        self.selected_orders.update(order['id'] for order in self.order_board.items if order['status'] == 'pending')
+        for card, order in self.order_board.visible_rows():
+            card.show_status(order)
+        self.update_selection_label()
+    
+    def clear_order_selection(self):
+        self.selected_orders.clear()
+        for card, order in self.order_board.visible_rows():
+            card.show_status(order)
+        self.update_selection_label()
+    
+    def update_selection_label(self, text=None):
+        if text is None:
+            count = len(self.selected_orders)
+            text = f"{count} order(s) selected" if count else ""
+        self.selection_label.configure(text=text)
+    
+    def update_order_status(self, order_ids, new_status):
+        """Approve or reject pending orders in one transaction and update their cards in place"""
+        order_ids = list(order_ids)
+        if not order_ids or self.orders_updating:
+            return
+        self.orders_updating = True
+        self.update_selection_label(f"Updating {len(order_ids)} order(s)...")
+        board = self.order_board
+        
+        def save_status(connection):
+            changed = order_service.set_order_status(connection, order_ids, new_status)
+            # Even if the board is gone by the time this lands
+            dashboard_stats.invalidate()
+            return changed
+        
+        # Not gated on the board: the flag must be reset even if the staff member moved on meanwhile
+        def apply_status(changed):
+            self.orders_updating = False
+            changed = set(changed)
+            self.selected_orders.difference_update(order_ids)
+            if not board.winfo_exists():
+                return
             
-            ctk.CTkButton(
-                button_frame,
-                text="✗ Reject Order",
-                width=120,
-                height=32,
-                fg_color="red",
-                hover_color="darkred",
-                font=ctk.CTkFont(size=12),
-                command=lambda oid=order['id']: self.update_order_status(oid, 'rejected')
-            ).pack(side="right", padx=5)
+            # Patch just the affected cards; drop the ones the active filter no longer shows
+            status_filter = self.order_status_var.get()
+            dropped = []
+            for order_id in order_ids:
+                order = self.order_board.get_item(order_id)
+                if order is None:
+                    continue
+                if order_id in changed:
+                    order['status'] = new_status
+                    if status_filter not in ("All", new_status):
+                        dropped.append(order_id)
+                        continue
+                card = self.order_board.row_for(order_id)
+                if card is not None:
+                    card.show_status(order)
+            self.order_board.remove_items(dropped)
+            if not self.order_board.items:
+                self.order_board.set_message("No orders found")
             
-            ctk.CTkButton(
-                button_frame,
-                text="✓ Approve Order",
-                width=130,
-                height=32,
-                fg_color="green",
-                hover_color="darkgreen",
-                font=ctk.CTkFont(size=12),
-                command=lambda oid=order['id']: self.update_order_status(oid, 'approved')
-            ).pack(side="right", padx=5)
-    
-    def update_order_status(self, order_id, new_status):
-        try:
-            connection = db_config.create_connection()
-            if connection:
-                cursor = connection.cursor()
-                cursor.execute(
-                    "UPDATE orders SET status = %s WHERE id = %s",
-                    (new_status, order_id)
-                )
-                connection.commit()
-                cursor.close()
-                connection.close()
-                
-                messagebox.showinfo("Success", f"Order #{order_id} status updated to {new_status}")
-                self.load_orders()
-                
-        except Error as e:
+            skipped = len(order_ids) - len(changed)
+            message = f"{len(changed)} order(s) {new_status}"
+            if skipped:
+                message += f", {skipped} no longer pending"
+            self.update_selection_label(message)
+        
+        def show_error(e):
+            self.orders_updating = False
+            if board.winfo_exists():
+                self.update_selection_label()
             messagebox.showerror("Error", f"Failed to update order status: {e}")
+        
+        db_worker.run_async(
+            self.main_app,
+            save_status,
+            apply_status,
+            on_error=show_error
+        )
     
     def show_inventory(self):
         self.clear_content()
@@ -473,6 +585,9 @@ class StaffDashboard:
         
         self.product_search_entry = ctk.CTkEntry(search_frame, width=300, placeholder_text="Search products...")
         self.product_search_entry.pack(side="left", padx=10)
+        self.product_search_entry.bind("<KeyRelease>", self.schedule_product_search)
+        self.product_search_entry.bind("<Return>", lambda event: self.load_products())
+        self.search_job = None
         
         ctk.CTkButton(search_frame, text="Search", width=100, command=self.load_products).pack(side="left", padx=10)
         
@@ -546,52 +661,83 @@ class StaffDashboard:
         self.load_products()
     
     def load_products(self):
+        # Dialogs refresh the list after saving; skip if the inventory screen is not open
+        if not hasattr(self, 'products_tree') or not self.products_tree.winfo_exists():
+            return
+        
+        # Once the product index is loaded, pull in what changed and search it in memory
+        index = product_index.get_product_index()
+        if index.is_loaded:
+            index.refresh(self.main_app, on_ready=self.search_products)
+            return
+        
         # Clear existing items
         for item in self.products_tree.get_children():
             self.products_tree.delete(item)
+        self.products_tree.insert("", "end", values=("", "Loading..."))
         
-        try:
-            connection = db_config.create_connection()
-            if connection:
-                cursor = connection.cursor(dictionary=True)
-                
-                # Build query
-                query = """
-                    SELECT p.*, c.name as category_name
-                    FROM products p
-                    LEFT JOIN categories c ON p.category_id = c.id
-                """
-                
-                search_term = self.product_search_entry.get().strip()
-                if search_term:
-                    query += " WHERE p.name LIKE %s OR p.description LIKE %s"
-                    cursor.execute(query + " ORDER BY p.name", (f"%{search_term}%", f"%{search_term}%"))
-                else:
-                    cursor.execute(query + " ORDER BY p.name")
-                
-                products = cursor.fetchall()
-                
-                for product in products:
-                    # Highlight low stock items
-                    tag = "low_stock" if product['quantity'] <= product['reorder_level'] else ""
-                    
-                    self.products_tree.insert("", "end", values=(
-                        product['id'],
-                        product['name'],
-                        product['category_name'] or 'N/A',
-                        f"${product['price']:.2f}",
-                        product['quantity'],
-                        product['reorder_level']
-                    ), tags=(tag,))
-                
-                # Configure tag colors
-                self.products_tree.tag_configure("low_stock", background="#ffcccc")
-                
-                cursor.close()
-                connection.close()
-                
-        except Error as e:
-            messagebox.showerror("Error", f"Failed to load products: {e}")
+        search_term = self.product_search_entry.get().strip()
+        
+        def fetch_products(connection):
+            cursor = connection.cursor(dictionary=True)
+            products = product_service.fetch_products(cursor, search_term)
+            cursor.close()
+            return products
+        
+        def render_products(products):
+            # Skip if the index answered a newer search in the meantime
+            if search_term == self.product_search_entry.get().strip():
+                self.show_products_in_tree(products)
+        
+        self.run_query(fetch_products, render_products, "Failed to load products",
+                       widget=self.products_tree, tag="staff.products")
+        index.refresh(self.main_app)
+    
+    def on_products_changed(self, changes):
+        """Pull changed products into the inventory table (change log subscriber)"""
+        index = product_index.get_product_index()
+        if changes is None or 'categories' in changes:
+            # Category names are stored on the indexed product rows
+            index.invalidate()
+        if hasattr(self, 'products_tree') and self.products_tree.winfo_exists():
+            self.load_products()
+    
+    def schedule_product_search(self, event=None):
+        """Search as you type, once the user pauses"""
+        if self.search_job is not None:
+            self.product_search_entry.after_cancel(self.search_job)
+        self.search_job = self.product_search_entry.after(SEARCH_DEBOUNCE_MS, self.search_products)
+    
+    def search_products(self):
+        """Fill the inventory table from the in-memory product index"""
+        self.search_job = None
+        if not hasattr(self, 'products_tree') or not self.products_tree.winfo_exists():
+            return
+        index = product_index.get_product_index()
+        if not index.is_loaded:
+            self.load_products()
+            return
+        self.show_products_in_tree(index.search(self.product_search_entry.get()))
+    
+    def show_products_in_tree(self, products):
+        for item in self.products_tree.get_children():
+            self.products_tree.delete(item)
+        
+        for product in products:
+            # Highlight low stock items
+            tag = "low_stock" if product['is_low_stock'] else ""
+            
+            self.products_tree.insert("", "end", values=(
+                product['id'],
+                product['name'],
+                product['category_name'] or 'N/A',
+                f"${product['price']:.2f}",
+                product['quantity'],
+                product['reorder_level']
+            ), tags=(tag,))
+        
+        # Configure tag colors
+        self.products_tree.tag_configure("low_stock", background="#ffcccc")
     
     def add_product(self):
         AddProductDialog(self, self.main_app)
@@ -617,16 +763,15 @@ class StaffDashboard:
             product_id = self.products_tree.item(selected[0])['values'][0]
             
             try:
-                connection = db_config.create_connection()
-                if connection:
+                with db_config.get_connection() as connection:
                     cursor = connection.cursor()
                     cursor.execute("DELETE FROM products WHERE id = %s", (product_id,))
                     connection.commit()
+                    dashboard_stats.invalidate()
                     cursor.close()
-                    connection.close()
                     
-                    messagebox.showinfo("Success", "Product deleted successfully")
-                    self.load_products()
+                messagebox.showinfo("Success", "Product deleted successfully")
+                change_log.get_change_feed().poll_now()
                     
             except Error as e:
                 messagebox.showerror("Error", f"Failed to delete product: {e}")
@@ -642,81 +787,214 @@ class StaffDashboard:
         )
         title_label.pack(pady=20)
         
-        try:
-            connection = db_config.create_connection()
-            if connection:
-                cursor = connection.cursor(dictionary=True)
-                
-                cursor.execute("""
-                    SELECT p.*, c.name as category_name, s.name as supplier_name
-                    FROM products p
-                    LEFT JOIN categories c ON p.category_id = c.id
-                    LEFT JOIN suppliers s ON p.supplier_id = s.id
-                    WHERE p.quantity <= p.reorder_level
-                    ORDER BY p.quantity ASC
-                """)
-                
-                low_stock_products = cursor.fetchall()
+        loading_label = self.create_loading_label(self.content_frame)
+        
+        def fetch_alerts(connection):
+            cursor = connection.cursor(dictionary=True)
+            cursor.execute("""
+                SELECT p.*, c.name as category_name, s.name as supplier_name
+                FROM products p
+                LEFT JOIN categories c ON p.category_id = c.id
+                LEFT JOIN suppliers s ON p.supplier_id = s.id
+                WHERE p.is_low_stock = TRUE
+                ORDER BY p.quantity ASC
+            """)
+            low_stock_products = cursor.fetchall()
+            cursor.close()
+            return low_stock_products
+        
+        def render_alerts(low_stock_products):
+            loading_label.destroy()
+            
+            if not low_stock_products:
+                ctk.CTkLabel(
+                    self.content_frame,
+                    text="✓ All products are well-stocked!",
+                    font=ctk.CTkFont(size=18),
+                    text_color="green"
+                ).pack(pady=50)
+            else:
+                # Alerts frame
+                alerts_frame = ctk.CTkFrame(self.content_frame)
+                alerts_frame.pack(fill="both", expand=True, padx=20, pady=10)
                 
-                if not low_stock_products:
+                for product in low_stock_products:
+                    alert_card = ctk.CTkFrame(alerts_frame)
+                    alert_card.pack(fill="x", padx=10, pady=10)
+                    
+                    # Product info
+                    info_frame = ctk.CTkFrame(alert_card, fg_color="transparent")
+                    info_frame.pack(fill="x", padx=10, pady=10)
+                    
                     ctk.CTkLabel(
-                        self.content_frame,
-                        text="✓ All products are well-stocked!",
-                        font=ctk.CTkFont(size=18),
-                        text_color="green"
-                    ).pack(pady=50)
-                else:
-                    # Alerts frame
-                    alerts_frame = ctk.CTkFrame(self.content_frame)
-                    alerts_frame.pack(fill="both", expand=True, padx=20, pady=10)
+                        info_frame,
+                        text=f"⚠️ {product['name']}",
+                        font=ctk.CTkFont(size=16, weight="bold"),
+                        text_color="red"
+                    ).pack(side="left", padx=10)
                     
-                    for product in low_stock_products:
-                        alert_card = ctk.CTkFrame(alerts_frame)
-                        alert_card.pack(fill="x", padx=10, pady=10)
-                        
-                        # Product info
-                        info_frame = ctk.CTkFrame(alert_card, fg_color="transparent")
-                        info_frame.pack(fill="x", padx=10, pady=10)
-                        
-                        ctk.CTkLabel(
-                            info_frame,
-                            text=f"⚠️ {product['name']}",
-                            font=ctk.CTkFont(size=16, weight="bold"),
-                            text_color="red"
-                        ).pack(side="left", padx=10)
-                        
-                        ctk.CTkLabel(
-                            info_frame,
-                            text=f"Current Stock: {product['quantity']}",
-                            font=ctk.CTkFont(size=14),
-                            text_color="orange"
-                        ).pack(side="left", padx=10)
-                        
+                    ctk.CTkLabel(
+                        info_frame,
+                        text=f"Current Stock: {product['quantity']}",
+                        font=ctk.CTkFont(size=14),
+                        text_color="orange"
+                    ).pack(side="left", padx=10)
+                    
+                    ctk.CTkLabel(
+                        info_frame,
+                        text=f"Reorder Level: {product['reorder_level']}",
+                        font=ctk.CTkFont(size=14)
+                    ).pack(side="left", padx=10)
+                    
+                    if product['supplier_name']:
                         ctk.CTkLabel(
                             info_frame,
-                            text=f"Reorder Level: {product['reorder_level']}",
-                            font=ctk.CTkFont(size=14)
-                        ).pack(side="left", padx=10)
-                        
-                        if product['supplier_name']:
-                            ctk.CTkLabel(
-                                info_frame,
-                                text=f"Supplier: {product['supplier_name']}",
-                                font=ctk.CTkFont(size=12),
-                                text_color="gray"
-                            ).pack(side="right", padx=10)
-                
-                cursor.close()
-                connection.close()
-                
-        except Error as e:
-            messagebox.showerror("Error", f"Failed to load alerts: {e}")
+                            text=f"Supplier: {product['supplier_name']}",
+                            font=ctk.CTkFont(size=12),
+                            text_color="gray"
+                        ).pack(side="right", padx=10)
+        
+        self.run_query(fetch_alerts, render_alerts, "Failed to load alerts", widget=loading_label)
     
     def logout(self):
         if messagebox.askyesno("Logout", "Are you sure you want to logout?"):
             self.main_app.logout()
 
 
+class OrderCard(ctk.CTkFrame):
+    """Reusable order card for the virtualized order board; show() rebinds it to another order"""
+    
+    status_colors = {
+        'pending': 'orange',
+        'approved': 'green',
+        'rejected': 'red',
+    }
+    
+    def __init__(self, parent, dashboard):
+        super().__init__(parent)
+        self.dashboard = dashboard
+        self.pack_propagate(False)
+        self.order_id = None
+        
+        # Header - use grid for better alignment
+        header_frame = ctk.CTkFrame(self, fg_color="transparent")
+        header_frame.pack(fill="x", padx=15, pady=(15, 5))
+        
+        # Order ID and Customer on left
+        left_header = ctk.CTkFrame(header_frame, fg_color="transparent")
+        left_header.pack(side="left", fill="x", expand=True)
+        
+        self.id_label = ctk.CTkLabel(left_header, text="", font=ctk.CTkFont(size=16, weight="bold"))
+        self.id_label.pack(side="left", padx=(0, 20))
+        
+        self.customer_label = ctk.CTkLabel(left_header, text="", font=ctk.CTkFont(size=12))
+        self.customer_label.pack(side="left", padx=(0, 15))
+        
+        self.date_label = ctk.CTkLabel(left_header, text="", font=ctk.CTkFont(size=12), text_color="gray")
+        self.date_label.pack(side="left")
+        
+        # Total on right
+        self.total_label = ctk.CTkLabel(
+            header_frame,
+            text="",
+            font=ctk.CTkFont(size=18, weight="bold"),
+            text_color="green"
+        )
+        self.total_label.pack(side="right", padx=10)
+        
+        # Items section - fixed number of lines so every card has the same height
+        items_frame = ctk.CTkFrame(self, fg_color="transparent")
+        items_frame.pack(fill="x", padx=15, pady=(5, 10))
+        
+        item_font = ctk.CTkFont(size=12)
+        self.item_labels = []
+        for _ in range(ORDER_CARD_MAX_ITEMS + 1):
+            label = ctk.CTkLabel(items_frame, text="", font=item_font, anchor="w", height=20)
+            label.pack(anchor="w", padx=5, pady=1)
+            self.item_labels.append(label)
+        
+        # Actions - use grid for better alignment
+        actions_frame = ctk.CTkFrame(self, fg_color="transparent")
+        actions_frame.pack(fill="x", side="bottom", padx=15, pady=(5, 15))
+        
+        # Left side - Selection and status
+        self.select_var = tk.BooleanVar(value=False)
+        self.select_checkbox = ctk.CTkCheckBox(
+            actions_frame,
+            text="",
+            width=24,
+            variable=self.select_var,
+            command=lambda: self.dashboard.toggle_order_selection(self.order_id, self.select_var.get())
+        )
+        self.select_checkbox.pack(side="left", padx=(5, 0))
+        
+        self.status_label = ctk.CTkLabel(actions_frame, text="", font=ctk.CTkFont(size=13, weight="bold"))
+        self.status_label.pack(side="left", padx=5)
+        
+        # Right side - Action buttons (only shown for pending orders)
+        self.button_frame = ctk.CTkFrame(actions_frame, fg_color="transparent")
+        
+        ctk.CTkButton(
+            self.button_frame,
+            text="✗ Reject Order",
+            width=120,
+            height=32,
+            fg_color="red",
+            hover_color="darkred",
+            font=ctk.CTkFont(size=12),
+            command=lambda: self.dashboard.update_order_status([self.order_id], 'rejected')
+        ).pack(side="right", padx=5)
+        
+        ctk.CTkButton(
+            self.button_frame,
+            text="✓ Approve Order",
+            width=130,
+            height=32,
+            fg_color="green",
+            hover_color="darkgreen",
+            font=ctk.CTkFont(size=12),
+            command=lambda: self.dashboard.update_order_status([self.order_id], 'approved')
+        ).pack(side="right", padx=5)
+    
+    def show(self, order):
+        """Fill the card with another order's data"""
+        self.order_id = order['id']
+        
+        self.id_label.configure(text=f"Order #{order['id']}")
+        self.customer_label.configure(text=f"Customer: {order['customer_name']}")
+        self.date_label.configure(text=f"Date: {order['order_date'].strftime('%Y-%m-%d %H:%M')}")
+        self.total_label.configure(text=f"${order['total_amount']:.2f}")
+        
+        items = order['items']
+        lines = [
+            f"• {item['product_name']} x {item['quantity']} - ${item['price'] * item['quantity']:.2f}"
+            for item in items[:ORDER_CARD_MAX_ITEMS]
+        ]
+        if len(items) > ORDER_CARD_MAX_ITEMS:
+            lines.append(f"  + {len(items) - ORDER_CARD_MAX_ITEMS} more item(s)")
+        for i, label in enumerate(self.item_labels):
+            label.configure(text=lines[i] if i < len(lines) else "")
+        
+        self.show_status(order)
+    
+    def show_status(self, order):
+        """Refresh only the status line, selection box and action buttons"""
+        self.status_label.configure(
+            text=f"Status: {order['status'].upper()}",
+            text_color=self.status_colors.get(order['status'], 'gray')
+        )
+        
+        # Only pending orders can be selected for bulk approve/reject
+        pending = order['status'] == 'pending'
+        self.select_var.set(pending and order['id'] in self.dashboard.selected_orders)
+        self.select_checkbox.configure(state="normal" if pending else "disabled")
+        
+        if pending:
+            self.button_frame.pack(side="right", padx=10)
+        else:
+            self.button_frame.pack_forget()
+
+
 class AddProductDialog(ctk.CTkToplevel):
     def __init__(self, parent, main_app):
         super().__init__(parent.main_app)
@@ -805,13 +1083,11 @@ class AddProductDialog(ctk.CTkToplevel):
     
     def get_categories(self):
         try:
-            connection = db_config.create_connection()
-            if connection:
+            with db_config.get_connection() as connection:
                 cursor = connection.cursor()
                 cursor.execute("SELECT name FROM categories ORDER BY name")
                 categories = [row[0] for row in cursor.fetchall()]
                 cursor.close()
-                connection.close()
                 return categories if categories else ["No categories"]
         except Error as e:
             print(f"Error: {e}")
@@ -819,13 +1095,11 @@ class AddProductDialog(ctk.CTkToplevel):
     
     def get_suppliers(self):
         try:
-            connection = db_config.create_connection()
-            if connection:
+            with db_config.get_connection() as connection:
                 cursor = connection.cursor()
                 cursor.execute("SELECT name FROM suppliers ORDER BY name")
                 suppliers = [row[0] for row in cursor.fetchall()]
                 cursor.close()
-                connection.close()
                 return suppliers if suppliers else ["No suppliers"]
         except Error as e:
             print(f"Error: {e}")
@@ -868,8 +1142,7 @@ class AddProductDialog(ctk.CTkToplevel):
                 messagebox.showerror("Error", "Reorder level cannot be negative")
                 return
             
-            connection = db_config.create_connection()
-            if connection:
+            with db_config.get_connection() as connection:
                 cursor = connection.cursor()
                 
                 # Get category ID
@@ -890,12 +1163,12 @@ class AddProductDialog(ctk.CTkToplevel):
                 )
                 
                 connection.commit()
+                dashboard_stats.invalidate()
                 cursor.close()
-                connection.close()
                 
-                messagebox.showinfo("Success", "Product added successfully!")
-                self.destroy()
-                self.parent.load_products()
+            messagebox.showinfo("Success", "Product added successfully!")
+            self.destroy()
+            change_log.get_change_feed().poll_now()
                 
         except ValueError:
             messagebox.showerror("Error", "Please enter valid numbers for price, quantity, and reorder level")
@@ -994,13 +1267,11 @@ class EditProductDialog(ctk.CTkToplevel):
     
     def get_categories(self):
         try:
-            connection = db_config.create_connection()
-            if connection:
+            with db_config.get_connection() as connection:
                 cursor = connection.cursor()
                 cursor.execute("SELECT name FROM categories ORDER BY name")
                 categories = [row[0] for row in cursor.fetchall()]
                 cursor.close()
-                connection.close()
                 return categories if categories else ["No categories"]
         except Error as e:
             print(f"Error: {e}")
@@ -1008,13 +1279,11 @@ class EditProductDialog(ctk.CTkToplevel):
     
     def get_suppliers(self):
         try:
-            connection = db_config.create_connection()
-            if connection:
+            with db_config.get_connection() as connection:
                 cursor = connection.cursor()
                 cursor.execute("SELECT name FROM suppliers ORDER BY name")
                 suppliers = [row[0] for row in cursor.fetchall()]
                 cursor.close()
-                connection.close()
                 return suppliers if suppliers else ["No suppliers"]
         except Error as e:
             print(f"Error: {e}")
@@ -1022,8 +1291,7 @@ class EditProductDialog(ctk.CTkToplevel):
     
     def load_product_data(self):
         try:
-            connection = db_config.create_connection()
-            if connection:
+            with db_config.get_connection() as connection:
                 cursor = connection.cursor(dictionary=True)
                 cursor.execute("""
                     SELECT p.*, c.name as category_name, s.name as supplier_name
@@ -1045,7 +1313,6 @@ class EditProductDialog(ctk.CTkToplevel):
                     self.reorder_entry.insert(0, str(product['reorder_level']))
                 
                 cursor.close()
-                connection.close()
                 
         except Error as e:
             messagebox.showerror("Error", f"Failed to load product data: {e}")
@@ -1087,8 +1354,7 @@ class EditProductDialog(ctk.CTkToplevel):
                 messagebox.showerror("Error", "Reorder level cannot be negative")
                 return
             
-            connection = db_config.create_connection()
-            if connection:
+            with db_config.get_connection() as connection:
                 cursor = connection.cursor()
                 
                 # Get category ID
@@ -1111,12 +1377,12 @@ class EditProductDialog(ctk.CTkToplevel):
                 )
                 
                 connection.commit()
+                dashboard_stats.invalidate()
                 cursor.close()
-                connection.close()
                 
-                messagebox.showinfo("Success", "Product updated successfully!")
-                self.destroy()
-                self.parent.load_products()
+            messagebox.showinfo("Success", "Product updated successfully!")
+            self.destroy()
+            change_log.get_change_feed().poll_now()
                 
         except ValueError:
             messagebox.showerror("Error", "Please enter valid numbers for price, quantity, and reorder level")
@@ -0,0 +1,163 @@
+"""
+Stock Reservations
+Holds stock for items sitting in a customer's cart, so two customers
+cannot both put the last units in their carts.
+
+A hold is one stock_reservations row per (customer, product) with an
+expiry time. Available-to-sell is the product quantity minus the
+unexpired holds, summed through the (product_id, expires_at, quantity,
+customer_id) index without touching the rows themselves. Reserving locks just the
+one product row, so holds on different products never wait for each
+other. Expired holds are ignored by every query and deleted in the
+background by the sweeper.
+"""
+import threading
+import db_config
+
+# How long an item stays reserved after it was last added to the cart (seconds)
+RESERVATION_TTL_SECONDS = 15 * 60
+# How often the sweeper deletes expired holds (seconds)
+SWEEP_INTERVAL_SECONDS = 60
+# Rows deleted per sweep statement, so a sweep never holds long locks
+SWEEP_BATCH_SIZE = 1000
+
+
+def held_quantities(cursor, product_ids, exclude_customer_id=None):
+    """{product_id: units held by unexpired reservations}, optionally ignoring one customer's holds"""
+    product_ids = list(product_ids)
+    if not product_ids:
+        return {}
+    placeholders = ", ".join(["%s"] * len(product_ids))
+    query = f"""
+        SELECT product_id, SUM(quantity) as held
+        FROM stock_reservations
+        WHERE product_id IN ({placeholders}) AND expires_at > NOW()
+    """
+    params = list(product_ids)
+    if exclude_customer_id is not None:
+        query += " AND customer_id != %s"
+        params.append(exclude_customer_id)
+    query += " GROUP BY product_id"
+    cursor.execute(query, params)
+    return {row[0]: int(row[1]) for row in cursor.fetchall()}
+
+
+def available_to_sell(cursor, product_ids):
+    """{product_id: stock quantity minus unexpired holds} for existing products"""
+    product_ids = list(product_ids)
+    if not product_ids:
+        return {}
+    placeholders = ", ".join(["%s"] * len(product_ids))
+    cursor.execute(f"SELECT id, quantity FROM products WHERE id IN ({placeholders})", product_ids)
+    quantities = {row[0]: row[1] for row in cursor.fetchall()}
+    held = held_quantities(cursor, quantities)
+    return {product_id: quantity - held.get(product_id, 0) for product_id, quantity in quantities.items()}
+
+
+def reserve(connection, customer_id, product_id, quantity, ttl=RESERVATION_TTL_SECONDS):
+    """Hold `quantity` more units of a product for a customer; returns (reserved, available).
+
+    `available` is what the customer could still add (0 if the product is
+    gone). Adding to an existing hold extends its expiry; a hold that had
+    already expired starts again from zero.
+    """
+    cursor = connection.cursor()
+    try:
+        # Serializes reservations of this product only
+        cursor.execute("SELECT quantity FROM products WHERE id = %s FOR UPDATE", (product_id,))
+        row = cursor.fetchone()
+        if row is None:
+            connection.rollback()
+            return False, 0
+        available = row[0] - held_quantities(cursor, [product_id]).get(product_id, 0)
+        if quantity > available:
+            connection.rollback()
+            return False, max(available, 0)
+
+        # quantity is assigned before expires_at, so it still sees the old expiry
+        cursor.execute(
+            """INSERT INTO stock_reservations (customer_id, product_id, quantity, expires_at)
+            VALUES (%s, %s, %s, NOW() + INTERVAL %s SECOND)
+            ON DUPLICATE KEY UPDATE
+                quantity = IF(expires_at > NOW(), quantity, 0) + VALUES(quantity),
+                expires_at = VALUES(expires_at)""",
+            (customer_id, product_id, quantity, ttl)
+        )
+        connection.commit()
+        return True, available - quantity
+    except Exception:
+        connection.rollback()
+        raise
+    finally:
+        cursor.close()
+
+
+def release(connection, customer_id, product_ids=None):
+    """Drop a customer's holds on the given products (all of them if None)"""
+    cursor = connection.cursor()
+    query = "DELETE FROM stock_reservations WHERE customer_id = %s"
+    params = [customer_id]
+    if product_ids is not None:
+        product_ids = list(product_ids)
+        if not product_ids:
+            cursor.close()
+            return
+        query += f" AND product_id IN ({', '.join(['%s'] * len(product_ids))})"
+        params.extend(product_ids)
+    cursor.execute(query, params)
+    connection.commit()
+    cursor.close()
+
+
+def sweep_expired(connection, batch_size=SWEEP_BATCH_SIZE):
+    """Delete expired holds in small batches; returns how many were deleted"""
+    cursor = connection.cursor()
+    deleted = 0
+    try:
+        while True:
+            cursor.execute("DELETE FROM stock_reservations WHERE expires_at <= NOW() LIMIT %s", (batch_size,))
+            connection.commit()
+            deleted += cursor.rowcount
+            if cursor.rowcount < batch_size:
+                return deleted
+    finally:
+        cursor.close()
+
+
+class ReservationSweeper:
+    """Daemon thread that periodically deletes expired holds"""
+
+    def __init__(self, interval=SWEEP_INTERVAL_SECONDS):
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="reservation-sweeper", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                with db_config.get_connection() as connection:
+                    sweep_expired(connection)
+            except Exception as e:
+                # Expired holds are already ignored by every query; just try again next time
+                print(f"Reservation sweep failed: {e}")
+
+
+_sweeper = None
+_sweeper_lock = threading.Lock()
+
+def start_sweeper():
+    """Start the process-wide sweeper (once)"""
+    global _sweeper
+    with _sweeper_lock:
+        if _sweeper is None:
+            _sweeper = ReservationSweeper()
+            _sweeper.start()
+        return _sweeper
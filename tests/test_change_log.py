@@ -0,0 +1,66 @@
+import pytest
+import change_log
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(change_log.time, "monotonic", fake)
+    return fake
+
+
+@pytest.fixture
+def feed(clock):
+    feed = change_log.ChangeFeed()
+    feed.version = 10
+    return feed
+
+
+def test_advance_in_order(feed):
+    feed._advance([11, 12, 13])
+    assert feed.version == 13
+    assert feed._delivered == set()
+    assert feed._gap is None
+
+
+def test_advance_waits_at_a_gap_until_it_fills_in(feed, clock):
+    feed._advance([12, 13])
+    assert feed.version == 10
+    assert feed._delivered == {12, 13}
+    assert feed._gap == (11, clock.now)
+
+    clock.now += change_log.GAP_TIMEOUT_SECONDS - 1
+    feed._advance([11])
+    assert feed.version == 13
+    assert feed._delivered == set()
+
+
+def test_advance_skips_a_gap_that_times_out(feed, clock):
+    feed._advance([12, 13])
+    clock.now += change_log.GAP_TIMEOUT_SECONDS - 1
+    feed._advance([])
+    assert feed.version == 10
+
+    clock.now += 1
+    feed._advance([])
+    assert feed.version == 13
+    assert feed._delivered == set()
+    assert feed._gap is None
+
+
+def test_advance_times_a_later_gap_from_when_it_is_reached(feed, clock):
+    feed._advance([12, 15])
+    clock.now += change_log.GAP_TIMEOUT_SECONDS
+    feed._advance([])
+    # 11 is given up; 13 only started to be missed now
+    assert feed.version == 12
+    assert feed._gap == (13, clock.now)
+    assert feed._delivered == {15}
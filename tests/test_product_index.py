@@ -0,0 +1,41 @@
+from datetime import datetime
+from product_index import ProductIndex
+
+
+def product(product_id, name, description="", category="Books", quantity=1):
+    return {
+        'id': product_id, 'name': name, 'description': description,
+        'category_name': category, 'quantity': quantity, 'updated_at': datetime(2026, 1, 1)
+    }
+
+
+def names(products):
+    return [item['name'] for item in products]
+
+
+def test_results_are_in_name_order_after_updates():
+    index = ProductIndex()
+    index.apply_changes([product(1, "Pasta"), product(2, "Cookbook"), product(3, "Olive Oil")])
+    index.add(product(4, "Apple Juice"))
+    index.add(product(2, "Tea Cookbook"))
+    index.remove(3)
+    assert names(index.search()) == ["Apple Juice", "Pasta", "Tea Cookbook"]
+
+
+def test_search_matches_every_word_as_a_prefix_with_filters():
+    index = ProductIndex()
+    index.apply_changes([
+        product(1, "Wireless Mouse", category="Electronics"),
+        product(2, "Wired Mouse", category="Electronics", quantity=0),
+        product(3, "Mouse Pad", "wireless charging", category="Office"),
+    ])
+    assert names(index.search("wire mou")) == ["Mouse Pad", "Wired Mouse", "Wireless Mouse"]
+    assert names(index.search("wire mou", category="Electronics", in_stock_only=True)) == ["Wireless Mouse"]
+    assert index.search("keyboard") == []
+
+
+def test_deleted_products_leave_the_results():
+    index = ProductIndex()
+    index.apply_changes([product(1, "Pasta"), product(2, "Cookbook")])
+    index.apply_changes([], product_ids=[2])
+    assert names(index.search()) == ["Cookbook"]
@@ -0,0 +1,14 @@
+from product_service import build_fulltext_query
+
+
+def test_every_word_is_required_and_prefix_matched():
+    assert build_fulltext_query("wireless mouse") == "+wireless* +mouse*"
+
+
+def test_boolean_operators_are_stripped():
+    assert build_fulltext_query('-usb +"cable"*') == "+usb* +cable*"
+
+
+def test_short_words_are_dropped():
+    assert build_fulltext_query("tv stand") == "+stand*"
+    assert build_fulltext_query("tv") is None
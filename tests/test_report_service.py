@@ -0,0 +1,24 @@
+from datetime import date, datetime
+from report_service import _day_range
+
+
+def test_day_range_without_bounds():
+    assert _day_range(None, None) == ("", [])
+
+
+def test_day_range_with_dates_excludes_the_end_day():
+    condition, params = _day_range(date(2026, 1, 1), date(2026, 2, 1))
+    assert condition == " AND day >= %s AND day < %s"
+    assert params == [date(2026, 1, 1), date(2026, 2, 1)]
+
+
+def test_day_range_end_at_midnight_excludes_that_day():
+    condition, params = _day_range(None, datetime(2026, 2, 1))
+    assert condition == " AND day < %s"
+    assert params == [date(2026, 2, 1)]
+
+
+def test_day_range_partial_end_day_is_included():
+    condition, params = _day_range(datetime(2026, 1, 1, 9, 30), datetime(2026, 2, 1, 13, 30))
+    assert condition == " AND day >= %s AND day <= %s"
+    assert params == [date(2026, 1, 1), date(2026, 2, 1)]
@@ -10,6 +10,7 @@ import mysql.connector
 from mysql.connector import Error
 import hashlib
 import db_config
+import dashboard_stats
 
 # Set appearance mode and theme
 ctk.set_appearance_mode("System")
@@ -336,8 +337,7 @@ class RegisterScreen(ctk.CTkToplevel):
             return
         
         try:
-            connection = db_config.create_connection()
-            if connection:
+            with db_config.get_connection() as connection:
                 cursor = connection.cursor(dictionary=True)
                 
                 # Check if email already exists
@@ -360,9 +360,9 @@ class RegisterScreen(ctk.CTkToplevel):
                     (first_name, last_name, email, phone, self.hash_password(password), user_type, is_approved)
                 )
                 connection.commit()
+                dashboard_stats.invalidate()
                 
                 cursor.close()
-                connection.close()
                 
                 # Show success message
                 if user_type == "staff":
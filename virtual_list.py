@@ -0,0 +1,246 @@
+"""
+Virtual List
+A scrollable list (or grid) that only creates widgets for the rows in (or
+near) the viewport. Rows have a fixed height; widgets scrolled out of view
+are hidden and reused for the items scrolled into view, so the number of
+widgets stays constant however many items the list holds.
+
+`columns` lays items out in a grid: pass a number, or a function of the
+available width that returns the column count (recomputed on resize).
+
+With a `key` function (e.g. lambda order: order['id']) items can be looked
+up, patched, inserted and removed by key without rebinding the other rows:
+row_for() returns the widget currently showing an item, if any, and
+insert_item() / remove_items() only move the rows below the change.
+
+Usage:
+    board = VirtualList(parent, row_height=220,
+                        create_row=lambda canvas: OrderCard(canvas),
+                        bind_row=lambda card, order: card.show(order),
+                        on_near_end=self.load_more)
+    board.pack(fill="both", expand=True)
+    board.set_items(orders)
+"""
+import bisect
+import tkinter as tk
+import customtkinter as ctk
+
+
+class VirtualList:
+    def __init__(self, parent, row_height, create_row, bind_row, on_near_end=None,
+                 bg=None, row_padding=10, overscan=2, columns=1, key=None):
+        self.row_height = row_height
+        self.columns = columns
+        self.create_row = create_row
+        self.bind_row = bind_row
+        self.on_near_end = on_near_end
+        self.key = key
+        self.row_padding = row_padding
+        # Extra rows materialized above and below the viewport for smooth scrolling
+        self.overscan = overscan
+
+        self.items = []
+        self._positions = {}  # item key -> item index (only with a key function)
+        self._active = {}  # item index -> (row widget, canvas window id)
+        self._free = []    # hidden (row widget, canvas window id) pairs ready for reuse
+        self._refresh_pending = False
+        self._column_count = None
+
+        self.container = ctk.CTkFrame(parent)
+        self.canvas = tk.Canvas(self.container, bg=bg, highlightthickness=0, yscrollincrement=20)
+        self.scrollbar = ctk.CTkScrollbar(self.container, command=self.canvas.yview)
+        self.canvas.configure(yscrollcommand=self._on_view_changed)
+
+        self.canvas.pack(side="left", fill="both", expand=True)
+        self.scrollbar.pack(side="right", fill="y")
+
+        self._message_id = self.canvas.create_text(
+            20, 40, anchor="w", text="", fill="gray", font=("Segoe UI", 14)
+        )
+
+        self.canvas.bind("<Configure>", lambda event: self._rebind_all())
+        self._bind_mousewheel(self.canvas)
+
+    def pack(self, **kwargs):
+        self.container.pack(**kwargs)
+
+    def winfo_exists(self):
+        return self.canvas.winfo_exists()
+
+    # ---------------- Items ----------------
+    def set_items(self, items):
+        """Replace all items and scroll back to the top"""
+        self.items = list(items)
+        self._positions = {}
+        self._index_keys(0)
+        self.canvas.yview_moveto(0)
+        self._rebind_all()
+
+    def append_items(self, items):
+        start = len(self.items)
+        self.items.extend(items)
+        self._index_keys(start)
+        self._schedule_refresh()
+
+    def get_item(self, key):
+        index = self._positions.get(key)
+        return None if index is None else self.items[index]
+
+    def row_for(self, key):
+        """The row widget currently showing the item with this key, or None if it is off screen"""
+        active = self._active.get(self._positions.get(key))
+        return active[0] if active else None
+
+    def visible_rows(self):
+        """(row widget, item) for every materialized row"""
+        return [(widget, self.items[index]) for index, (widget, window) in self._active.items()]
+
+    def insert_item(self, index, item):
+        """Insert an item at `index`; rows above it are left alone, rows below move down"""
+        self.items.insert(index, item)
+        self._index_keys(index)
+        active = {}
+        for row_index, (widget, window) in self._active.items():
+            if row_index >= index:
+                row_index += 1
+                self._place(window, row_index)
+            active[row_index] = (widget, window)
+        self._active = active
+        self._schedule_refresh()
+
+    def remove_items(self, keys):
+        """Drop the items with these keys; rows above them are left alone, rows below move up"""
+        removed = sorted(self._positions[key] for key in set(keys) if key in self._positions)
+        if not removed:
+            return
+        first = removed[0]
+        removed_set = set(removed)
+        for index in removed:
+            del self._positions[self.key(self.items[index])]
+        self.items[first:] = [
+            item for index, item in enumerate(self.items[first:], first) if index not in removed_set
+        ]
+        self._index_keys(first)
+
+        # Hide the removed rows and slide the materialized rows below them into place
+        active = {}
+        for index, (widget, window) in self._active.items():
+            if index in removed_set:
+                self.canvas.itemconfigure(window, state="hidden")
+                self._free.append((widget, window))
+                continue
+            new_index = index - bisect.bisect_left(removed, index)
+            if new_index != index:
+                self._place(window, new_index)
+            active[new_index] = (widget, window)
+        self._active = active
+        self._schedule_refresh()
+
+    def _index_keys(self, start):
+        if self.key is not None:
+            for index in range(start, len(self.items)):
+                self._positions[self.key(self.items[index])] = index
+
+    def set_message(self, text):
+        """Show a status line (e.g. "Loading...") at the top of the list"""
+        self.canvas.itemconfigure(self._message_id, text=text)
+
+    # ---------------- Rendering ----------------
+    def _on_view_changed(self, first, last):
+        self.scrollbar.set(first, last)
+        self._schedule_refresh()
+
+    def _schedule_refresh(self):
+        if not self._refresh_pending:
+            self._refresh_pending = True
+            self.canvas.after_idle(self._refresh)
+
+    def _rebind_all(self):
+        """Release every row so the visible ones are rebound on the next refresh"""
+        self._release_all()
+        self._schedule_refresh()
+
+    def _release_all(self):
+        for widget, window in self._active.values():
+            self.canvas.itemconfigure(window, state="hidden")
+            self._free.append((widget, window))
+        self._active.clear()
+
+    def _refresh(self):
+        self._refresh_pending = False
+        if not self.canvas.winfo_exists():
+            return
+
+        width = self.canvas.winfo_width()
+        height = self.canvas.winfo_height()
+
+        columns = self.columns(width) if callable(self.columns) else self.columns
+        columns = max(1, columns)
+        if columns != self._column_count:
+            # Every item moves when the column count changes
+            self._column_count = columns
+            self._release_all()
+
+        row_count = -(-len(self.items) // columns)
+        total_height = row_count * self.row_height
+        self.canvas.configure(scrollregion=(0, 0, width, max(total_height, height)))
+
+        top = self.canvas.canvasy(0)
+        first_row = max(0, int(top // self.row_height) - self.overscan)
+        last_row = int((top + height) // self.row_height) + 1 + self.overscan
+        first = first_row * columns
+        last = min(len(self.items), last_row * columns)
+        cell_width = width / columns
+
+        # Hide rows that left the window and keep them for reuse
+        for index in list(self._active):
+            if index < first or index >= last:
+                widget, window = self._active.pop(index)
+                self.canvas.itemconfigure(window, state="hidden")
+                self._free.append((widget, window))
+
+        # Bind rows that entered the window
+        pad = self.row_padding
+        for index in range(first, last):
+            if index in self._active:
+                continue
+            if self._free:
+                widget, window = self._free.pop()
+            else:
+                widget = self.create_row(self.canvas)
+                self._bind_mousewheel(widget)
+                window = self.canvas.create_window(0, 0, window=widget, anchor="nw")
+            self.bind_row(widget, self.items[index])
+            self._place(window, index)
+            self.canvas.itemconfigure(
+                window,
+                width=max(1, int(cell_width) - 2 * pad),
+                height=self.row_height - 2 * pad,
+                state="normal"
+            )
+            self._active[index] = (widget, window)
+
+        # Ask for the next page once the user gets close to the end
+        if self.on_near_end and self.items and last >= len(self.items) - self.overscan * columns:
+            self.on_near_end()
+
+    def _place(self, window, index):
+        columns = self._column_count or 1
+        cell_width = self.canvas.winfo_width() / columns
+        row, column = divmod(index, columns)
+        self.canvas.coords(window, column * cell_width + self.row_padding, row * self.row_height + self.row_padding)
+
+    # ---------------- Scrolling ----------------
+    def _bind_mousewheel(self, widget):
+        """Scroll the list from anywhere inside it (rows included)"""
+        tk.Misc.bind(widget, "<MouseWheel>", self._on_mousewheel, "+")
+        tk.Misc.bind(widget, "<Button-4>", self._on_mousewheel, "+")
+        tk.Misc.bind(widget, "<Button-5>", self._on_mousewheel, "+")
+        for child in widget.winfo_children():
+            self._bind_mousewheel(child)
+
+    def _on_mousewheel(self, event):
+        if event.num == 4 or event.delta > 0:
+            self.canvas.yview_scroll(-1, "units")
+        else:
+            self.canvas.yview_scroll(1, "units")